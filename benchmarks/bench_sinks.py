@@ -0,0 +1,49 @@
+"""Throughput of demo campaigns under each output sink.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_sinks --games 2000
+
+Narration for the ``stdout`` case goes to standard output, so redirect it to
+a file or a pipe to measure something other than your terminal. Results are
+reported on standard error.
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable, Dict
+
+from game.dm import run_game
+from game.output import BufferedSink, NULL, OutputSink, StreamSink
+
+
+def games_per_second(games: int, make_sink: Callable[[], OutputSink]) -> float:
+    started = time.perf_counter()
+    for seed in range(games):
+        run_game(seed=seed, scripted_choices=["新晋忍者", "t", "k"], demo_mode=True, out=make_sink())
+    return games / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        cases: Dict[str, Callable[[], OutputSink]] = {
+            "null": lambda: NULL,
+            "buffered(devnull)": lambda: BufferedSink(devnull),
+            "stream(devnull)": lambda: StreamSink(devnull),
+            "stdout": lambda: StreamSink(sys.stdout),
+        }
+        results = {name: games_per_second(args.games, make) for name, make in cases.items()}
+
+    baseline = results["stdout"]
+    for name, rate in results.items():
+        print(f"{name:<18} {rate:10.0f} games/s  x{rate / baseline:5.2f} vs stdout", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,12 @@
 """Fire off the Naruto: Chunin Exams text adventure."""
 
-from .dm import run_game
-
 __all__ = ["run_game"]
+
+
+def __getattr__(name: str):
+    # Importing ``game.dice`` or ``game.dm`` alone should not pay for the rest.
+    if name == "run_game":
+        from .dm import run_game
+
+        return run_game
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,717 @@
+"""Exact outcome probabilities for every phase, computed without sampling.
+
+Each phase is mirrored here as a small program over :class:`State`: checks
+become two-way chance branches, damage becomes one branch per total and
+prompts become decision nodes answered by a :data:`Policy`. Pushing a state
+distribution through a program yields the exact distributions of end states
+for runs that passed and failed the phase. Per-phase kernels and campaign
+prefixes are memoised, so a full campaign is the composition of cached
+kernels.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, Mapping, NamedTuple, Tuple, Union
+
+from .character import Character
+from .dice import INSPIRATION_QUESTION, check_odds, damage_odds
+from .encounters import Steps, dc_overrides, load_content, patrol_table
+from .phases.exam import CHEAT_QUESTION, DECLARATION_QUESTION
+from .phases.finals import DEFENSE_QUESTION
+from .phases.forest import ACTION_QUESTION, SET_PIECE_QUESTION
+from .phases.prelims import SOLO_QUESTION
+
+
+PHASES = ("exam", "forest", "prelims", "finals")
+ABILITIES = ("体术", "速度", "体魄", "知识", "感知", "意志")
+
+
+class State(NamedTuple):
+    """The parts of a :class:`Character` that change during a campaign."""
+
+    hp: int
+    chakra: int
+    fatigue: int
+    inspiration: bool
+    scrolls: int
+
+    @classmethod
+    def from_character(cls, character: Character) -> "State":
+        return cls(
+            hp=character.hp,
+            chakra=character.chakra,
+            fatigue=character.fatigue,
+            inspiration=character.hero_inspiration,
+            scrolls=sum("卷轴" in scroll for scroll in character.scrolls),
+        )
+
+
+@dataclass(frozen=True)
+class Profile:
+    """The fixed parts of a character sheet that checks depend on."""
+
+    modifiers: Tuple[int, ...]
+    proficiency: int
+    max_chakra: int
+
+    @classmethod
+    def from_character(cls, character: Character) -> "Profile":
+        scores = character.ability_scores
+        return cls(
+            modifiers=tuple(character.modifier(ability) for ability in ABILITIES),
+            proficiency=character.proficiency,
+            max_chakra=scores.get("体魄", 10) + scores.get("意志", 10) * 2,
+        )
+
+    def modifier(self, ability: str) -> int:
+        return self.modifiers[ABILITIES.index(ability)]
+
+
+Policy = Callable[[str, State], str]
+Regs = Tuple[int, ...]
+# Named damage totals rolled so far in an encounter, for ``at_least``.
+Rolls = Tuple[Tuple[str, int], ...]
+
+
+class Goto(NamedTuple):
+    label: str
+    state: State
+    regs: Regs = ()
+
+
+class Done(NamedTuple):
+    passed: bool
+    state: State
+
+
+class Chance(NamedTuple):
+    branches: Tuple[Tuple[float, "Transition"], ...]
+
+
+class Decide(NamedTuple):
+    question: str
+    state: State
+    options: Mapping[str, "Transition"]
+    otherwise: "Transition"
+
+
+Transition = Union[Goto, Done, Chance, Decide]
+Step = Callable[[Profile, State, Regs], Transition]
+
+
+def constant_policy(answer: str) -> Policy:
+    return _constant_policy(answer)
+
+
+@lru_cache(maxsize=None)
+def _constant_policy(answer: str) -> Policy:
+    def policy(question: str, state: State) -> str:
+        return answer
+
+    policy.reads_state = False
+    return policy
+
+
+def keyword_policy(answers: Mapping[str, str]) -> Policy:
+    """Answer like :data:`game.simulate.POLICIES`: first keyword hit, else ``"*"``."""
+
+    return _keyword_policy(tuple(answers.items()))
+
+
+@lru_cache(maxsize=None)
+def _keyword_policy(answers: Tuple[Tuple[str, str], ...]) -> Policy:
+    fallback = dict(answers).get("*", "")
+
+    def policy(question: str, state: State) -> str:
+        return next((value for key, value in answers if key != "*" and key in question), fallback)
+
+    policy.reads_state = False
+    return policy
+
+
+# --- primitives ---------------------------------------------------------
+
+
+def success_chance(profile: Profile, ability: str, dc: int, proficient: bool = True) -> float:
+    return check_odds(profile.modifier(ability), dc, profile.proficiency if proficient else 0).plain
+
+
+def dice_distribution(dice: str) -> Tuple[Tuple[int, float], ...]:
+    return damage_odds(dice).distribution
+
+
+def _either(p: float, success: Transition, failure: Transition) -> Transition:
+    if p >= 1:
+        return success
+    if p <= 0:
+        return failure
+    return Chance(((p, success), (1 - p, failure)))
+
+
+def _check(
+    profile: Profile,
+    state: State,
+    ability: str,
+    dc: int,
+    then: Callable[[State, bool], Transition],
+    proficient: bool = True,
+    inspired: bool = False,
+) -> Transition:
+    """Mirror ``ability_check``, wrapped in ``with_inspiration`` when ``inspired``."""
+
+    p = success_chance(profile, ability, dc, proficient)
+    if not (inspired and state.inspiration):
+        return _either(p, then(state, True), then(state, False))
+    # The reroll is only offered after a miss.
+    spent = _inspire(state, False)
+    reroll = _either(p, then(spent, True), then(spent, False))
+    return _either(p, then(state, True), Decide(INSPIRATION_QUESTION, state, {"y": reroll}, then(state, False)))
+
+
+def _damage(dice: str, then: Callable[[int], Transition]) -> Transition:
+    return Chance(tuple((p, then(total)) for total, p in dice_distribution(dice)))
+
+
+# State updates below build tuples directly; ``_replace`` dominated profiles.
+
+
+def _hurt(state: State, amount: int) -> State:
+    hp, chakra, fatigue, inspiration, scrolls = state
+    return State(max(0, hp + amount), chakra, fatigue, inspiration, scrolls)
+
+
+def _tire(state: State, amount: int = 1) -> State:
+    hp, chakra, fatigue, inspiration, scrolls = state
+    return State(hp, chakra, max(0, fatigue + amount), inspiration, scrolls)
+
+
+def _channel(state: State, chakra: int) -> State:
+    hp, _, fatigue, inspiration, scrolls = state
+    return State(hp, chakra, fatigue, inspiration, scrolls)
+
+
+def _inspire(state: State, inspiration: bool = True) -> State:
+    hp, chakra, fatigue, _, scrolls = state
+    return State(hp, chakra, fatigue, inspiration, scrolls)
+
+
+def _loot(state: State, inspiration: bool) -> State:
+    hp, chakra, fatigue, _, scrolls = state
+    return State(hp, chakra, fatigue, inspiration, scrolls + 1)
+
+
+def _rest(profile: Profile, state: State) -> State:
+    hp, chakra, fatigue, inspiration, scrolls = state
+    recovered = max(1, profile.modifier("体魄"))
+    return State(
+        hp + recovered,
+        min(chakra + recovered, profile.max_chakra),
+        fatigue - 1 if fatigue else 0,
+        inspiration,
+        scrolls,
+    )
+
+
+def _duel(
+    profile: Profile,
+    state: State,
+    dc: int,
+    damage: str,
+    then: Callable[[State, bool], Transition],
+) -> Transition:
+    """Mirror ``combat.duel``: inspired attack, plain defense, damage on a loss."""
+
+    def after_attack(attacked: State, hit: bool) -> Transition:
+        def after_defense(defended: State, held: bool) -> Transition:
+            if hit and held:
+                return then(_inspire(defended), True)
+            return _damage(damage, lambda total: then(_hurt(defended, -total), False))
+
+        return _check(profile, attacked, "速度", dc - 1, after_defense, proficient=False)
+
+    return _check(profile, state, "体术", dc, after_attack, inspired=True)
+
+
+# --- exam ---------------------------------------------------------------
+
+
+def _exam_start(profile: Profile, state: State, regs: Regs) -> Transition:
+    return _check(profile, state, "知识", 15, lambda st, ok: Goto("cheat", st, (int(ok),)), inspired=True)
+
+
+def _exam_cheat(profile: Profile, state: State, regs: Regs) -> Transition:
+    return Decide(CHEAT_QUESTION, state, {"y": Goto("stealth", state, regs)}, Goto("will", state, regs))
+
+
+def _exam_stealth(profile: Profile, state: State, regs: Regs) -> Transition:
+    (success,) = regs
+
+    def after(st: State, ok: bool) -> Transition:
+        if ok:
+            return Goto("will", st, (success + 1,))
+        return Goto("will", _tire(_channel(st, st.chakra // 2)), regs)
+
+    return _check(profile, state, "速度", 13, after, inspired=True)
+
+
+def _exam_will(profile: Profile, state: State, regs: Regs) -> Transition:
+    (success,) = regs
+
+    def after(st: State, ok: bool) -> Transition:
+        return Goto("declare", st if ok else _tire(st), (success, int(ok)))
+
+    return _check(profile, state, "意志", 14, after, inspired=True)
+
+
+def _exam_declare(profile: Profile, state: State, regs: Regs) -> Transition:
+    success, steady = regs
+    return Decide(
+        DECLARATION_QUESTION,
+        state,
+        {"y": Done(True, _inspire(state))},
+        Done(success >= 1 or bool(steady), state),
+    )
+
+
+# --- forest -------------------------------------------------------------
+
+
+def _encounter(
+    profile: Profile,
+    state: State,
+    steps: Steps,
+    then: Callable[[State], Transition],
+    inspired: bool,
+    rolls: Rolls = (),
+) -> Transition:
+    """Mirror ``encounters.run_encounter``; ``inspired`` is False where rerolls are declined."""
+
+    if not steps:
+        return then(state)
+    step, rest = steps[0], steps[1:]
+    op = step[0]
+
+    # Nested annotations are evaluated on every call, so they only name aliases.
+    def proceed(st: State, bound: Rolls = rolls) -> Transition:
+        return _encounter(profile, st, rest, then, inspired, bound)
+
+    if op == "check":
+        _, ability, dc, _, reroll, proficient, _, success, failure = step
+        return _check(
+            profile,
+            state,
+            ability,
+            dc,
+            lambda st, ok: _encounter(profile, st, (success if ok else failure) + rest, then, inspired, rolls),
+            proficient=proficient,
+            inspired=reroll and inspired,
+        )
+    if op == "at_least":
+        _, name, threshold, success, failure = step
+        branch = success if dict(rolls)[name] >= threshold else failure
+        return _encounter(profile, state, branch + rest, then, inspired, rolls)
+    if op == "roll":
+        _, dice, name, sign = step
+        return _damage(dice, lambda total: proceed(_hurt(state, sign * total), rolls + ((name, total),)))
+    if op == "hp":
+        return proceed(_hurt(state, step[1]))
+    if op == "chakra":
+        return proceed(_channel(state, state.chakra + step[1]))
+    if op == "fatigue":
+        return proceed(_tire(state, step[1]))
+    if op == "inspiration":
+        return proceed(_inspire(state, step[1]))
+    if op == "scroll" and "卷轴" in step[1]:
+        hp, chakra, fatigue, inspiration, scrolls = state
+        return proceed(State(hp, chakra, fatigue, inspiration, scrolls + 1))
+    return proceed(state)
+
+
+def _forest_encounter(
+    profile: Profile, state: State, key: str, inspired: bool, then: Callable[[State], Transition]
+) -> Transition:
+    return _encounter(profile, state, load_content("forest")["encounters"][key], then, inspired)
+
+
+def _forest_start(profile: Profile, state: State, regs: Regs) -> Transition:
+    state = _loot(state, state.inspiration)
+    chase = _forest_encounter(profile, state, "team_dosu", True, lambda st: Goto("orochimaru", st))
+    return Decide(SET_PIECE_QUESTION, state, {"p": chase}, Goto("orochimaru", state))
+
+
+def _forest_orochimaru(profile: Profile, state: State, regs: Regs) -> Transition:
+    def gate(st: State) -> Transition:
+        if st.hp <= 0 or st.fatigue >= 5:
+            return Done(False, st)
+        return Goto("day", st, (1,))
+
+    return _forest_encounter(profile, state, "orochimaru", True, gate)
+
+
+def _forest_day(profile: Profile, state: State, regs: Regs) -> Transition:
+    (day,) = regs
+
+    def after(st: State) -> Transition:
+        if st.hp <= 0:
+            return Done(False, st)
+        return Goto("day", st, (day + 1,)) if day < 3 else Goto("scrolls", st)
+
+    return Decide(ACTION_QUESTION, state, {"r": after(_rest(profile, state))}, _patrol(profile, state, after))
+
+
+def _patrol(profile: Profile, state: State, then: Callable[[State], Transition]) -> Transition:
+    dcs = dc_overrides.get()
+    reach = _patrol_reach(dcs)
+    if reach is None:
+        return Chance(tuple((p, then(end)) for end, p in _patrol_outcomes(profile, state, dcs)))
+    # Below its reach a patrol can clamp hp or fatigue at zero; above it the
+    # outcome is a translation, so states share the kernel of their bucket.
+    hp, chakra, fatigue, inspiration, scrolls = state
+    base_hp, base_fatigue = min(hp, reach[0]), min(fatigue, reach[1])
+    hp, fatigue = hp - base_hp, fatigue - base_fatigue
+    bucket = State(base_hp, 0, base_fatigue, inspiration, 0)
+    branches = []
+    for (end_hp, end_chakra, end_fatigue, end_inspiration, end_scrolls), p in _patrol_outcomes(profile, bucket, dcs):
+        end = State(end_hp + hp, end_chakra + chakra, end_fatigue + fatigue, end_inspiration, end_scrolls + scrolls)
+        branches.append((p, then(end)))
+    return Chance(tuple(branches))
+
+
+def _losses(steps: Steps) -> Tuple[int, int]:
+    """Upper bounds on the hp and fatigue that ``steps`` can take away."""
+
+    hp = fatigue = 0
+    for step in steps:
+        op = step[0]
+        if op == "check":
+            for branch in step[7:9]:
+                more_hp, more_fatigue = _losses(branch)
+                hp, fatigue = hp + more_hp, fatigue + more_fatigue
+        elif op == "at_least":
+            for branch in step[3:5]:
+                more_hp, more_fatigue = _losses(branch)
+                hp, fatigue = hp + more_hp, fatigue + more_fatigue
+        elif op == "roll" and step[3] < 0:
+            hp += max(total for total, _ in dice_distribution(step[1]))
+        elif op == "hp" and step[1] < 0:
+            hp -= step[1]
+        elif op == "fatigue" and step[1] < 0:
+            fatigue -= step[1]
+    return hp, fatigue
+
+
+@lru_cache(maxsize=None)
+def _patrol_reach(dcs: Tuple[Tuple[str, int], ...]) -> Tuple[int, int] | None:
+    """Largest hp and fatigue loss of any patrol encounter, or None when rows read the state."""
+
+    if patrol_table().conditional:
+        return None
+    encounters = load_content("forest")["encounters"]
+    losses = [_losses(encounters[key]) for _, key in patrol_table().values()]
+    return max(hp for hp, _ in losses), max(fatigue for _, fatigue in losses)
+
+
+@lru_cache(maxsize=None)
+def _patrol_outcomes(
+    profile: Profile, state: State, dcs: Tuple[Tuple[str, int], ...]
+) -> Tuple[Tuple[State, float], ...]:
+    """End states of one patrol from ``state``, merged across encounters.
+
+    Patrol encounters never offer a reroll, so their trees hold no prompts
+    and the outcome is the same for every policy. ``dcs`` only keys the cache.
+    """
+
+    chances: Dict[str, float] = {}
+    for (_, key), chance in patrol_table().probabilities(state).items():
+        chances[key] = chances.get(key, 0) + chance
+    outcomes: Dict[State, float] = defaultdict(float)
+
+    def collect(transition: Transition, p: float) -> None:
+        if isinstance(transition, Chance):
+            for q, branch in transition.branches:
+                collect(branch, p * q)
+        else:
+            outcomes[transition.state] += p
+
+    for key, chance in chances.items():
+        collect(_forest_encounter(profile, state, key, False, lambda end: Done(True, end)), float(chance))
+    return tuple(outcomes.items())
+
+
+def _forest_scrolls(profile: Profile, state: State, regs: Regs) -> Transition:
+    if state.scrolls >= 2:
+        return Done(True, state)
+    return _check(profile, state, "意志", 15, lambda st, ok: Done(ok, _tire(st) if ok else st), inspired=True)
+
+
+# --- prelims ------------------------------------------------------------
+
+
+def _prelims_start(profile: Profile, state: State, regs: Regs) -> Transition:
+    _, dc, damage, _ = load_content("prelims")["solo"]
+    solo = _duel(profile, state, dc, damage, lambda st, won: Goto("match", st, (0, int(won))))
+    return Decide(SOLO_QUESTION, state, {"y": solo}, Goto("match", state, (0, 0)))
+
+
+def _prelims_match(profile: Profile, state: State, regs: Regs) -> Transition:
+    index, victories = regs
+    content = load_content("prelims")
+    required = content["required_victories"]
+    if index == len(content["matches"]):
+        return Done(victories >= required, state)
+    dc = content["matches"][index][1]
+
+    def after(st: State, ok: bool) -> Transition:
+        won = victories + int(ok)
+        if ok:
+            st = _inspire(st)
+        if st.hp <= 0:
+            return Done(won >= required, st)
+        return Goto("match", st, (index + 1, won))
+
+    return _check(profile, state, "感知", dc, after)
+
+
+# --- finals -------------------------------------------------------------
+
+
+def _finals_start(profile: Profile, state: State, regs: Regs) -> Transition:
+    dcs = load_content("finals")["checks"]
+
+    def after_trick(st: State, trick: bool) -> Transition:
+        def after_speech(s: State, speech: bool) -> Transition:
+            win = trick or speech
+            return Goto("shikamaru", _inspire(s) if win else s, (int(win),))
+
+        return _check(profile, st, "意志", dcs["speech"], after_speech, proficient=False)
+
+    return _check(profile, state, "知识", dcs["trick"], after_trick, inspired=True)
+
+
+def _finals_shikamaru(profile: Profile, state: State, regs: Regs) -> Transition:
+    (victories,) = regs
+    dc = load_content("finals")["checks"]["shadow"]
+    return _check(profile, state, "感知", dc, lambda st, ok: Goto("gaara", st, (victories + int(ok),)))
+
+
+def _finals_gaara(profile: Profile, state: State, regs: Regs) -> Transition:
+    (victories,) = regs
+    content = load_content("finals")
+    _, dc, damage, _ = content["duel"]
+
+    def after_duel(st: State, won: bool) -> Transition:
+        return _check(
+            profile,
+            st,
+            "速度",
+            content["checks"]["evacuate"],
+            lambda s, ok: Goto("defense", s if ok else _tire(s), (victories + int(won),)),
+        )
+
+    return _duel(profile, state, dc, damage, after_duel)
+
+
+def _finals_defense(profile: Profile, state: State, regs: Regs) -> Transition:
+    (victories,) = regs
+    content = load_content("finals")
+    required = content["required_victories"]
+
+    def after_guard(st: State, ok: bool) -> Transition:
+        if ok:
+            return Done(victories + 1 >= required, _inspire(st))
+        return Done(victories >= required, _tire(st))
+
+    guard = _check(profile, state, "体术", content["checks"]["guard"], after_guard, inspired=True)
+    return Decide(DEFENSE_QUESTION, state, {"y": guard}, Done(victories >= required, state))
+
+
+# State fields a phase only ever adds to and never reads. Outcomes from any
+# two states that differ only in these fields are translations of each other,
+# so one kernel per remaining key serves all of them.
+SHIFT_INVARIANT: Dict[str, Tuple[str, ...]] = {
+    "prelims": ("chakra", "fatigue", "scrolls"),
+    "finals": ("chakra", "fatigue", "scrolls"),
+}
+
+PROGRAMS: Dict[str, Dict[str, Step]] = {
+    "exam": {
+        "start": _exam_start,
+        "cheat": _exam_cheat,
+        "stealth": _exam_stealth,
+        "will": _exam_will,
+        "declare": _exam_declare,
+    },
+    "forest": {
+        "start": _forest_start,
+        "orochimaru": _forest_orochimaru,
+        "day": _forest_day,
+        "scrolls": _forest_scrolls,
+    },
+    "prelims": {"start": _prelims_start, "match": _prelims_match},
+    "finals": {
+        "start": _finals_start,
+        "shikamaru": _finals_shikamaru,
+        "gaara": _finals_gaara,
+        "defense": _finals_defense,
+    },
+}
+
+
+# --- evaluation ---------------------------------------------------------
+
+
+Distribution = Dict[State, float]
+
+
+def advance(
+    phase: str, profile: Profile, distribution: Mapping[State, float], policy: Policy
+) -> Tuple[Distribution, Distribution]:
+    """Push a state distribution through one phase.
+
+    Returns the end-state distributions of runs that passed and failed. Nodes
+    sharing ``(label, regs)`` are merged before expanding, and every jump goes
+    to a later label or to the same label with larger registers, so visiting
+    groups in sorted order handles each node exactly once.
+    """
+
+    program = PROGRAMS[phase]
+    rank = {label: index for index, label in enumerate(program)}
+    labels = list(program)
+    pending: Dict[Tuple[int, Regs], Distribution] = {(0, ()): dict(distribution)}
+    passed: Distribution = defaultdict(float)
+    failed: Distribution = defaultdict(float)
+
+    def push(transition: Transition, p: float) -> None:
+        if isinstance(transition, Goto):
+            group = pending.setdefault((rank[transition.label], transition.regs), defaultdict(float))
+            group[transition.state] += p
+        elif isinstance(transition, Done):
+            (passed if transition.passed else failed)[transition.state] += p
+        elif isinstance(transition, Decide):
+            answer = policy(transition.question, transition.state).strip().lower()
+            push(transition.options.get(answer, transition.otherwise), p)
+        else:
+            for q, branch in transition.branches:
+                push(branch, p * q)
+
+    while pending:
+        key = min(pending)
+        step = program[labels[key[0]]]
+        for state, p in pending.pop(key).items():
+            push(step(profile, state, key[1]), p)
+    return dict(passed), dict(failed)
+
+
+def phase_kernel(phase: str, profile: Profile, state: State, policy: Policy) -> Tuple[Distribution, Distribution]:
+    """Exact ``(passed, failed)`` end-state distributions of one phase from ``state``."""
+
+    return _phase_kernel(phase, profile, state, policy, dc_overrides.get())
+
+
+@lru_cache(maxsize=None)
+def _phase_kernel(
+    phase: str, profile: Profile, state: State, policy: Policy, dcs: Tuple[Tuple[str, int], ...]
+) -> Tuple[Distribution, Distribution]:
+    # ``dcs`` only keys the cache: the steps read the overridden content.
+    return advance(phase, profile, {state: 1.0}, policy)
+
+
+def _advance_shifted(
+    phase: str, profile: Profile, distribution: Mapping[State, float], policy: Policy
+) -> Tuple[Distribution, Distribution]:
+    """Like :func:`advance`, reusing one kernel per shift-invariant class."""
+
+    fields = SHIFT_INVARIANT.get(phase, ())
+    if not fields or getattr(policy, "reads_state", True):
+        return advance(phase, profile, distribution, policy)
+    zero = dict.fromkeys(fields, 0)
+    passed: Distribution = defaultdict(float)
+    failed: Distribution = defaultdict(float)
+    for state, p in distribution.items():
+        kernel_passed, kernel_failed = phase_kernel(phase, profile, state._replace(**zero), policy)
+        hp, chakra, fatigue, _, scrolls = (
+            getattr(state, name) if name in fields else 0 for name in State._fields
+        )
+        for kernel, target in ((kernel_passed, passed), (kernel_failed, failed)):
+            for end, q in kernel.items():
+                shifted = State(
+                    end.hp + hp, end.chakra + chakra, end.fatigue + fatigue, end.inspiration, end.scrolls + scrolls
+                )
+                target[shifted] += p * q
+    return dict(passed), dict(failed)
+
+
+@lru_cache(maxsize=None)
+def _campaign_prefix(
+    phases: Tuple[str, ...], profile: Profile, state: State, policy: Policy, dcs: Tuple[Tuple[str, int], ...]
+) -> Tuple[Distribution, Distribution]:
+    """Survivor and cumulative failure distributions after ``phases``.
+
+    Cached per prefix, so campaigns that share their opening phases (for
+    instance the same build under a policy that only differs in the finals)
+    reuse the already composed kernels. ``dcs`` is the active
+    :data:`~game.encounters.dc_overrides`, so overridden content never
+    reuses kernels built from the files.
+    """
+
+    if len(phases) == 1:
+        return phase_kernel(phases[0], profile, state, policy)
+    alive, failed = _campaign_prefix(phases[:-1], profile, state, policy, dcs)
+    survivors, dropped = _advance_shifted(phases[-1], profile, alive, policy)
+    merged = defaultdict(float, failed)
+    for end, p in dropped.items():
+        merged[end] += p
+    return survivors, dict(merged)
+
+
+@dataclass
+class CampaignOdds:
+    """Exact campaign statistics for one character build and policy."""
+
+    reached: Dict[str, float] = field(default_factory=dict)
+    passed: Dict[str, float] = field(default_factory=dict)
+    final_states: Dict[State, float] = field(default_factory=dict)
+
+    @property
+    def promoted(self) -> float:
+        return self.passed[PHASES[-1]]
+
+    def pass_rate(self, phase: str) -> float:
+        """Probability of clearing ``phase`` given it was reached."""
+
+        return self.passed[phase] / self.reached[phase] if self.reached[phase] else 0.0
+
+    def expected(self, attribute: str) -> float:
+        return sum(float(getattr(state, attribute)) * p for state, p in self.final_states.items())
+
+    def report(self) -> str:
+        lines = []
+        for phase in self.passed:
+            lines.append(
+                f"  {phase:<8} 到达 {self.reached[phase]:6.2%}  通过 {self.passed[phase]:6.2%}"
+                f"  （条件通过率 {self.pass_rate(phase):6.2%}）"
+            )
+        lines.append(
+            f"  最终生命 {self.expected('hp'):.2f}，查克拉 {self.expected('chakra'):.2f}，"
+            f"疲劳 {self.expected('fatigue'):.2f}，持有英雄灵感 {self.expected('inspiration'):.2%}"
+        )
+        return "\n".join(lines)
+
+
+def campaign_odds(character: Character, policy: Policy, phases: Tuple[str, ...] = PHASES) -> CampaignOdds:
+    """Compose the cached phase kernels into exact campaign probabilities."""
+
+    profile = Profile.from_character(character)
+    state = State.from_character(character)
+    odds = CampaignOdds()
+    reached = 1.0
+    for count, phase in enumerate(phases, 1):
+        alive, failed = _campaign_prefix(phases[:count], profile, state, policy, dc_overrides.get())
+        odds.reached[phase] = reached
+        odds.passed[phase] = reached = sum(alive.values())
+    final = defaultdict(float, failed)
+    for end, p in alive.items():
+        final[end] += p
+    odds.final_states = dict(final)
+    return odds
@@ -0,0 +1,305 @@
+"""Simulation-driven DC optimizer.
+
+A target is the pass probability of one phase for one archetype, measured
+like ``simulate --phases <phase>``: a freshly created character plays only
+that phase under a fixed answer policy. Every DC id from
+:func:`~game.encounters.difficulty_classes` belongs to the phase named by its
+content file, so each phase is tuned independently.
+
+The search is a greedy coordinate descent over integer DCs. Every candidate
+is played on the same seeds (common random numbers), so two candidates only
+differ where the changed DC flips an outcome and comparisons need far fewer
+runs than independent samples would. Each phase starts with ``min_runs``
+seeds per archetype; whenever no neighbouring DC table improves the loss the
+sample is doubled, reusing the runs already played, until ``max_runs``. The
+loss is the mean squared gap to the targets plus :data:`DRIFT_PENALTY` per
+squared point moved from the shipped DC, so DCs that barely matter stay
+where the designers put them.
+"""
+
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+from .encounters import ContentError, difficulty_classes
+from .simulate import SimulationConfig, simulate_chunk
+
+
+ARCHETYPES = ("t", "n", "g")
+DC_RANGE = (5, 25)
+DRIFT_PENALTY = 1e-4
+# Seeds handed to a worker at a time; small enough to balance the pool.
+CHUNK_RUNS = 256
+Z_95 = 1.96
+
+DcTable = Tuple[Tuple[str, int], ...]
+
+
+@dataclass(frozen=True)
+class Target:
+    phase: str
+    archetype: str
+    rate: float
+
+
+def parse_targets(specs: Sequence[str], archetypes: Sequence[str] = ARCHETYPES) -> Tuple[Target, ...]:
+    """Parse ``phase=rate`` (every archetype) or ``phase:archetype=rate``; later specs win."""
+
+    tunable = {dc_id.split(".", 1)[0] for dc_id in difficulty_classes()}
+    rates: Dict[Tuple[str, str], float] = {}
+    for spec in specs:
+        key, separator, value = spec.partition("=")
+        phase, _, archetype = key.strip().partition(":")
+        if not separator or phase not in tunable or archetype not in ("", *ARCHETYPES):
+            raise ValueError(f"目标格式应为 阶段[:职业]=通过率，阶段可选 {'/'.join(sorted(tunable))}：{spec!r}")
+        rate = float(value)
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"通过率必须在 0 到 1 之间：{spec!r}")
+        for each in [archetype] if archetype else archetypes:
+            rates[(phase, each)] = rate
+    return tuple(Target(phase, archetype, rate) for (phase, archetype), rate in rates.items())
+
+
+def wilson_interval(passes: int, runs: int, z: float = Z_95) -> Tuple[float, float]:
+    """Wilson score interval for a binomial proportion."""
+
+    if not runs:
+        return 0.0, 1.0
+    rate = passes / runs
+    denominator = 1 + z * z / runs
+    centre = (rate + z * z / (2 * runs)) / denominator
+    spread = z * math.sqrt(rate * (1 - rate) / runs + z * z / (4 * runs * runs)) / denominator
+    return max(0.0, centre - spread), min(1.0, centre + spread)
+
+
+@dataclass
+class Estimate:
+    passes: int = 0
+    runs: int = 0
+
+    @property
+    def rate(self) -> float:
+        return self.passes / self.runs if self.runs else 0.0
+
+    @property
+    def interval(self) -> Tuple[float, float]:
+        return wilson_interval(self.passes, self.runs)
+
+    def to_dict(self) -> Dict:
+        low, high = self.interval
+        return {"rate": round(self.rate, 4), "ci95": [round(low, 4), round(high, 4)], "runs": self.runs}
+
+    def __str__(self) -> str:
+        low, high = self.interval
+        return f"{self.rate:6.2%} [{low:6.2%}, {high:6.2%}]"
+
+
+@dataclass
+class PhaseProposal:
+    phase: str
+    targets: Tuple[Target, ...]
+    shipped: Dict[str, int]
+    proposed: Dict[str, int]
+    # Per archetype, measured on the same ``max_runs`` seeds.
+    before: Dict[str, Estimate] = field(default_factory=dict)
+    after: Dict[str, Estimate] = field(default_factory=dict)
+    candidates: int = 0
+    runs: int = 0
+
+
+@dataclass
+class BalanceReport:
+    policy: str
+    background: str
+    phases: List[PhaseProposal] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def runs(self) -> int:
+        return sum(proposal.runs for proposal in self.phases)
+
+    def dcs(self) -> Dict[str, int]:
+        return {dc_id: dc for proposal in self.phases for dc_id, dc in proposal.proposed.items()}
+
+    def report(self) -> str:
+        lines = [f"DC 平衡搜索：策略 {self.policy}，模拟 {self.runs} 局，耗时 {self.elapsed:.2f}s"]
+        for proposal in self.phases:
+            lines.append(f"  {proposal.phase}（评估 {proposal.candidates} 组 DC）")
+            for dc_id, dc in proposal.proposed.items():
+                shipped = proposal.shipped[dc_id]
+                change = f"{shipped} → {dc}" if dc != shipped else f"{dc}"
+                lines.append(f"    {dc_id:<28} {change}")
+            for target in proposal.targets:
+                lines.append(
+                    f"    职业 {target.archetype} 目标 {target.rate:6.2%}  原 {proposal.before[target.archetype]}"
+                    f"  新 {proposal.after[target.archetype]}"
+                )
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict:
+        return {
+            "policy": self.policy,
+            "background": self.background,
+            "dcs": self.dcs(),
+            "phases": {
+                proposal.phase: {
+                    "dcs": {
+                        dc_id: {"shipped": proposal.shipped[dc_id], "proposed": dc}
+                        for dc_id, dc in proposal.proposed.items()
+                    },
+                    "pass_rates": {
+                        target.archetype: {
+                            "target": target.rate,
+                            "shipped": proposal.before[target.archetype].to_dict(),
+                            "proposed": proposal.after[target.archetype].to_dict(),
+                        }
+                        for target in proposal.targets
+                    },
+                }
+                for proposal in self.phases
+            },
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.to_dict(), handle, ensure_ascii=False, indent=2)
+            handle.write("\n")
+
+
+def read_dcs(path: str) -> Dict[str, int]:
+    """The ``dcs`` table of a proposal written by :meth:`BalanceReport.save`."""
+
+    with open(path, encoding="utf-8") as handle:
+        data = json.load(handle)
+    dcs = data.get("dcs") if isinstance(data, dict) else None
+    if not isinstance(dcs, dict) or not all(isinstance(dc, int) for dc in dcs.values()):
+        raise ContentError(f"{path}: expected a JSON object with a \"dcs\" table of integers")
+    return dcs
+
+
+class _Sampler:
+    """Pass counts per ``(DC table, archetype)``, extended on seeds ``seed, seed + 1, ...``."""
+
+    def __init__(self, phase: str, policy: str, background: str, seed: int, pool) -> None:
+        self.phase = phase
+        self.policy = policy
+        self.background = background
+        self.seed = seed
+        self.pool = pool
+        self.estimates: Dict[Tuple[DcTable, str], Estimate] = {}
+        self.runs = 0
+
+    def measure(self, tables: Sequence[DcTable], archetypes: Sequence[str], runs: int) -> None:
+        configs, chunks, owners = [], [], []
+        for table in dict.fromkeys(tables):
+            for archetype in archetypes:
+                estimate = self.estimates.setdefault((table, archetype), Estimate())
+                config = SimulationConfig(self.policy, archetype, self.background, phases=(self.phase,), dcs=table)
+                for start in range(self.seed + estimate.runs, self.seed + runs, CHUNK_RUNS):
+                    configs.append(config)
+                    chunks.append(range(start, min(start + CHUNK_RUNS, self.seed + runs)))
+                    owners.append(estimate)
+        results = map(simulate_chunk, configs, chunks) if self.pool is None else self.pool.map(simulate_chunk, configs, chunks)
+        for estimate, summary in zip(owners, results):
+            estimate.runs += summary.runs
+            estimate.passes += summary.passes[self.phase]
+            self.runs += summary.runs
+
+    def estimate(self, table: DcTable, archetype: str) -> Estimate:
+        return self.estimates[(table, archetype)]
+
+
+def _loss(sampler: _Sampler, table: DcTable, targets: Sequence[Target], shipped: Mapping[str, int]) -> float:
+    gap = sum((sampler.estimate(table, target.archetype).rate - target.rate) ** 2 for target in targets)
+    drift = sum((dc - shipped[dc_id]) ** 2 for dc_id, dc in table)
+    return gap / len(targets) + DRIFT_PENALTY * drift
+
+
+def _tune_phase(
+    sampler: _Sampler,
+    targets: Tuple[Target, ...],
+    shipped: Dict[str, int],
+    tunable: Sequence[str],
+    min_runs: int,
+    max_runs: int,
+    dc_range: Tuple[int, int],
+) -> PhaseProposal:
+    archetypes = tuple(dict.fromkeys(target.archetype for target in targets))
+    low, high = dc_range
+    point = dict(shipped)
+    runs = min_runs
+    candidates = set()
+    while True:
+        current = tuple(sorted(point.items()))
+        neighbours = [
+            tuple(sorted({**point, dc_id: point[dc_id] + step}.items()))
+            for dc_id in tunable
+            for step in (-1, 1)
+            if low <= point[dc_id] + step <= high
+        ]
+        sampler.measure([current, *neighbours], archetypes, runs)
+        candidates.update([current, *neighbours])
+        best = min(neighbours, key=lambda table: _loss(sampler, table, targets, shipped), default=current)
+        if _loss(sampler, best, targets, shipped) < _loss(sampler, current, targets, shipped):
+            point = dict(best)
+        elif runs < max_runs:
+            runs = min(runs * 2, max_runs)
+        else:
+            break
+    before = tuple(sorted(shipped.items()))
+    sampler.measure([before, current], archetypes, max_runs)
+    return PhaseProposal(
+        phase=sampler.phase,
+        targets=targets,
+        shipped=shipped,
+        proposed={dc_id: point[dc_id] for dc_id in shipped},
+        before={archetype: sampler.estimate(before, archetype) for archetype in archetypes},
+        after={archetype: sampler.estimate(current, archetype) for archetype in archetypes},
+        candidates=len(candidates),
+        runs=sampler.runs,
+    )
+
+
+def balance(
+    targets: Sequence[Target],
+    policy: str = "demo",
+    background: str = "k",
+    tune: Sequence[str] = (),
+    min_runs: int = 256,
+    max_runs: int = 4096,
+    workers: int | None = None,
+    seed: int = 0,
+    dc_range: Tuple[int, int] = DC_RANGE,
+) -> BalanceReport:
+    """Search DCs so each phase's pass rates approach ``targets``.
+
+    ``tune`` restricts the search to DC ids starting with one of its
+    prefixes; the other DCs of a phase keep their shipped values.
+    """
+
+    if not 0 < min_runs <= max_runs:
+        raise ValueError("需要 0 < min_runs <= max_runs")
+    shipped = difficulty_classes()
+    workers = workers or os.cpu_count() or 1
+    report = BalanceReport(policy, background)
+    started = time.perf_counter()
+    pool = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for phase in dict.fromkeys(target.phase for target in targets):
+            phase_dcs = {dc_id: dc for dc_id, dc in shipped.items() if dc_id.startswith(f"{phase}.")}
+            tunable = [dc_id for dc_id in phase_dcs if not tune or dc_id.startswith(tuple(tune))]
+            sampler = _Sampler(phase, policy, background, seed, pool)
+            phase_targets = tuple(target for target in targets if target.phase == phase)
+            report.phases.append(_tune_phase(sampler, phase_targets, phase_dcs, tunable, min_runs, max_runs, dc_range))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    report.elapsed = time.perf_counter() - started
+    return report
@@ -0,0 +1,265 @@
+"""Benchmark harness with a stored baseline and regression flags.
+
+Each case builds a zero-argument callable that performs one operation (one
+roll, one duel, one phase, one campaign) with narration sent to
+:data:`~game.output.NULL`. The harness calibrates an iteration count that
+runs for at least ``min_time`` seconds, keeps the best of ``repeat`` timings
+and reports operations per second. Results can be saved as the baseline JSON
+(``benchmarks/baseline.json``) and later runs flag every case that is slower
+than the baseline by more than the threshold.
+
+Baselines are machine-specific: regenerate one on the machine that will run
+the comparison with ``python -m game bench --save-baseline``.
+
+Startup is checked separately. :func:`import_cost` runs a fresh interpreter
+with ``-X importtime`` and reads the cumulative import time of the CLI
+module and the set of modules it pulled in; :func:`import_problems` fails it
+when it exceeds :data:`IMPORT_BUDGET_MS` or loads anything in
+:data:`DEFERRED_MODULES`, which must wait until a command or stage needs them.
+"""
+
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from .character import Character, build_ability_scores
+from .combat import duel, group_scene
+from .dice import ability_check, damage_roll, roll_dice
+from .dm import run_game
+from .output import NULL
+from .phases.exam import run_exam_phase
+from .phases.finals import run_finals
+from .phases.forest import run_forest_phase
+from .phases.prelims import prelim_matches, run_prelims
+
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = ROOT / "benchmarks" / "baseline.json"
+DEFAULT_THRESHOLD = 0.25
+
+STARTUP_MODULE = "game.main"
+IMPORT_BUDGET_MS = 90.0
+DEFERRED_MODULES = (
+    "game.phases",
+    "game.combat",
+    "game.encounters",
+    "game.analytic",
+    "game.replay",
+    "game.session",
+    "game.bench",
+    "asyncio",
+    "concurrent.futures",
+)
+
+Operation = Callable[[], object]
+CaseFactory = Callable[[random.Random], Operation]
+
+
+def _template() -> Character:
+    archetype, background = "体术专家", "木叶村天赋"
+    return Character(
+        name="基准忍者",
+        archetype=archetype,
+        background=background,
+        ability_scores=build_ability_scores(archetype, background),
+        hero_inspiration=True,
+    )
+
+
+def _answer(question: str) -> str:
+    return "y"
+
+
+def _on_fresh_character(run: Callable[[Character, random.Random], object], rng: random.Random) -> Operation:
+    """Each operation starts from a full-health copy, so results stay comparable."""
+
+    template = _template()
+
+    def operation() -> object:
+        return run(Character.from_sheet(template), rng)
+
+    return operation
+
+
+def _phase_case(runner: Callable[..., bool]) -> CaseFactory:
+    return partial(_on_fresh_character, lambda character, rng: runner(character, rng, _answer, NULL))
+
+
+def _duel(character: Character, rng: random.Random) -> bool:
+    return duel(character, rng, 14, "基准对手", _answer, damage="1d6", out=NULL)
+
+
+def _group_scene(character: Character, rng: random.Random) -> int:
+    return group_scene(character, prelim_matches(), rng, _answer, out=NULL)
+
+
+def _campaign(rng: random.Random) -> Operation:
+    seeds = iter(range(1 << 62))
+
+    def operation() -> object:
+        return run_game(seed=next(seeds), scripted_choices=["新晋忍者", "t", "k"], demo_mode=True, out=NULL)
+
+    return operation
+
+
+CASES: Dict[str, CaseFactory] = {
+    "dice.roll_dice(2d6)": lambda rng: partial(roll_dice, 2, 6, rng),
+    "dice.ability_check": lambda rng: partial(ability_check, 3, 15, rng, 2),
+    "dice.damage_roll(2d6)": lambda rng: partial(damage_roll, "2d6", rng),
+    "combat.duel": partial(_on_fresh_character, _duel),
+    "combat.group_scene": partial(_on_fresh_character, _group_scene),
+    "phase.run_exam_phase": _phase_case(run_exam_phase),
+    "phase.run_forest_phase": _phase_case(run_forest_phase),
+    "phase.run_prelims": _phase_case(run_prelims),
+    "phase.run_finals": _phase_case(run_finals),
+    "campaign.demo": _campaign,
+}
+
+
+@dataclass
+class BenchResult:
+    name: str
+    ops_per_second: float
+    iterations: int
+
+
+def measure(operation: Operation, min_time: float = 0.2, repeat: int = 3) -> BenchResult:
+    """Best-of-``repeat`` rate over an iteration count lasting ``min_time``."""
+
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            operation()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        iterations *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = elapsed
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            operation()
+        best = min(best, time.perf_counter() - started)
+    return BenchResult("", iterations / best, iterations)
+
+
+def run_benchmarks(
+    pattern: str = "",
+    min_time: float = 0.2,
+    repeat: int = 3,
+    seed: int = 0,
+) -> Dict[str, BenchResult]:
+    results = {}
+    for name, factory in CASES.items():
+        if pattern in name:
+            result = measure(factory(random.Random(seed)), min_time, repeat)
+            result.name = name
+            results[name] = result
+    return results
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Dict[str, float]:
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)["ops_per_second"]
+
+
+def save_baseline(results: Dict[str, BenchResult], path: Path = BASELINE_PATH) -> None:
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "ops_per_second": {name: round(result.ops_per_second, 1) for name, result in results.items()},
+    }
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(data, handle, ensure_ascii=False, indent=2)
+        handle.write("\n")
+
+
+def regressions(
+    results: Dict[str, BenchResult],
+    baseline: Dict[str, float],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[str]:
+    """Names whose rate fell below ``baseline * (1 - threshold)``."""
+
+    return [
+        name
+        for name, result in results.items()
+        if name in baseline and result.ops_per_second < baseline[name] * (1 - threshold)
+    ]
+
+
+def format_report(results: Dict[str, BenchResult], baseline: Dict[str, float], threshold: float) -> str:
+    slow = set(regressions(results, baseline, threshold))
+    lines = [f"{'用例':<26} {'次/秒':>12} {'基线':>12} {'变化':>8}"]
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference:
+            change = f"{result.ops_per_second / reference - 1:+8.1%}"
+            flag = "  << 性能回退" if name in slow else ""
+            lines.append(f"{name:<28} {result.ops_per_second:12.0f} {reference:12.0f} {change}{flag}")
+        else:
+            lines.append(f"{name:<28} {result.ops_per_second:12.0f} {'-':>12} {'-':>8}")
+    if slow:
+        lines.append(f"{len(slow)} 个用例比基线慢 {threshold:.0%} 以上。")
+    return "\n".join(lines)
+
+
+@dataclass
+class ImportCost:
+    module: str
+    milliseconds: float
+    loaded: Tuple[str, ...]
+
+
+def import_cost(module: str = STARTUP_MODULE, repeat: int = 5) -> ImportCost:
+    """Best-of-``repeat`` cumulative import time of ``module`` in a fresh interpreter."""
+
+    best = None
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=ROOT,
+        )
+        loaded = []
+        cumulative = 0
+        for line in completed.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, total, name = line[len("import time:") :].split("|")
+            if not total.strip().isdigit():
+                continue  # the column header
+            loaded.append(name.strip())
+            if name.strip() == module:
+                cumulative = int(total)
+        cost = ImportCost(module, cumulative / 1000, tuple(loaded))
+        if best is None or cost.milliseconds < best.milliseconds:
+            best = cost
+    return best
+
+
+def import_problems(cost: ImportCost, budget_ms: float = IMPORT_BUDGET_MS) -> List[str]:
+    problems = [
+        f"启动时提前导入了 {name}"
+        for name in cost.loaded
+        if any(name == deferred or name.startswith(deferred + ".") for deferred in DEFERRED_MODULES)
+    ]
+    if cost.milliseconds > budget_ms:
+        problems.append(f"导入 {cost.module} 耗时 {cost.milliseconds:.1f}ms，超出预算 {budget_ms:.0f}ms")
+    return problems
+
+
+def format_import_report(cost: ImportCost, budget_ms: float = IMPORT_BUDGET_MS) -> str:
+    lines = [f"import {cost.module}: {cost.milliseconds:.1f}ms（预算 {budget_ms:.0f}ms，共 {len(cost.loaded)} 个模块）"]
+    lines += [f"  << {problem}" for problem in import_problems(cost, budget_ms)]
+    return "\n".join(lines)
@@ -0,0 +1,93 @@
+"""Block-buffered random source for the dice hot path.
+
+:class:`BlockRandom` is a drop-in :class:`random.Random`. ``randint`` keeps
+one buffer per ``(a, b)`` range (d20, d6, d8, ...) and refills it a whole
+block at a time, so the per-die cost is a ``next`` on a list iterator
+instead of the ``randint -> randrange -> _randbelow`` call chain. Ranges that
+fit in a byte are filled from :meth:`random.Random.randbytes` with rejection
+sampling done by ``bytes.translate``; wider ranges fall back to ``choices``.
+Every other method is inherited unchanged.
+
+Runs are reproducible from a seed, but the values differ from plain
+``random.Random(seed)`` because draws are taken in blocks. ``getstate``
+captures the Mersenne Twister state, every partially consumed buffer and the
+block size, so a generator can be checkpointed mid-block and resumed exactly.
+"""
+
+import random
+from functools import lru_cache
+from typing import Dict, Iterator, List, Tuple
+
+
+BLOCK_STATE = "block"
+DEFAULT_BLOCK_SIZE = 1024
+
+Buffers = Tuple[Tuple[int, int, Tuple[int, ...]], ...]
+
+
+class BlockRandom(random.Random):
+    """``random.Random`` whose ``randint`` is served from pre-filled blocks."""
+
+    def __init__(self, seed: object = None, block_size: int = DEFAULT_BLOCK_SIZE) -> None:
+        self.block_size = block_size
+        self._blocks: Dict[Tuple[int, int], List[int]] = {}
+        self._streams: Dict[Tuple[int, int], Iterator[int]] = {}
+        super().__init__(seed)
+
+    def seed(self, a: object = None, version: int = 2) -> None:
+        super().seed(a, version)
+        self._blocks = {}
+        self._streams = {}
+
+    def _refill(self, a: int, b: int) -> Iterator[int]:
+        if 0 <= a <= b <= 255:
+            table, rejected = _byte_tables(a, b)
+            # Unbiased rejection sampling done in C: map each random byte to a
+            # face and delete the bytes above the largest multiple of the span.
+            # A small block can lose every byte, so draw again until one survives.
+            values: List[int] = []
+            while not values:
+                values = list(self.randbytes(self.block_size).translate(table, rejected))
+        else:
+            values = self.choices(range(a, b + 1), k=self.block_size)
+        stream = self._streams[(a, b)] = iter(values)
+        self._blocks[(a, b)] = values
+        return stream
+
+    def randint(self, a: int, b: int) -> int:
+        try:
+            return next(self._streams[a, b])
+        except (KeyError, StopIteration):
+            return next(self._refill(a, b))
+
+    def buffers(self) -> Buffers:
+        """Unserved draws per range, in the order they will be returned."""
+
+        return tuple(
+            (a, b, tuple(values[len(values) - self._streams[a, b].__length_hint__() :]))
+            for (a, b), values in self._blocks.items()
+        )
+
+    def getstate(self) -> tuple:
+        return BLOCK_STATE, super().getstate(), self.buffers(), self.block_size
+
+    def setstate(self, state: tuple) -> None:
+        # States saved before the block size was recorded used the default.
+        tag, base, buffers, block_size = state if len(state) == 4 else (*state, DEFAULT_BLOCK_SIZE)
+        if tag != BLOCK_STATE:
+            raise ValueError(f"not a BlockRandom state: {tag!r}")
+        super().setstate(base)
+        self.block_size = block_size
+        self._blocks = {(a, b): list(values) for a, b, values in buffers}
+        self._streams = {key: iter(values) for key, values in self._blocks.items()}
+
+
+@lru_cache(maxsize=None)
+def _byte_tables(a: int, b: int) -> Tuple[bytes, bytes]:
+    span = b - a + 1
+    limit = 256 - 256 % span
+    return bytes(a + byte % span for byte in range(256)), bytes(range(limit, 256))
+
+
+def is_block_state(state: tuple) -> bool:
+    return bool(state) and state[0] == BLOCK_STATE
@@ -4,6 +4,18 @@ from dataclasses import dataclass, field
 from typing import Dict, List
 
 from .dice import ability_modifier
+from .events import (
+    ChakraRestored,
+    ChakraSpent,
+    Event,
+    FatigueGained,
+    FatigueRecovered,
+    HpChanged,
+    InspirationGranted,
+    InspirationSpent,
+    ScrollAcquired,
+    dispatch,
+)
 
 
 AbilityScores = Dict[str, int]
@@ -22,20 +34,10 @@ ARCHETYPE_PRIORITIES = {
 }
 
 
-@dataclass
-class Character:
-    """Simple player character sheet used by the automated DM."""
+class CharacterRules:
+    """Sheet behaviour shared by :class:`Character` and :class:`SlottedCharacter`."""
 
-    name: str
-    archetype: str
-    background: str
-    ability_scores: AbilityScores
-    proficiency: int = 2
-    hero_inspiration: bool = False
-    hp: int = 0
-    chakra: int = 0
-    fatigue: int = 0
-    scrolls: List[str] = field(default_factory=list)
+    __slots__ = ()
 
     def __post_init__(self) -> None:
         if not self.hp:
@@ -46,31 +48,117 @@ class Character:
     def modifier(self, key: str) -> int:
         return ability_modifier(self.ability_scores.get(key, 10))
 
+    def apply(self, event: Event) -> None:
+        dispatch(self, event)
+
     def adjust_hp(self, amount: int) -> None:
-        self.hp = max(0, self.hp + amount)
+        change = max(0, self.hp + amount) - self.hp
+        if change:
+            dispatch(self, HpChanged(change))
 
     def spend_chakra(self, amount: int) -> bool:
         if self.chakra < amount:
             return False
-        self.chakra -= amount
+        if amount:
+            dispatch(self, ChakraSpent(amount))
         return True
 
+    def gain_chakra(self, amount: int) -> None:
+        """Add ``amount`` (negative drains) with no cap or floor."""
+
+        if amount > 0:
+            dispatch(self, ChakraRestored(amount))
+        elif amount < 0:
+            dispatch(self, ChakraSpent(-amount))
+
     def gain_fatigue(self, amount: int = 1) -> None:
-        self.fatigue = max(0, self.fatigue + amount)
+        change = max(0, self.fatigue + amount) - self.fatigue
+        if change > 0:
+            dispatch(self, FatigueGained(change))
+        elif change < 0:
+            dispatch(self, FatigueRecovered(-change))
+
+    def grant_inspiration(self) -> None:
+        if not self.hero_inspiration:
+            dispatch(self, InspirationGranted())
+
+    def spend_inspiration(self) -> None:
+        if self.hero_inspiration:
+            dispatch(self, InspirationSpent())
+
+    def acquire_scroll(self, scroll: str) -> None:
+        dispatch(self, ScrollAcquired(scroll))
 
     def rest(self, full: bool = False) -> None:
+        max_chakra = self.ability_scores.get("体魄", 10) + self.ability_scores.get("意志", 10) * 2
         if full:
-            self.hp = max(self.hp, 8 + self.modifier("体魄"))
-            self.chakra = self.ability_scores.get("体魄", 10) + self.ability_scores.get("意志", 10) * 2
+            self.adjust_hp(max(0, 8 + self.modifier("体魄") - self.hp))
+            self.gain_chakra(max_chakra - self.chakra)
             if BACKGROUND_BONUSES.get(self.background, {}).get("inspiration_on_long_rest"):
-                self.hero_inspiration = True
+                self.grant_inspiration()
         else:
             recovered = max(1, self.modifier("体魄"))
-            self.hp += recovered
-            max_chakra = self.ability_scores.get("体魄", 10) + self.ability_scores.get("意志", 10) * 2
-            self.chakra = min(self.chakra + recovered, max_chakra)
+            self.adjust_hp(recovered)
+            self.gain_chakra(min(self.chakra + recovered, max_chakra) - self.chakra)
         if self.fatigue:
-            self.fatigue -= 1
+            self.gain_fatigue(-1)
+
+    @classmethod
+    def from_sheet(cls, other: "CharacterRules") -> "CharacterRules":
+        """Lossless copy of any character sheet, possibly into the other class."""
+
+        sheet = cls(
+            name=other.name,
+            archetype=other.archetype,
+            background=other.background,
+            ability_scores=dict(other.ability_scores),
+            proficiency=other.proficiency,
+            hero_inspiration=other.hero_inspiration,
+            scrolls=list(other.scrolls),
+        )
+        # Assigned afterwards because ``__post_init__`` treats 0 as "not set".
+        sheet.hp = other.hp
+        sheet.chakra = other.chakra
+        sheet.fatigue = other.fatigue
+        return sheet
+
+
+@dataclass
+class Character(CharacterRules):
+    """Simple player character sheet used by the automated DM."""
+
+    name: str
+    archetype: str
+    background: str
+    ability_scores: AbilityScores
+    proficiency: int = 2
+    hero_inspiration: bool = False
+    hp: int = 0
+    chakra: int = 0
+    fatigue: int = 0
+    scrolls: List[str] = field(default_factory=list)
+
+    def to_slotted(self) -> "SlottedCharacter":
+        return SlottedCharacter.from_sheet(self)
+
+
+@dataclass(slots=True)
+class SlottedCharacter(CharacterRules):
+    """``__slots__`` twin of :class:`Character` for long-lived interactive sessions."""
+
+    name: str
+    archetype: str
+    background: str
+    ability_scores: AbilityScores
+    proficiency: int = 2
+    hero_inspiration: bool = False
+    hp: int = 0
+    chakra: int = 0
+    fatigue: int = 0
+    scrolls: List[str] = field(default_factory=list)
+
+    def to_character(self) -> Character:
+        return Character.from_sheet(self)
 
 
 def build_ability_scores(archetype: str, background: str) -> AbilityScores:
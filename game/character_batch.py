@@ -0,0 +1,259 @@
+"""Structure-of-arrays storage for very large character populations.
+
+A :class:`~game.character.Character` costs a dataclass instance, a dict of
+ability scores and a list of scrolls, which is several hundred bytes apiece.
+:class:`CharacterBatch` keeps one contiguous typed column per stat instead,
+interns the repeated strings (names, archetypes, backgrounds, scroll names,
+ability key orders) and stores scrolls as a CSR pair of offsets and codes.
+The rules of :class:`~game.character.CharacterRules` are mirrored as
+element-wise operations that take a scalar or per-row amount and an optional
+row mask. NumPy is used when installed, the ``array`` module otherwise;
+converting back yields sheets equal to the originals.
+"""
+
+from array import array
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+from .character import BACKGROUND_BONUSES, Character
+from .dice_batch import IntInput, IntVector, _expand, np
+
+
+Mask = Sequence[bool] | None
+
+_NUMPY_TYPES = {"b": "int8", "h": "int16", "i": "int32", "I": "uint32", "q": "int64"}
+
+
+class _Interner:
+    """Maps each distinct value to a small integer code."""
+
+    def __init__(self) -> None:
+        self.values: List = []
+        self.codes: Dict = {}
+
+    def code(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class CharacterBatch:
+    """Population of character sheets stored column-wise."""
+
+    def __init__(self, characters: Iterable[Character] = (), use_numpy: bool | None = None) -> None:
+        if use_numpy and np is None:
+            raise RuntimeError("NumPy is not installed; use the array backend instead.")
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        self._strings = _Interner()
+        self._layouts = _Interner()
+
+        abilities: List[str] = []
+        columns: Dict[str, List[int]] = {}
+        names, archetypes, backgrounds, layouts = [], [], [], []
+        proficiency, hp, chakra, fatigue, inspiration = [], [], [], [], []
+        offsets, scrolls = [0], []
+        count = 0
+        for character in characters:
+            for ability in character.ability_scores:
+                if ability not in columns:
+                    abilities.append(ability)
+                    columns[ability] = [10] * count
+            for ability in abilities:
+                columns[ability].append(character.ability_scores.get(ability, 10))
+            layouts.append(self._layouts.code(tuple(character.ability_scores)))
+            names.append(self._strings.code(character.name))
+            archetypes.append(self._strings.code(character.archetype))
+            backgrounds.append(self._strings.code(character.background))
+            proficiency.append(character.proficiency)
+            hp.append(character.hp)
+            chakra.append(character.chakra)
+            fatigue.append(character.fatigue)
+            inspiration.append(int(character.hero_inspiration))
+            scrolls.extend(self._strings.code(scroll) for scroll in character.scrolls)
+            offsets.append(len(scrolls))
+            count += 1
+
+        self.size = count
+        self.scores = {ability: self._column("h", columns[ability]) for ability in abilities}
+        self.names = self._column("I", names)
+        self.archetypes = self._column("I", archetypes)
+        self.backgrounds = self._column("I", backgrounds)
+        self.layouts = self._column("I", layouts)
+        self.proficiency = self._column("b", proficiency)
+        self.hp = self._column("i", hp)
+        self.chakra = self._column("i", chakra)
+        self.fatigue = self._column("i", fatigue)
+        self.inspiration = self._column("b", inspiration)
+        self.scroll_offsets = self._column("q", offsets)
+        self.scroll_codes = self._column("I", scrolls)
+
+    @property
+    def backend(self) -> str:
+        return "numpy" if self.use_numpy else "array"
+
+    def _column(self, typecode: str, values: Sequence[int]) -> IntVector:
+        if self.use_numpy:
+            return np.asarray(values, dtype=_NUMPY_TYPES[typecode])
+        return array(typecode, values)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, row: int) -> Character:
+        if not -self.size <= row < self.size:
+            raise IndexError(row)
+        row %= self.size
+        strings = self._strings.values
+        layout = self._layouts.values[self.layouts[row]]
+        start, stop = self.scroll_offsets[row], self.scroll_offsets[row + 1]
+        character = Character(
+            name=strings[self.names[row]],
+            archetype=strings[self.archetypes[row]],
+            background=strings[self.backgrounds[row]],
+            ability_scores={ability: int(self.scores[ability][row]) for ability in layout},
+            proficiency=int(self.proficiency[row]),
+            hero_inspiration=bool(self.inspiration[row]),
+            fatigue=int(self.fatigue[row]),
+            scrolls=[strings[code] for code in self.scroll_codes[start:stop]],
+        )
+        # Assigned afterwards because ``__post_init__`` treats 0 as "not set".
+        character.hp = int(self.hp[row])
+        character.chakra = int(self.chakra[row])
+        return character
+
+    def __iter__(self) -> Iterator[Character]:
+        return (self[row] for row in range(self.size))
+
+    def to_characters(self) -> List[Character]:
+        return list(self)
+
+    def score(self, ability: str) -> IntVector:
+        if ability in self.scores:
+            return self.scores[ability]
+        return self._column("h", [10] * self.size)
+
+    def modifier(self, ability: str) -> IntVector:
+        scores = self.score(ability)
+        if self.use_numpy:
+            return (scores - 10) // 2
+        return array("h", ((score - 10) // 2 for score in scores))
+
+    def max_chakra(self) -> IntVector:
+        body, will = self.score("体魄"), self.score("意志")
+        if self.use_numpy:
+            return body.astype(np.int32) + will.astype(np.int32) * 2
+        return array("i", (b + w * 2 for b, w in zip(body, will)))
+
+    def scroll_counts(self) -> IntVector:
+        offsets = self.scroll_offsets
+        if self.use_numpy:
+            return np.diff(offsets)
+        return array("q", (offsets[i + 1] - offsets[i] for i in range(self.size)))
+
+    def _rows(self, mask: Mask) -> Iterable[int]:
+        if mask is None:
+            return range(self.size)
+        return (row for row, selected in enumerate(mask) if selected)
+
+    def _mask(self, mask: Mask):
+        return np.ones(self.size, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+
+    def adjust_hp(self, amount: IntInput, mask: Mask = None) -> None:
+        if self.use_numpy:
+            updated = np.maximum(self.hp + np.asarray(amount, dtype=np.int32), 0)
+            np.copyto(self.hp, updated, where=self._mask(mask))
+            return
+        amounts = _expand(amount, self.size)
+        for row in self._rows(mask):
+            self.hp[row] = max(0, self.hp[row] + amounts[row])
+
+    def spend_chakra(self, amount: IntInput, mask: Mask = None) -> IntVector:
+        """Spend where affordable; returns which rows paid."""
+
+        if self.use_numpy:
+            cost = np.asarray(amount, dtype=np.int32)
+            paid = (self.chakra >= cost) & self._mask(mask)
+            np.copyto(self.chakra, self.chakra - cost, where=paid)
+            return paid
+        amounts = _expand(amount, self.size)
+        paid = array("b", bytes(self.size))
+        for row in self._rows(mask):
+            if self.chakra[row] >= amounts[row]:
+                self.chakra[row] -= amounts[row]
+                paid[row] = 1
+        return paid
+
+    def gain_fatigue(self, amount: IntInput = 1, mask: Mask = None) -> None:
+        if self.use_numpy:
+            updated = np.maximum(self.fatigue + np.asarray(amount, dtype=np.int32), 0)
+            np.copyto(self.fatigue, updated, where=self._mask(mask))
+            return
+        amounts = _expand(amount, self.size)
+        for row in self._rows(mask):
+            self.fatigue[row] = max(0, self.fatigue[row] + amounts[row])
+
+    def rest(self, full: bool = False, mask: Mask = None) -> None:
+        base_hp = self._plus(self.modifier("体魄"), 8)
+        max_chakra = self.max_chakra()
+        if self.use_numpy:
+            selected = self._mask(mask)
+            if full:
+                np.copyto(self.hp, np.maximum(self.hp, base_hp), where=selected)
+                np.copyto(self.chakra, max_chakra, where=selected)
+                inspired = np.isin(self.backgrounds, self._long_rest_backgrounds())
+                np.copyto(self.inspiration, 1, where=selected & inspired)
+            else:
+                recovered = np.maximum(self.modifier("体魄"), 1)
+                np.copyto(self.hp, self.hp + recovered, where=selected)
+                np.copyto(self.chakra, np.minimum(self.chakra + recovered, max_chakra), where=selected)
+            np.copyto(self.fatigue, self.fatigue - 1, where=selected & (self.fatigue != 0))
+            return
+        modifiers = self.modifier("体魄")
+        inspired = set(self._long_rest_backgrounds())
+        for row in self._rows(mask):
+            if full:
+                self.hp[row] = max(self.hp[row], base_hp[row])
+                self.chakra[row] = max_chakra[row]
+                if self.backgrounds[row] in inspired:
+                    self.inspiration[row] = 1
+            else:
+                recovered = max(1, modifiers[row])
+                self.hp[row] += recovered
+                self.chakra[row] = min(self.chakra[row] + recovered, max_chakra[row])
+            if self.fatigue[row]:
+                self.fatigue[row] -= 1
+
+    def _plus(self, vector: IntVector, value: int) -> IntVector:
+        if self.use_numpy:
+            return vector.astype(np.int32) + value
+        return array("i", (item + value for item in vector))
+
+    def _long_rest_backgrounds(self) -> List[int]:
+        return [
+            code
+            for code, value in enumerate(self._strings.values)
+            if BACKGROUND_BONUSES.get(value, {}).get("inspiration_on_long_rest")
+        ]
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the columns (excluding interned strings)."""
+
+        columns: List[IntVector] = [
+            *self.scores.values(),
+            self.names,
+            self.archetypes,
+            self.backgrounds,
+            self.layouts,
+            self.proficiency,
+            self.hp,
+            self.chakra,
+            self.fatigue,
+            self.inspiration,
+            self.scroll_offsets,
+            self.scroll_codes,
+        ]
+        if self.use_numpy:
+            return sum(column.nbytes for column in columns)
+        return sum(column.itemsize * len(column) for column in columns)
+
@@ -0,0 +1,249 @@
+"""Compact binary checkpoints of a paused campaign.
+
+A snapshot holds everything ``run_game`` keeps between questions: the
+character sheet, the Mersenne Twister state, the phase index plus the forest
+day to resume at, and any scripted answers still pending. The format is a
+fixed little-endian header followed by length-prefixed UTF-8 strings and the
+625-word generator state, packed with precompiled :class:`struct.Struct`
+objects so that both directions take a few microseconds.
+
+Layout (version 1)::
+
+    header   magic "NCKP", version, phase, step, flags, proficiency, hp, chakra, fatigue
+    strings  name, archetype, background
+    scores   count, then (ability, score) pairs
+    scrolls  count, then strings
+    choices  count, then strings
+    rng      625 uint32 words, then gauss_next (float64, present if flagged)
+    blocks   present if flagged: block size (uint32, if flagged), count, then
+             (low, high, n, n int32 draws) per unserved
+             :class:`~game.block_random.BlockRandom` buffer; without the size
+             flag the default block size applies
+"""
+
+import random
+import struct
+from dataclasses import dataclass, field
+from typing import Iterable, List, Tuple
+
+from .block_random import BLOCK_STATE, DEFAULT_BLOCK_SIZE, BlockRandom, is_block_state
+from .character import Character
+
+
+MAGIC = b"NCKP"
+SESSION_MAGIC = b"NSES"
+VERSION = 1
+
+_FLAG_INSPIRATION = 1
+_FLAG_GAUSS = 2
+_FLAG_BLOCKS = 4
+_FLAG_BLOCK_SIZE = 8
+
+_HEADER = struct.Struct("<4sBBBBhiii")
+_SESSION = struct.Struct("<4sBQI")
+_COUNT = struct.Struct("<H")
+_SCORE = struct.Struct("<h")
+_MT_WORDS = 625
+_MT_STATE = struct.Struct(f"<{_MT_WORDS}I")
+_GAUSS = struct.Struct("<d")
+_BLOCK = struct.Struct("<iiH")
+_BLOCK_SIZE = struct.Struct("<I")
+
+
+class CheckpointError(ValueError):
+    """Raised when bytes are not a checkpoint this version understands."""
+
+
+@dataclass
+class Snapshot:
+    """A campaign paused at the start of a phase, or of a forest day."""
+
+    character: Character
+    rng_state: tuple
+    phase: int = 0
+    step: int = 0
+    choices: List[str] = field(default_factory=list)
+
+    @classmethod
+    def capture(
+        cls,
+        character: Character,
+        rng: random.Random,
+        phase: int = 0,
+        step: int = 0,
+        choices: Iterable[str] = (),
+    ) -> "Snapshot":
+        """Copy the live objects so the game may keep mutating them."""
+
+        return cls(Character.from_sheet(character), rng.getstate(), phase, step, list(choices))
+
+    def restore(self) -> Tuple[Character, random.Random]:
+        """Fresh, independent objects; call once per fork."""
+
+        # ``BlockRandom.setstate`` also restores the recorded block size. A
+        # fixed seed skips reading os.urandom for a state that is replaced anyway.
+        rng = BlockRandom(0) if is_block_state(self.rng_state) else random.Random(0)
+        rng.setstate(self.rng_state)
+        return Character.from_sheet(self.character), rng
+
+
+def _pack_strings(parts: List[bytes], values: Iterable[str]) -> None:
+    encoded = [value.encode("utf-8") for value in values]
+    parts.append(_COUNT.pack(len(encoded)))
+    for raw in encoded:
+        parts.append(_COUNT.pack(len(raw)))
+        parts.append(raw)
+
+
+def _read_string(data: bytes, offset: int) -> Tuple[str, int]:
+    (size,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    return data[offset : offset + size].decode("utf-8"), offset + size
+
+
+def _read_strings(data: bytes, offset: int) -> Tuple[List[str], int]:
+    (count,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    values = []
+    for _ in range(count):
+        value, offset = _read_string(data, offset)
+        values.append(value)
+    return values, offset
+
+
+def dumps(snapshot: Snapshot) -> bytes:
+    character = snapshot.character
+    blocks = None
+    block_size = DEFAULT_BLOCK_SIZE
+    state = snapshot.rng_state
+    if is_block_state(state):
+        _, state, blocks, block_size = state if len(state) == 4 else (*state, DEFAULT_BLOCK_SIZE)
+    version, words, gauss = state
+    if version != 3 or len(words) != _MT_WORDS:
+        raise CheckpointError(f"unsupported random state version {version}")
+    flags = (
+        (_FLAG_INSPIRATION if character.hero_inspiration else 0)
+        | (_FLAG_GAUSS if gauss is not None else 0)
+        | (_FLAG_BLOCKS if blocks is not None else 0)
+        | (_FLAG_BLOCK_SIZE if blocks is not None else 0)
+    )
+    parts = [
+        _HEADER.pack(
+            MAGIC,
+            VERSION,
+            snapshot.phase,
+            snapshot.step,
+            flags,
+            character.proficiency,
+            character.hp,
+            character.chakra,
+            character.fatigue,
+        )
+    ]
+    _pack_strings(parts, (character.name, character.archetype, character.background))
+    parts.append(_COUNT.pack(len(character.ability_scores)))
+    for ability, score in character.ability_scores.items():
+        raw = ability.encode("utf-8")
+        parts.append(_COUNT.pack(len(raw)))
+        parts.append(raw)
+        parts.append(_SCORE.pack(score))
+    _pack_strings(parts, character.scrolls)
+    _pack_strings(parts, snapshot.choices)
+    parts.append(_MT_STATE.pack(*words))
+    if gauss is not None:
+        parts.append(_GAUSS.pack(gauss))
+    if blocks is not None:
+        parts.append(_BLOCK_SIZE.pack(block_size))
+        parts.append(_COUNT.pack(len(blocks)))
+        for low, high, values in blocks:
+            parts.append(_BLOCK.pack(low, high, len(values)))
+            parts.append(struct.pack(f"<{len(values)}i", *values))
+    return b"".join(parts)
+
+
+def loads(data: bytes) -> Snapshot:
+    try:
+        magic, version, phase, step, flags, proficiency, hp, chakra, fatigue = _HEADER.unpack_from(data, 0)
+    except struct.error as exc:
+        raise CheckpointError("truncated checkpoint header") from exc
+    if magic != MAGIC:
+        raise CheckpointError("not a campaign checkpoint")
+    if version != VERSION:
+        raise CheckpointError(f"unsupported checkpoint version {version}")
+    try:
+        (name, archetype, background), offset = _read_strings(data, _HEADER.size)
+        (count,) = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        scores = {}
+        for _ in range(count):
+            ability, offset = _read_string(data, offset)
+            (scores[ability],) = _SCORE.unpack_from(data, offset)
+            offset += _SCORE.size
+        scrolls, offset = _read_strings(data, offset)
+        choices, offset = _read_strings(data, offset)
+        words = _MT_STATE.unpack_from(data, offset)
+        offset += _MT_STATE.size
+        gauss = None
+        if flags & _FLAG_GAUSS:
+            (gauss,) = _GAUSS.unpack_from(data, offset)
+            offset += _GAUSS.size
+        rng_state = (3, words, gauss)
+        if flags & _FLAG_BLOCKS:
+            block_size = DEFAULT_BLOCK_SIZE
+            if flags & _FLAG_BLOCK_SIZE:
+                (block_size,) = _BLOCK_SIZE.unpack_from(data, offset)
+                offset += _BLOCK_SIZE.size
+            (count,) = _COUNT.unpack_from(data, offset)
+            offset += _COUNT.size
+            blocks = []
+            for _ in range(count):
+                low, high, size = _BLOCK.unpack_from(data, offset)
+                offset += _BLOCK.size
+                blocks.append((low, high, struct.unpack_from(f"<{size}i", data, offset)))
+                offset += 4 * size
+            rng_state = (BLOCK_STATE, rng_state, tuple(blocks), block_size)
+    except (struct.error, ValueError) as exc:
+        raise CheckpointError("corrupt checkpoint body") from exc
+    character = Character(
+        name=name,
+        archetype=archetype,
+        background=background,
+        ability_scores=scores,
+        proficiency=proficiency,
+        hero_inspiration=bool(flags & _FLAG_INSPIRATION),
+        fatigue=fatigue,
+        scrolls=scrolls,
+    )
+    # Assigned afterwards because ``__post_init__`` treats 0 as "not set".
+    character.hp = hp
+    character.chakra = chakra
+    return Snapshot(character, rng_state, phase, step, choices)
+
+
+def save(snapshot: Snapshot, path: str) -> None:
+    with open(path, "wb") as handle:
+        handle.write(dumps(snapshot))
+
+
+def load(path: str) -> Snapshot:
+    with open(path, "rb") as handle:
+        return loads(handle.read())
+
+
+def dumps_session(seed: int, answers: List[str], emitted: int) -> bytes:
+    """Encode an idle :class:`~game.session.GameSession` for eviction to disk."""
+
+    parts = [_SESSION.pack(SESSION_MAGIC, VERSION, seed, emitted)]
+    _pack_strings(parts, answers)
+    return b"".join(parts)
+
+
+def loads_session(data: bytes) -> Tuple[int, List[str], int]:
+    try:
+        magic, version, seed, emitted = _SESSION.unpack_from(data, 0)
+        answers, _ = _read_strings(data, _SESSION.size)
+    except (struct.error, ValueError) as exc:
+        raise CheckpointError("corrupt session record") from exc
+    if magic != SESSION_MAGIC or version != VERSION:
+        raise CheckpointError("not a session record this version understands")
+    return seed, answers, emitted
@@ -5,6 +5,7 @@ import random
 
 from .dice import RollResult, ability_check, damage_roll
 from .character import Character
+from .output import OutputSink, STDOUT
 from .prompt import announce, Prompt
 from .inspiration import with_inspiration
 
@@ -21,6 +22,7 @@ def contested_check(
     rng: random.Random,
     prompt_fn: Prompt,
     label: str,
+    out: OutputSink = STDOUT,
 ) -> tuple[RollResult, RollResult]:
     """Resolve a contested check with optional inspiration on offense."""
 
@@ -28,9 +30,11 @@ def contested_check(
         character,
         lambda: ability_check(attacker_mod, dc, rng, character.proficiency),
         prompt_fn,
+        out=out,
+        dc=dc,
     )
     defense = ability_check(defender_mod, dc - 1, rng)
-    print(f"{label} — 进攻：{attack} / 防御：{defense}")
+    out.emit(f"{label} — 进攻：{attack} / 防御：{defense}")
     return attack, defense
 
 
@@ -42,12 +46,13 @@ def duel(
     prompt_fn: Prompt,
     flavor: str = "",
     damage: str = "1d6",
+    out: OutputSink = STDOUT,
 ) -> bool:
     """Single duel inspired by the anime bouts."""
 
-    announce(f"对战 {opponent}")
+    announce(f"对战 {opponent}", out)
     if flavor:
-        print(flavor)
+        out.emit(flavor)
     attack, defense = contested_check(
         character,
         attacker_mod=character.modifier("体术"),
@@ -56,16 +61,17 @@ def duel(
         rng=rng,
         prompt_fn=prompt_fn,
         label="决斗检定",
+        out=out,
     )
     score = int(attack.total >= dc) + int(defense.total >= dc - 1)
     if score >= 2:
-        print(f"你战胜了 {opponent}！")
-        character.hero_inspiration = True
+        out.emit(f"你战胜了 {opponent}！")
+        character.grant_inspiration()
         return True
 
     injury = damage_roll(damage, rng)
     character.adjust_hp(-injury.total)
-    print(f"{opponent} 更胜一筹，你受到 {injury} 伤害，当前生命 {character.hp}。")
+    out.emit(f"{opponent} 更胜一筹，你受到 {injury} 伤害，当前生命 {character.hp}。")
     return False
 
 
@@ -74,14 +80,15 @@ def group_scene(
     participants: Iterable[tuple[str, int, str]],
     rng: random.Random,
     prompt_fn: Prompt,
+    out: OutputSink = STDOUT,
 ) -> int:
     """Resolve a chain of duels; return number of wins."""
 
     wins = 0
     for name, dc, flavor in participants:
-        if duel(character, rng, dc, name, prompt_fn, flavor=flavor):
+        if duel(character, rng, dc, name, prompt_fn, flavor=flavor, out=out):
             wins += 1
         if character.hp <= 0:
-            announce("伤势过重，无法继续。")
+            announce("伤势过重，无法继续。", out)
             break
     return wins
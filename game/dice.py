@@ -1,8 +1,26 @@
 """Dice rolling utilities for the Naruto-inspired tabletop adventure."""
 
 from dataclasses import dataclass
+from functools import lru_cache
+from itertools import product
 import random
-from typing import Callable, Tuple
+from typing import Callable, Dict, Tuple
+
+from .dice_expr import compile_dice
+from .metrics import current
+from .transcript import active_transcript
+
+
+INSPIRATION_QUESTION = "你要消耗英雄灵感重掷这个检定吗？(y/N): "
+
+# Domain of the precomputed tables: modifiers from ``build_ability_scores``
+# (scores 8-18), the DCs the phases use, and fatigue penalties up to the
+# level at which the forest ends a run. Keys outside it are computed on demand.
+MODIFIER_RANGE = range(-1, 5)
+PROFICIENCY_RANGE = (0, 2)
+PENALTY_RANGE = range(0, 6)
+DC_RANGE = range(10, 21)
+DAMAGE_EXPRESSIONS = ("1d6", "1d8", "2d6")
 
 
 @dataclass
@@ -30,22 +48,107 @@ def ability_modifier(score: int) -> int:
 
 
 def ability_check(modifier: int, dc: int, rng: random.Random, proficiency: int = 0) -> RollResult:
+    metrics = current.get()
+    if metrics is not None:
+        metrics.checks += 1
     roll = roll_die(20, rng)
     total = roll + modifier + proficiency
     detail = f"d20:{roll}+mod:{modifier}+prof:{proficiency}"
     success = total >= dc
+    transcript = active_transcript.get()
+    if transcript is not None:
+        transcript.record(
+            "check", roll=roll, modifier=modifier, proficiency=proficiency, dc=dc, total=total, success=success
+        )
     outcome = "success" if success else "fail"
     return RollResult(total=total, detail=f"{detail} -> {outcome} vs DC {dc}")
 
 
 def damage_roll(dice: str, rng: random.Random) -> RollResult:
-    count, sides = (int(part) for part in dice.lower().split("d"))
-    total, detail = roll_dice(count, sides, rng)
+    """Roll any :mod:`game.dice_expr` expression, e.g. ``"1d6"`` or ``"2d6+3"``."""
+
+    metrics = current.get()
+    if metrics is not None:
+        metrics.damage_rolls += 1
+    total, detail = compile_dice(dice).roll(rng)
+    transcript = active_transcript.get()
+    if transcript is not None:
+        transcript.record("damage", dice=dice, total=total)
     return RollResult(total=total, detail=f"{detail} ({dice})")
 
 
 def ask_use_inspiration(has_inspiration: bool, prompt_fn: Callable[[str], str]) -> bool:
     if not has_inspiration:
         return False
-    choice = prompt_fn("你要消耗英雄灵感重掷这个检定吗？(y/N): ").strip().lower()
+    choice = prompt_fn(INSPIRATION_QUESTION).strip().lower()
     return choice == "y"
+
+
+@dataclass(frozen=True)
+class CheckOdds:
+    """Chance that ``d20 + modifier + proficiency - penalty >= dc``."""
+
+    plain: float
+    with_reroll: float
+
+    @property
+    def reroll_gain(self) -> float:
+        return self.with_reroll - self.plain
+
+
+@dataclass(frozen=True)
+class DamageOdds:
+    """Exact distribution of a damage expression as ``(total, probability)`` pairs."""
+
+    distribution: Tuple[Tuple[int, float], ...]
+
+    @property
+    def mean(self) -> float:
+        return sum(total * p for total, p in self.distribution)
+
+    @property
+    def minimum(self) -> int:
+        return self.distribution[0][0]
+
+    @property
+    def maximum(self) -> int:
+        return self.distribution[-1][0]
+
+    def at_least(self, total: int) -> float:
+        return sum(p for value, p in self.distribution if value >= total)
+
+
+CheckKey = Tuple[int, int, int, int]
+
+
+def _compute_check_odds(modifier: int, proficiency: int, penalty: int, dc: int) -> CheckOdds:
+    p = min(20, max(0, 21 - dc + modifier + proficiency - penalty)) / 20
+    # One heroic-inspiration reroll, taken only after a failure.
+    return CheckOdds(plain=p, with_reroll=p + (1 - p) * p)
+
+
+SUCCESS_TABLE: Dict[CheckKey, CheckOdds] = {
+    (modifier, proficiency, penalty, dc): _compute_check_odds(modifier, proficiency, penalty, dc)
+    for modifier, proficiency, penalty, dc in product(MODIFIER_RANGE, PROFICIENCY_RANGE, PENALTY_RANGE, DC_RANGE)
+}
+
+
+def check_odds(modifier: int, dc: int, proficiency: int = 0, penalty: int = 0) -> CheckOdds:
+    """Look up the odds of an ``ability_check``; mirrors its argument order."""
+
+    key = (modifier, proficiency, penalty, dc)
+    odds = SUCCESS_TABLE.get(key)
+    if odds is None:
+        odds = SUCCESS_TABLE[key] = _compute_check_odds(*key)
+    return odds
+
+
+@lru_cache(maxsize=None)
+def damage_odds(dice: str) -> DamageOdds:
+    """Exact distribution, mean and range of a ``damage_roll`` expression."""
+
+    return DamageOdds(compile_dice(dice).distribution)
+
+
+for _expression in DAMAGE_EXPRESSIONS:
+    damage_odds(_expression)
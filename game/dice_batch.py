@@ -0,0 +1,148 @@
+"""Batched dice resolution for large simulations.
+
+The scalar helpers in :mod:`game.dice` resolve one roll per call. The
+:class:`BatchRoller` here resolves the same check or damage expression for a
+whole population at once, using NumPy when it is installed and the standard
+``array`` module otherwise. Both backends are reproducible from a seed and
+follow the same distributions as the scalar functions, although the two
+backends do not produce identical sequences for the same seed.
+"""
+
+from array import array
+from dataclasses import dataclass
+import random
+from typing import Any, Sequence
+
+from .dice_expr import DiceTerm, compile_dice
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when NumPy is absent
+    np = None
+
+
+IntVector = Any  # ``numpy.ndarray`` or ``array.array``
+IntInput = int | Sequence[int]
+
+
+@dataclass
+class BatchCheck:
+    """Outcome of one ability check resolved for every member of a batch."""
+
+    rolls: IntVector
+    totals: IntVector
+    successes: IntVector
+
+    def success_rate(self) -> float:
+        count = len(self.successes)
+        return sum(self.successes) / count if count else 0.0
+
+
+class BatchRoller:
+    """Seeded source of batched d20 checks and damage rolls."""
+
+    def __init__(self, seed: int | None = None, use_numpy: bool | None = None) -> None:
+        if use_numpy and np is None:
+            raise RuntimeError("NumPy is not installed; use the array backend instead.")
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        if self.use_numpy:
+            self._np_rng = np.random.default_rng(seed)
+            self._rng: random.Random | None = None
+        else:
+            self._rng = random.Random(seed)
+
+    @property
+    def backend(self) -> str:
+        return "numpy" if self.use_numpy else "array"
+
+    def dice(self, sides: int, size: int, count: int = 1) -> IntVector:
+        """Sum ``count`` dice with ``sides`` faces for ``size`` independent rolls."""
+
+        if self.use_numpy:
+            rolls = self._np_rng.integers(1, sides + 1, size=(size, count), dtype=np.int32)
+            return rolls.sum(axis=1, dtype=np.int32)
+        faces = self._rng.choices(range(1, sides + 1), k=size * count)
+        if count == 1:
+            return array("i", faces)
+        return array("i", (sum(faces[i:i + count]) for i in range(0, size * count, count)))
+
+    def ability_checks(
+        self,
+        modifiers: IntInput,
+        dcs: IntInput,
+        proficiencies: IntInput = 0,
+        size: int | None = None,
+    ) -> BatchCheck:
+        """Resolve ``d20 + modifier + proficiency >= dc`` element-wise.
+
+        Each argument is either a scalar, broadcast to the batch, or a
+        sequence whose length sets the batch size.
+        """
+
+        size = _batch_size(size, modifiers, dcs, proficiencies)
+        rolls = self.dice(20, size)
+        if self.use_numpy:
+            totals = rolls + np.asarray(modifiers, dtype=np.int32) + np.asarray(proficiencies, dtype=np.int32)
+            successes = totals >= np.asarray(dcs, dtype=np.int32)
+            return BatchCheck(rolls=rolls, totals=totals, successes=successes)
+
+        mods = _expand(modifiers, size)
+        profs = _expand(proficiencies, size)
+        targets = _expand(dcs, size)
+        totals = array("i", map(int.__add__, map(int.__add__, rolls, mods), profs))
+        successes = array("b", map(int.__ge__, totals, targets))
+        return BatchCheck(rolls=rolls, totals=totals, successes=successes)
+
+    def damage(self, dice: str, size: int) -> IntVector:
+        """Roll the :mod:`game.dice_expr` expression ``dice`` for ``size`` targets.
+
+        Plain ``NdM`` terms are rolled as whole batches; keep, exploding and
+        advantage terms are rolled one target at a time.
+        """
+
+        expression = compile_dice(dice)
+        terms = expression.terms
+        if len(terms) == 1 and terms[0][0] > 0 and not expression.modifier and _plain(terms[0][1]):
+            return self._term(terms[0][1], size)
+        if self.use_numpy:
+            totals = np.full(size, expression.modifier, dtype=np.int32)
+            for sign, term in terms:
+                totals += sign * np.asarray(self._term(term, size), dtype=np.int32)
+            return totals
+        totals = [expression.modifier] * size
+        for sign, term in terms:
+            rolls = self._term(term, size)
+            totals = [total + sign * roll for total, roll in zip(totals, rolls)]
+        return array("i", totals)
+
+    def _term(self, term: DiceTerm, size: int) -> IntVector:
+        if _plain(term):
+            return self.dice(term.sides, size, term.count)
+        if self._rng is None:
+            # Scalar draws for the NumPy backend, seeded from its own stream.
+            self._rng = random.Random(int(self._np_rng.integers(2**63)))
+        return array("i", (term.roll(self._rng)[0] for _ in range(size)))
+
+
+def _plain(term: DiceTerm) -> bool:
+    return term.keep is None and not term.explode and not term.advantage
+
+
+def _batch_size(size: int | None, *values: IntInput) -> int:
+    lengths = {len(value) for value in values if not isinstance(value, int)}
+    if len(lengths) > 1:
+        raise ValueError(f"Batch inputs have mismatched lengths: {sorted(lengths)}")
+    if lengths:
+        length = lengths.pop()
+        if size is not None and size != length:
+            raise ValueError(f"size={size} does not match input length {length}")
+        return length
+    if size is None:
+        raise ValueError("size is required when every input is a scalar")
+    return size
+
+
+def _expand(value: IntInput, size: int) -> Sequence[int]:
+    if isinstance(value, int):
+        return [value] * size
+    return value
@@ -0,0 +1,229 @@
+"""Dice-expression language compiled to reusable rollers.
+
+Grammar (case-insensitive, whitespace ignored)::
+
+    expression := term (("+" | "-") term)*
+    term       := NUMBER | [COUNT] "d" SIDES [("kh" | "kl") KEEP] ["!"] ["adv" | "dis"]
+
+``4d6kh3`` keeps the three highest dice, ``1d8!`` explodes (a maximum face
+adds another roll, at most :data:`EXPLODE_LIMIT` extra dice), and
+``1d20adv``/``1d20dis`` roll the term twice and keep the higher or lower
+total. :func:`compile_dice` parses each distinct string once per process and
+the resulting :class:`DiceExpression` reports its exact distribution, mean,
+minimum and maximum without rolling.
+
+Plain ``NdM`` terms draw one ``rng.randint(1, M)`` per die in order, so
+``damage_roll`` consumes the generator exactly as it did before.
+"""
+
+import random
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from itertools import product
+from typing import Dict, List, Tuple
+
+
+EXPLODE_LIMIT = 8
+# Keep-highest/lowest distributions enumerate every face combination.
+ENUMERATION_LIMIT = 1_000_000
+
+_TERM = re.compile(r"(\d*)d(\d+)(?:(kh|kl)(\d+))?(!)?(adv|dis)?")
+_PART = re.compile(r"([+-]?)([^+-]+)")
+
+Distribution = Dict[int, float]
+
+
+def _convolve(left: Distribution, right: Distribution) -> Distribution:
+    totals: Distribution = defaultdict(float)
+    for a, p in left.items():
+        for b, q in right.items():
+            totals[a + b] += p * q
+    return totals
+
+
+@dataclass(frozen=True)
+class DiceTerm:
+    """``count`` dice with ``sides`` faces plus keep/explode/advantage options."""
+
+    count: int
+    sides: int
+    keep: int | None = None
+    keep_highest: bool = True
+    explode: bool = False
+    advantage: int = 0  # 1 for adv, -1 for dis
+
+    def _roll_die(self, rng: random.Random) -> List[int]:
+        faces = [rng.randint(1, self.sides)]
+        while self.explode and faces[-1] == self.sides and len(faces) <= EXPLODE_LIMIT:
+            faces.append(rng.randint(1, self.sides))
+        return faces
+
+    def _roll_once(self, rng: random.Random) -> Tuple[int, str]:
+        dice = [self._roll_die(rng) for _ in range(self.count)]
+        totals = [sum(faces) for faces in dice]
+        if self.keep is None:
+            if self.explode:
+                return sum(totals), "+".join("!".join(str(face) for face in faces) for faces in dice)
+            return sum(totals), "+".join(str(total) for total in totals)
+        order = sorted(range(len(totals)), key=totals.__getitem__, reverse=self.keep_highest)
+        kept = sorted(order[: self.keep])
+        dropped = sorted(order[self.keep :])
+        detail = "+".join(str(totals[i]) for i in kept)
+        if dropped:
+            detail += " drop " + ",".join(str(totals[i]) for i in dropped)
+        return sum(totals[i] for i in kept), detail
+
+    def roll(self, rng: random.Random) -> Tuple[int, str]:
+        if not self.advantage:
+            return self._roll_once(rng)
+        first, second = self._roll_once(rng), self._roll_once(rng)
+        keep_first = first[0] >= second[0] if self.advantage > 0 else first[0] <= second[0]
+        chosen, other = (first, second) if keep_first else (second, first)
+        return chosen[0], f"{chosen[1]} | {other[1]}"
+
+    def _die_distribution(self) -> Distribution:
+        chance = 1 / self.sides
+        faces: Distribution = {face: chance for face in range(1, self.sides + 1)}
+        if not self.explode:
+            return faces
+        # Walk the chain of maximum faces: k explosions add k * sides.
+        exploded: Distribution = defaultdict(float)
+        reach = 1.0
+        for depth in range(EXPLODE_LIMIT + 1):
+            base = depth * self.sides
+            last = depth == EXPLODE_LIMIT
+            for face in range(1, self.sides + 1):
+                if face == self.sides and not last:
+                    continue
+                exploded[base + face] += reach * chance
+            reach *= chance
+        return exploded
+
+    def _single_distribution(self) -> Distribution:
+        die = self._die_distribution()
+        if self.keep is None or self.keep >= self.count:
+            totals: Distribution = {0: 1.0}
+            for _ in range(self.count):
+                totals = _convolve(totals, die)
+            return totals
+        if len(die) ** self.count > ENUMERATION_LIMIT:
+            raise ValueError(f"too many combinations to enumerate for {self.count} dice")
+        totals = defaultdict(float)
+        outcomes = list(die.items())
+        for combo in product(outcomes, repeat=self.count):
+            values = sorted((value for value, _ in combo), reverse=self.keep_highest)
+            p = 1.0
+            for _, chance in combo:
+                p *= chance
+            totals[sum(values[: self.keep])] += p
+        return totals
+
+    def distribution(self) -> Distribution:
+        single = self._single_distribution()
+        if not self.advantage:
+            return dict(single)
+        # max/min of two independent totals via the cumulative distribution.
+        ordered = sorted(single.items(), reverse=self.advantage < 0)
+        result: Distribution = {}
+        below = 0.0
+        for value, p in ordered:
+            result[value] = (below + p) ** 2 - below ** 2
+            below += p
+        return result
+
+
+@dataclass(frozen=True)
+class DiceExpression:
+    """A compiled expression: signed dice terms plus a flat modifier."""
+
+    source: str
+    terms: Tuple[Tuple[int, DiceTerm], ...]
+    modifier: int = 0
+
+    def roll(self, rng: random.Random) -> Tuple[int, str]:
+        """Roll once; returns the total and a per-die detail string."""
+
+        total = 0
+        parts = []
+        for sign, term in self.terms:
+            value, detail = term.roll(rng)
+            total += sign * value
+            parts.append((sign, detail))
+        if len(parts) == 1 and parts[0][0] > 0 and not self.modifier:
+            return total, parts[0][1]
+        pieces = [f"{'-' if sign < 0 else '+'}({detail})" for sign, detail in parts]
+        if self.modifier:
+            pieces.append(f"{self.modifier:+d}")
+        return total + self.modifier, "".join(pieces).lstrip("+")
+
+    @cached_property
+    def distribution(self) -> Tuple[Tuple[int, float], ...]:
+        """Exact ``(total, probability)`` pairs in ascending order of total."""
+
+        totals: Distribution = {self.modifier: 1.0}
+        for sign, term in self.terms:
+            signed = {sign * value: p for value, p in term.distribution().items()}
+            totals = _convolve(totals, signed)
+        return tuple(sorted(totals.items()))
+
+    @property
+    def mean(self) -> float:
+        return sum(total * p for total, p in self.distribution)
+
+    @property
+    def minimum(self) -> int:
+        return self.distribution[0][0]
+
+    @property
+    def maximum(self) -> int:
+        return self.distribution[-1][0]
+
+
+@lru_cache(maxsize=256)
+def compile_dice(expression: str) -> DiceExpression:
+    """Parse ``expression`` once; later calls with the same string are cache hits."""
+
+    text = expression.replace(" ", "").lower()
+    if not text:
+        raise ValueError("empty dice expression")
+    terms = []
+    modifier = 0
+    position = 0
+    for match in _PART.finditer(text):
+        if match.start() != position or (match.start() and not match.group(1)):
+            raise ValueError(f"invalid dice expression: {expression!r}")
+        position = match.end()
+        sign = -1 if match.group(1) == "-" else 1
+        body = match.group(2)
+        if body.isdigit():
+            modifier += sign * int(body)
+            continue
+        term = _TERM.fullmatch(body)
+        if term is None:
+            raise ValueError(f"invalid dice term {body!r} in {expression!r}")
+        count_text, sides_text, keep_mode, keep_text, bang, advantage = term.groups()
+        count = int(count_text) if count_text else 1
+        sides = int(sides_text)
+        keep = int(keep_text) if keep_text else None
+        if count < 1 or sides < 1 or (keep is not None and not 1 <= keep <= count):
+            raise ValueError(f"invalid dice term {body!r} in {expression!r}")
+        if bang and sides == 1:
+            raise ValueError(f"a one-sided die cannot explode: {body!r}")
+        terms.append(
+            (
+                sign,
+                DiceTerm(
+                    count=count,
+                    sides=sides,
+                    keep=keep,
+                    keep_highest=keep_mode != "kl",
+                    explode=bool(bang),
+                    advantage={"adv": 1, "dis": -1}.get(advantage, 0),
+                ),
+            )
+        )
+    if position != len(text):
+        raise ValueError(f"invalid dice expression: {expression!r}")
+    return DiceExpression(expression, tuple(terms), modifier)
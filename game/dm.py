@@ -1,17 +1,189 @@
 """Campaign runner orchestrating each phase."""
 
 import random
-from typing import List
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from importlib import import_module
+from typing import Callable, Dict, Iterable, List, Sequence
 
 from .character import Character, build_ability_scores
+from .checkpoint import Snapshot
+from .metrics import Metrics, collecting, current, metered_prompt
+from .transcript import active_transcript
+from .output import NULL, OutputSink, STDOUT
 from .prompt import announce, build_prompt, Prompt
-from .phases.exam import run_exam_phase
-from .phases.forest import run_forest_phase
-from .phases.prelims import run_prelims
-from .phases.finals import run_finals
+from .stats import active_stats
 
 
-def create_character(prompt_fn: Prompt) -> Character:
+PHASES = ("exam", "forest", "prelims", "finals")
+
+
+@dataclass
+class CampaignResult:
+    """Outcome of one campaign: the final sheet and the phases cleared."""
+
+    character: Character
+    passed: List[str] = field(default_factory=list)
+
+    @property
+    def promoted(self) -> bool:
+        return len(self.passed) == len(PHASES)
+
+
+@dataclass
+class PhaseContext:
+    """State shared by every stage and hook of one pipeline run."""
+
+    character: Character
+    rng: random.Random
+    prompt_fn: Prompt
+    out: OutputSink = STDOUT
+    result: CampaignResult | None = None
+    # Forest day to resume at; consumed by the first stage that runs.
+    resume_day: int = 0
+    # Set by a stage or hook to end the run after the current stage.
+    stop: bool = False
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if self.result is None:
+            self.result = CampaignResult(self.character)
+
+
+StageFn = Callable[[PhaseContext], bool]
+BeforeHook = Callable[[str, PhaseContext], None]
+AfterHook = Callable[[str, PhaseContext, bool], None]
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    run: StageFn
+
+
+def phase_stage(name: str, runner: Callable[..., bool]) -> Stage:
+    """Adapt a ``run_*(character, rng, prompt_fn, out)`` phase into a stage."""
+
+    def run(context: PhaseContext) -> bool:
+        return runner(context.character, context.rng, context.prompt_fn, context.out)
+
+    return Stage(name, run)
+
+
+def deferred(module: str, name: str) -> Callable[..., bool]:
+    """A phase runner whose module is imported the first time the stage runs."""
+
+    def runner(*args, **kwargs) -> bool:
+        return getattr(import_module(module, __package__), name)(*args, **kwargs)
+
+    return runner
+
+
+def _forest_stage(context: PhaseContext) -> bool:
+    from .phases.forest import run_forest_phase
+
+    day, context.resume_day = context.resume_day, 0
+    return run_forest_phase(context.character, context.rng, context.prompt_fn, context.out, from_day=day)
+
+
+class Pipeline:
+    """Ordered, registered campaign stages with before/after hooks.
+
+    A stage returns whether the character passed; a failure ends the run, as
+    does setting ``context.stop``. Each stage's wall time lands in
+    ``context.timings``.
+    """
+
+    def __init__(self, stages: Iterable[Stage] = ()) -> None:
+        self.stages: List[Stage] = list(stages)
+        self.before: List[BeforeHook] = []
+        self.after: List[AfterHook] = []
+
+    @property
+    def names(self) -> tuple:
+        return tuple(stage.name for stage in self.stages)
+
+    def register(self, stage: Stage, before: str | None = None) -> None:
+        if stage.name in self.names:
+            raise ValueError(f"stage {stage.name!r} is already registered")
+        index = self.names.index(before) if before is not None else len(self.stages)
+        self.stages.insert(index, stage)
+
+    def add_hooks(self, before: BeforeHook | None = None, after: AfterHook | None = None) -> None:
+        if before is not None:
+            self.before.append(before)
+        if after is not None:
+            self.after.append(after)
+
+    def only(self, names: Sequence[str]) -> "Pipeline":
+        """A pipeline with just ``names`` (in registration order) and the same hooks."""
+
+        unknown = set(names) - set(self.names)
+        if unknown:
+            raise ValueError(f"unknown stages: {sorted(unknown)}")
+        subset = Pipeline(stage for stage in self.stages if stage.name in names)
+        subset.before = list(self.before)
+        subset.after = list(self.after)
+        return subset
+
+    def run(self, context: PhaseContext, start: str | None = None, until: str | None = None) -> CampaignResult:
+        """Run from stage ``start`` up to, but not including, stage ``until``."""
+
+        names = self.names
+        first = names.index(start) if start is not None else 0
+        last = names.index(until) if until is not None else len(names)
+        transcript = active_transcript.get()
+        if transcript is not None and transcript.character is not context.character:
+            transcript.watch(context.character)
+        stats = active_stats.get()
+        context.prompt_fn = metered_prompt(context.prompt_fn)
+        for stage in self.stages[first:last]:
+            for hook in self.before:
+                hook(stage.name, context)
+            if context.stop:
+                break
+            if transcript is not None:
+                transcript.phase = stage.name
+            if stats is not None:
+                stats.enter(stage.name, context.character)
+            started = time.perf_counter()
+            passed = stage.run(context)
+            elapsed = context.timings[stage.name] = time.perf_counter() - started
+            metrics = current.get()
+            if metrics is not None:
+                metrics.add_phase(stage.name, elapsed)
+            if transcript is not None:
+                transcript.record("phase", passed=passed, seconds=round(elapsed, 6))
+            context.out.flush()
+            for hook in self.after:
+                hook(stage.name, context, passed)
+            if not passed:
+                break
+            context.result.passed.append(stage.name)
+            if context.stop:
+                break
+        if transcript is not None:
+            transcript.record("end", passed=context.result.passed, promoted=context.result.promoted)
+        if stats is not None:
+            stats.finish(context.result)
+        return context.result
+
+
+def campaign_pipeline() -> Pipeline:
+    """A fresh copy of the standard four-phase campaign."""
+
+    return Pipeline(
+        [
+            phase_stage("exam", deferred(".phases.exam", "run_exam_phase")),
+            Stage("forest", _forest_stage),
+            phase_stage("prelims", deferred(".phases.prelims", "run_prelims")),
+            phase_stage("finals", deferred(".phases.finals", "run_finals")),
+        ]
+    )
+
+
+def create_character(prompt_fn: Prompt, out: OutputSink = STDOUT) -> Character:
     name = prompt_fn("角色名（默认：新晋忍者）: ").strip() or "新晋忍者"
     archetype = prompt_fn("职业选择 体术专家(t) / 忍术专家(n) / 幻术/医疗专家(g): ").strip().lower()
     archetype_name = {"t": "体术专家", "n": "忍术专家", "g": "幻术/医疗专家"}.get(archetype, "体术专家")
@@ -27,8 +199,8 @@ def create_character(prompt_fn: Prompt) -> Character:
         hero_inspiration=background_name == "木叶村天赋",
     )
 
-    print(f"\n{name}，{background_name}出身的{archetype_name}，能力值：{abilities}")
-    print(f"生命值 {character.hp}，查克拉 {character.chakra}，英雄灵感 {character.hero_inspiration}")
+    out.emit(f"\n{name}，{background_name}出身的{archetype_name}，能力值：{abilities}")
+    out.emit(f"生命值 {character.hp}，查克拉 {character.chakra}，英雄灵感 {character.hero_inspiration}")
     return character
 
 
@@ -36,21 +208,111 @@ def run_game(
     seed: int | None = None,
     scripted_choices: List[str] | None = None,
     demo_mode: bool = False,
-) -> None:
+    prompt_fn: Prompt | None = None,
+    out: OutputSink = STDOUT,
+    rng: random.Random | None = None,
+    metrics: Metrics | None = None,
+    pipeline: Pipeline | None = None,
+) -> CampaignResult:
+    """Play a full campaign; ``rng`` overrides the generator seeded from ``seed``.
+
+    Passing ``metrics`` collects timings and counters for this game; a
+    collector already made current with :func:`game.metrics.collecting` is
+    used otherwise. ``pipeline`` replaces :func:`campaign_pipeline`, e.g. to
+    add hooks.
+    """
+
+    if metrics is not None:
+        with collecting(metrics):
+            return run_game(seed, scripted_choices, demo_mode, prompt_fn, out, rng, pipeline=pipeline)
+    rng = rng or random.Random(seed)
+    if prompt_fn is None:
+        prompt_fn = build_prompt(
+            scripted_choices or [],
+            fallback="y" if demo_mode else None,
+            inspiration_fallback="y" if demo_mode else None,
+            force_scripted=demo_mode,
+            out=out,
+        )
+    prompt_fn = metered_prompt(prompt_fn)
+    announce("欢迎来到火影忍者：中忍考试篇 (文字版)", out)
+    character = create_character(prompt_fn, out)
+    result = CampaignResult(character)
+    out.flush()
+
+    return (pipeline or campaign_pipeline()).run(PhaseContext(character, rng, prompt_fn, out, result))
+
+
+def resume_game(
+    snapshot: Snapshot,
+    prompt_fn: Prompt | None = None,
+    out: OutputSink = STDOUT,
+    rng: random.Random | None = None,
+    pipeline: Pipeline | None = None,
+) -> CampaignResult:
+    """Continue a campaign from a checkpoint.
+
+    Without ``prompt_fn`` the snapshot's pending scripted choices are replayed
+    and then the player is asked as usual. Passing ``rng`` (e.g. a reseeded
+    generator) forks a variant instead of repeating the recorded future;
+    ``pipeline`` works as in :func:`run_game`.
+    """
+
+    if snapshot.phase >= len(PHASES):
+        raise ValueError(f"checkpoint phase {snapshot.phase} is past the final phase")
+    if snapshot.step and PHASES[snapshot.phase] != "forest":
+        raise ValueError("only the forest phase can be resumed mid-phase")
+    character, restored = snapshot.restore()
+    if prompt_fn is None:
+        prompt_fn = build_prompt(list(snapshot.choices), out=out)
+    result = CampaignResult(character, list(PHASES[: snapshot.phase]))
+    context = PhaseContext(character, rng or restored, prompt_fn, out, result, resume_day=snapshot.step)
+    return (pipeline or campaign_pipeline()).run(context, start=PHASES[snapshot.phase])
+
+
+class _Paused(Exception):
+    pass
+
+
+def checkpoint_game(
+    seed: int | None,
+    scripted_choices: List[str],
+    phase: str = "forest",
+    day: int = 0,
+) -> Snapshot:
+    """Play silently from ``seed`` and snapshot at the start of ``phase``.
+
+    ``day`` pauses the forest just before that day's action is chosen. Missing
+    answers default as if the player pressed Enter; unused ones stay pending
+    in the snapshot.
+    """
+
+    from .phases.forest import ACTION_QUESTION
+
     rng = random.Random(seed)
-    prompt_fn = build_prompt(
-        scripted_choices or [],
-        fallback="y" if demo_mode else None,
-        inspiration_fallback="y" if demo_mode else None,
-        force_scripted=demo_mode,
-    )
-    announce("欢迎来到火影忍者：中忍考试篇 (文字版)")
-    character = create_character(prompt_fn)
-
-    if not run_exam_phase(character, rng, prompt_fn):
-        return
-    if not run_forest_phase(character, rng, prompt_fn):
-        return
-    if not run_prelims(character, rng, prompt_fn):
-        return
-    run_finals(character, rng, prompt_fn)
+    pending = deque(scripted_choices)
+    start = PHASES.index(phase)
+    days = 0
+
+    def prompt_fn(question: str) -> str:
+        nonlocal days
+        if question == ACTION_QUESTION:
+            days += 1
+            if days == day:
+                raise _Paused
+        return pending.popleft() if pending else ""
+
+    if day and phase != "forest":
+        raise ValueError("only the forest phase can be checkpointed mid-phase")
+    context = PhaseContext(create_character(prompt_fn, NULL), rng, prompt_fn, NULL)
+    character = context.character
+    pipeline = campaign_pipeline()
+    try:
+        if pipeline.run(context, until=phase).passed != list(PHASES[:start]):
+            raise ValueError("campaign ended before the requested checkpoint")
+        if not day:
+            return Snapshot.capture(character, rng, start, 0, pending)
+        pipeline.only([phase]).run(context)
+    except _Paused:
+        return Snapshot.capture(character, rng, start, day, pending)
+    raise ValueError("campaign ended before the requested checkpoint")
@@ -0,0 +1,624 @@
+"""Encounter content loaded from ``game/content/*.json``.
+
+Each content file is validated and compiled once into plain tuples (steps
+become ``(op, ...)`` records, the patrol table becomes a face-indexed tuple
+of encounter ids) and the result is written to
+``game/content/__pycache__/<name>.<sha256>.v<format>.bin`` with
+:mod:`marshal`. Later processes hash the JSON source, find the matching
+cache and skip parsing and validation entirely; editing a file changes its
+hash and the stale cache is replaced. Nothing is read at import time: a
+phase calls :func:`load_content` for its own file the first time it runs.
+
+An encounter is a list of steps, each a JSON object keyed by its operation::
+
+    {"say": "text with {roll} placeholders"}
+    {"hp": 1} / {"chakra": 3} / {"fatigue": 1}
+    {"inspiration": true} / {"scroll": "夺来的卷轴"}
+    {"damage": "1d8", "as": "sonic"} / {"heal": "1d6", "as": "heal"}
+    {"check": "体术", "dc": 15, "as": "clash", "reroll": true,
+     "proficient": true, "say": "体术对抗：{clash}",
+     "success": [...], "failure": [...]}
+    {"at_least": ["harm", 4], "then": [...], "else": [...]}
+
+``say`` texts are formatted with the named results of earlier rolls and
+checks, so ``{sonic}`` renders like ``str(RollResult)`` and ``{heal.total}``
+is the bare number. :func:`resolve` turns steps into a :data:`Program` of
+handler calls (:func:`encounter_programs` keeps them per DC override set),
+:func:`play` runs one against a character and :mod:`game.analytic` walks the
+same steps exactly.
+
+Patrol rows pick an ``encounter`` (or a nested ``table`` of rows) either by
+die ``faces`` or by ``weight``, optionally gated by ``when`` bounds on the
+character's state, e.g. ``{"weight": 2, "encounter": "kunai_trap",
+"when": {"fatigue": [2, null], "inspiration": false}}``.
+:func:`patrol_table` builds a :class:`~game.tables.WeightedTable` from them.
+
+Every DC has a stable id (see :func:`difficulty_classes`); inside
+``with overriding({"prelims.match.3": 12}):`` :func:`load_content` returns
+the content with those DCs replaced, which is how :mod:`game.balance` plays
+candidate tables without touching the files.
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import random
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fractions import Fraction
+from functools import lru_cache
+from pathlib import Path
+from string import Formatter
+from typing import Callable, Dict, Iterator, List, Mapping, Sequence, Set, Tuple
+
+from .character import ARCHETYPE_PRIORITIES, Character
+from .dice import RollResult, ability_check, damage_roll
+from .dice_expr import compile_dice
+from .inspiration import with_inspiration
+from .output import OutputSink, STDOUT
+from .prompt import Prompt
+from .tables import TableEntry, WeightedTable
+
+
+CONTENT_DIR = Path(__file__).resolve().parent / "content"
+CACHE_DIR = CONTENT_DIR / "__pycache__"
+# Bump when the compiled layout changes so old caches are never reused.
+CACHE_FORMAT = 2
+
+ABILITIES = frozenset(ability for priorities in ARCHETYPE_PRIORITIES.values() for ability in priorities)
+# Order of the tuple that table conditions are evaluated against; it matches
+# ``analytic.State`` so the exact model can pass its states directly.
+STATE_FIELDS = ("hp", "chakra", "fatigue", "inspiration", "scrolls")
+# Named checks of the finals, in the order the phase rolls them.
+FINALS_CHECKS = ("trick", "speech", "shadow", "evacuate", "guard")
+
+Step = Tuple
+Steps = Tuple[Step, ...]
+
+
+class ContentError(ValueError):
+    """Raised when a content file does not match the encounter schema."""
+
+
+# --- compilation --------------------------------------------------------
+
+
+def _fail(where: str, message: str) -> None:
+    raise ContentError(f"{where}: {message}")
+
+
+def _expect(value, kind, where: str, what: str):
+    if not isinstance(value, kind) or isinstance(value, bool) and kind is not bool:
+        _fail(where, f"{what} must be {getattr(kind, '__name__', kind)}, got {value!r}")
+    return value
+
+
+def _text(text: str, names: Set[str], where: str) -> str:
+    _expect(text, str, where, "text")
+    for _, field, _, _ in Formatter().parse(text):
+        if field is None:
+            continue
+        root = field.split(".", 1)[0].split("[", 1)[0]
+        if root not in names:
+            _fail(where, f"placeholder {{{field}}} does not name an earlier roll or check")
+    return text
+
+
+def _dice(dice: str, where: str) -> str:
+    try:
+        compile_dice(_expect(dice, str, where, "dice"))
+    except ValueError as error:
+        _fail(where, str(error))
+    return dice
+
+
+def _compile_steps(steps: Sequence, names: Set[str], where: str) -> Steps:
+    compiled = []
+    for index, step in enumerate(_expect(steps, list, where, "steps")):
+        at = f"{where}[{index}]"
+        _expect(step, dict, at, "step")
+        if "check" in step:
+            ability = step["check"]
+            if ability not in ABILITIES:
+                _fail(at, f"unknown ability {ability!r}")
+            name = _expect(step.get("as", ""), str, at, "as")
+            if name:
+                names.add(name)
+            # Both branches see the names bound so far; neither leaks into the other.
+            compiled.append(
+                (
+                    "check",
+                    ability,
+                    _expect(step.get("dc"), int, at, "dc"),
+                    name,
+                    _expect(step.get("reroll", False), bool, at, "reroll"),
+                    _expect(step.get("proficient", True), bool, at, "proficient"),
+                    _text(step["say"], names, at) if "say" in step else "",
+                    _compile_steps(step.get("success", []), set(names), f"{at}.success"),
+                    _compile_steps(step.get("failure", []), set(names), f"{at}.failure"),
+                )
+            )
+        elif "at_least" in step:
+            reference = _expect(step["at_least"], list, at, "at_least")
+            if len(reference) != 2 or reference[0] not in names or not isinstance(reference[1], int):
+                _fail(at, "at_least must be [earlier roll name, threshold]")
+            compiled.append(
+                (
+                    "at_least",
+                    reference[0],
+                    reference[1],
+                    _compile_steps(step.get("then", []), set(names), f"{at}.then"),
+                    _compile_steps(step.get("else", []), set(names), f"{at}.else"),
+                )
+            )
+        elif "damage" in step or "heal" in step:
+            op = "damage" if "damage" in step else "heal"
+            name = _expect(step.get("as", ""), str, at, "as")
+            if name:
+                names.add(name)
+            compiled.append(("roll", _dice(step[op], at), name, -1 if op == "damage" else 1))
+        elif "say" in step:
+            compiled.append(("say", _text(step["say"], names, at)))
+        elif "scroll" in step:
+            compiled.append(("scroll", _expect(step["scroll"], str, at, "scroll")))
+        elif "inspiration" in step:
+            compiled.append(("inspiration", _expect(step["inspiration"], bool, at, "inspiration")))
+        else:
+            for op in ("hp", "chakra", "fatigue"):
+                if op in step:
+                    compiled.append((op, _expect(step[op], int, at, op)))
+                    break
+            else:
+                _fail(at, f"unknown step {step!r}")
+    return tuple(compiled)
+
+
+def _compile_conditions(when: Dict, where: str) -> Tuple:
+    conditions = []
+    for field, bounds in _expect(when, dict, where, "when").items():
+        if field == "inspiration":
+            flag = int(_expect(bounds, bool, where, "when.inspiration"))
+            conditions.append((STATE_FIELDS.index(field), flag, flag))
+        elif field in STATE_FIELDS:
+            if not isinstance(bounds, list) or len(bounds) != 2:
+                _fail(where, f"when.{field} must be [minimum, maximum] (null for open)")
+            low, high = (None if bound is None else _expect(bound, int, where, f"when.{field}") for bound in bounds)
+            conditions.append((STATE_FIELDS.index(field), low, high))
+        else:
+            _fail(where, f"unknown condition field {field!r}")
+    return tuple(conditions)
+
+
+def _weight(value, where: str) -> Tuple[int, int]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        _fail(where, f"weight must be a positive number, got {value!r}")
+    weight = Fraction(str(value))
+    return weight.numerator, weight.denominator
+
+
+def _compile_rows(rows: Sequence, encounters: Dict, die: int, where: str) -> Tuple:
+    """Rows become ``(face, weight, target, conditions)``; ``face`` is 0 for weighted rows."""
+
+    compiled = []
+    for index, row in enumerate(_expect(rows, list, where, "table")):
+        at = f"{where}[{index}]"
+        _expect(row, dict, at, "row")
+        if "table" in row:
+            target = ("table", _compile_rows(row["table"], encounters, 0, f"{at}.table"))
+        elif row.get("encounter") in encounters:
+            target = ("encounter", row["encounter"])
+        else:
+            _fail(at, f"unknown encounter {row.get('encounter')!r}")
+        conditions = _compile_conditions(row["when"], at) if "when" in row else ()
+        if "faces" in row:
+            if not die:
+                _fail(at, "faces are only allowed in the top-level table of a die")
+            for face in _expect(row["faces"], list, at, "faces"):
+                if not 1 <= _expect(face, int, at, "face") <= die:
+                    _fail(at, f"face {face} is outside 1..{die}")
+                compiled.append((face, (1, 1), target, conditions))
+        else:
+            compiled.append((0, _weight(row.get("weight", 1), at), target, conditions))
+    return tuple(compiled)
+
+
+def _compile_forest(data: Dict, where: str) -> Dict:
+    encounters = {
+        key: _compile_steps(steps, set(), f"{where}:encounters.{key}")
+        for key, steps in _expect(data.get("encounters"), dict, where, "encounters").items()
+    }
+    patrol = _expect(data.get("patrol"), dict, where, "patrol")
+    die = _expect(patrol.get("die", 0), int, where, "patrol.die")
+    rows = _compile_rows(patrol.get("table"), encounters, die, f"{where}:patrol.table")
+    # Face k must be alias column k - 1 so a uniform die draws like ``randint(1, die)``.
+    rows = tuple(sorted(rows, key=lambda row: (not row[0], row[0])))
+    faces = sorted(row[0] for row in rows if row[0])
+    if die and faces != list(range(1, die + 1)):
+        _fail(where, f"patrol faces must cover 1..{die} exactly once")
+    return {"encounters": encounters, "patrol": {"die": die, "rows": rows}}
+
+
+def _duel(data: Dict, where: str, what: str) -> Tuple[str, int, str, str]:
+    duel = _expect(data.get(what), dict, where, what)
+    return (
+        _expect(duel.get("opponent"), str, where, f"{what}.opponent"),
+        _expect(duel.get("dc"), int, where, f"{what}.dc"),
+        _dice(duel.get("damage", "1d6"), f"{where}:{what}"),
+        _expect(duel.get("flavor", ""), str, where, f"{what}.flavor"),
+    )
+
+
+def _compile_prelims(data: Dict, where: str) -> Dict:
+    matches = tuple(
+        (
+            _expect(match.get("title"), str, where, "title"),
+            _expect(match.get("dc"), int, where, "dc"),
+            _expect(match.get("flavor", ""), str, where, "flavor"),
+        )
+        for match in _expect(data.get("matches"), list, where, "matches")
+    )
+    return {
+        "solo": _duel(data, where, "solo"),
+        "required_victories": _expect(data.get("required_victories"), int, where, "required_victories"),
+        "matches": matches,
+    }
+
+
+def _compile_finals(data: Dict, where: str) -> Dict:
+    checks = _expect(data.get("checks"), dict, where, "checks")
+    if sorted(checks) != sorted(FINALS_CHECKS):
+        _fail(where, f"checks must name exactly {', '.join(FINALS_CHECKS)}")
+    return {
+        "checks": {name: _expect(checks[name], int, where, f"checks.{name}") for name in FINALS_CHECKS},
+        "duel": _duel(data, where, "duel"),
+        "required_victories": _expect(data.get("required_victories"), int, where, "required_victories"),
+    }
+
+
+COMPILERS: Dict[str, Callable[[Dict, str], Dict]] = {
+    "forest": _compile_forest,
+    "prelims": _compile_prelims,
+    "finals": _compile_finals,
+}
+
+
+# --- loading ------------------------------------------------------------
+
+
+def compile_content(name: str, source: bytes) -> Dict:
+    """Validate and compile one content file from its JSON bytes."""
+
+    try:
+        data = json.loads(source)
+    except ValueError as error:
+        raise ContentError(f"{name}.json: {error}") from None
+    return COMPILERS[name](_expect(data, dict, f"{name}.json", "content"), f"{name}.json")
+
+
+def _write_cache(name: str, path: Path, compiled: Dict) -> None:
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        for stale in CACHE_DIR.glob(f"{name}.*.bin"):
+            stale.unlink()
+        # Session replays run in worker threads, so the pid alone is not unique.
+        staging = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        staging.write_bytes(marshal.dumps(compiled))
+        os.replace(staging, path)
+    except OSError:
+        # A read-only install still works; it just compiles every run.
+        pass
+
+
+@lru_cache(maxsize=None)
+def _compiled(name: str) -> Dict:
+    if name not in COMPILERS:
+        raise ContentError(f"unknown content file {name!r}")
+    source = (CONTENT_DIR / f"{name}.json").read_bytes()
+    digest = hashlib.sha256(source).hexdigest()[:16]
+    cache = CACHE_DIR / f"{name}.{digest}.v{CACHE_FORMAT}.bin"
+    try:
+        return marshal.loads(cache.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    compiled = compile_content(name, source)
+    _write_cache(name, cache, compiled)
+    return compiled
+
+
+def load_content(name: str) -> Dict:
+    """Compiled content for ``name``, from the hash-keyed cache when possible.
+
+    DCs overridden with :func:`overriding` are applied on top of the file.
+    """
+
+    overrides = dc_overrides.get()
+    if overrides:
+        prefix = f"{name}."
+        return _overridden(name, tuple(item for item in overrides if item[0].startswith(prefix)))
+    return _compiled(name)
+
+
+# --- difficulty classes -------------------------------------------------
+
+# Every DC in the content files has a stable id: ``forest.<encounter>.<as>``
+# for encounter checks (unnamed checks use their step path instead),
+# ``prelims.solo`` and ``prelims.match.<n>`` (1-based) for the prelims, and
+# ``finals.<check>`` and ``finals.duel`` for the finals.
+Replace = Callable[[str, int], int]
+
+# Overrides for the current context as sorted ``(id, dc)`` pairs; a
+# ContextVar like ``metrics.current`` so concurrent sessions stay separate.
+dc_overrides: ContextVar[Tuple[Tuple[str, int], ...]] = ContextVar("dc_overrides", default=())
+
+
+def _map_steps(steps: Steps, root: str, path: str, replace: Replace) -> Steps:
+    mapped = []
+    for index, step in enumerate(steps):
+        op = step[0]
+        at = f"{path}.{index}"
+        if op == "check":
+            _, ability, dc, name, reroll, proficient, text, success, failure = step
+            dc = replace(f"{root}.{name}" if name else at, dc)
+            success = _map_steps(success, root, f"{at}.success", replace)
+            failure = _map_steps(failure, root, f"{at}.failure", replace)
+            step = ("check", ability, dc, name, reroll, proficient, text, success, failure)
+        elif op == "at_least":
+            _, name, threshold, then, otherwise = step
+            then = _map_steps(then, root, f"{at}.then", replace)
+            otherwise = _map_steps(otherwise, root, f"{at}.else", replace)
+            step = ("at_least", name, threshold, then, otherwise)
+        mapped.append(step)
+    return tuple(mapped)
+
+
+def _map_duel(duel: Tuple, at: str, replace: Replace) -> Tuple:
+    opponent, dc, damage, flavor = duel
+    return opponent, replace(at, dc), damage, flavor
+
+
+def _map_dcs(name: str, compiled: Dict, replace: Replace) -> Dict:
+    """A copy of ``compiled`` with every DC passed through ``replace(id, dc)``."""
+
+    mapped = dict(compiled)
+    if name == "forest":
+        mapped["encounters"] = {
+            key: _map_steps(steps, f"forest.{key}", f"forest.{key}", replace)
+            for key, steps in compiled["encounters"].items()
+        }
+    elif name == "prelims":
+        mapped["solo"] = _map_duel(compiled["solo"], "prelims.solo", replace)
+        mapped["matches"] = tuple(
+            (title, replace(f"prelims.match.{index}", dc), flavor)
+            for index, (title, dc, flavor) in enumerate(compiled["matches"], 1)
+        )
+    elif name == "finals":
+        mapped["checks"] = {check: replace(f"finals.{check}", dc) for check, dc in compiled["checks"].items()}
+        mapped["duel"] = _map_duel(compiled["duel"], "finals.duel", replace)
+    return mapped
+
+
+@lru_cache(maxsize=256)
+def _overridden(name: str, overrides: Tuple[Tuple[str, int], ...]) -> Dict:
+    if not overrides:
+        return _compiled(name)
+    table = dict(overrides)
+    return _map_dcs(name, _compiled(name), lambda at, dc: table.get(at, dc))
+
+
+def difficulty_classes(name: str | None = None) -> Dict[str, int]:
+    """Current DC by id for one content file, or for all of them."""
+
+    dcs: Dict[str, int] = {}
+
+    def record(at: str, dc: int) -> int:
+        dcs[at] = dc
+        return dc
+
+    for each in [name] if name else COMPILERS:
+        _map_dcs(each, load_content(each), record)
+    return dcs
+
+
+@contextmanager
+def overriding(dcs: Mapping[str, int]) -> Iterator[Dict[str, int]]:
+    """Play the block with the given DC ids replaced; unknown ids are an error."""
+
+    unknown = sorted(set(dcs) - set(difficulty_classes()))
+    if unknown:
+        raise ContentError(f"unknown DC ids: {', '.join(unknown)}")
+    token = dc_overrides.set(tuple(sorted({**dict(dc_overrides.get()), **dcs}.items())))
+    try:
+        yield dict(dcs)
+    finally:
+        dc_overrides.reset(token)
+
+
+PatrolDraw = Tuple[int, str]
+
+
+def encounter_state(character: Character) -> Tuple[int, int, int, bool, int]:
+    """The :data:`STATE_FIELDS` view of ``character`` that conditions read."""
+
+    scrolls = sum("卷轴" in scroll for scroll in character.scrolls)
+    return character.hp, character.chakra, character.fatigue, character.hero_inspiration, scrolls
+
+
+def _predicate(conditions: Tuple) -> Callable[[Tuple], bool]:
+    def holds(state: Tuple) -> bool:
+        for index, low, high in conditions:
+            value = state[index]
+            if (low is not None and value < low) or (high is not None and value > high):
+                return False
+        return True
+
+    return holds
+
+
+def _table(rows: Tuple) -> WeightedTable[PatrolDraw]:
+    entries = []
+    for face, (numerator, denominator), (kind, target), conditions in rows:
+        value = _table(target) if kind == "table" else (face, target)
+        when = _predicate(conditions) if conditions else None
+        entries.append(TableEntry(value, Fraction(numerator, denominator), when))
+    return WeightedTable(entries)
+
+
+@lru_cache(maxsize=None)
+def patrol_table() -> WeightedTable[PatrolDraw]:
+    """Forest patrol as a table of ``(die face or 0, encounter id)`` draws."""
+
+    return _table(load_content("forest")["patrol"]["rows"])
+
+
+# --- playing ------------------------------------------------------------
+
+
+# Steps resolved for playing: ``(handler, args)`` pairs, where ``handler`` is
+# one of the ``_do_*`` functions below and ``args`` its part of the step, so
+# playing never compares op names or re-parses texts.
+Program = Tuple[Tuple[Callable, Tuple], ...]
+
+
+def _do_note(text, character, rng, prompt_fn, out, notes, results):
+    notes.append(text)
+
+
+def _do_format(text, character, rng, prompt_fn, out, notes, results):
+    notes.append(text.format_map(results))
+
+
+def _do_check(args, character, rng, prompt_fn, out, notes, results):
+    ability, dc, name, reroll, proficient, note, success, failure = args
+    modifier = character.modifier(ability)
+    bonus = character.proficiency if proficient else 0
+    if reroll:
+        check = with_inspiration(
+            character, lambda: ability_check(modifier, dc, rng, bonus), prompt_fn, out=out, dc=dc
+        )
+    else:
+        check = ability_check(modifier, dc, rng, bonus)
+    if name:
+        results[name] = check
+    if note is not None:
+        note[0](note[1], character, rng, prompt_fn, out, notes, results)
+    for handler, step in success if check.total >= dc else failure:
+        handler(step, character, rng, prompt_fn, out, notes, results)
+
+
+def _do_at_least(args, character, rng, prompt_fn, out, notes, results):
+    name, threshold, then, otherwise = args
+    for handler, step in then if results[name].total >= threshold else otherwise:
+        handler(step, character, rng, prompt_fn, out, notes, results)
+
+
+def _do_roll(args, character, rng, prompt_fn, out, notes, results):
+    dice, name, sign = args
+    roll = damage_roll(dice, rng)
+    if name:
+        results[name] = roll
+    character.adjust_hp(sign * roll.total)
+
+
+def _do_hp(amount, character, rng, prompt_fn, out, notes, results):
+    character.adjust_hp(amount)
+
+
+def _do_chakra(amount, character, rng, prompt_fn, out, notes, results):
+    character.gain_chakra(amount)
+
+
+def _do_fatigue(amount, character, rng, prompt_fn, out, notes, results):
+    character.gain_fatigue(amount)
+
+
+def _do_inspiration(grant, character, rng, prompt_fn, out, notes, results):
+    if grant:
+        character.grant_inspiration()
+    else:
+        character.spend_inspiration()
+
+
+def _do_scroll(scroll, character, rng, prompt_fn, out, notes, results):
+    character.acquire_scroll(scroll)
+
+
+_EFFECTS = {
+    "hp": _do_hp,
+    "chakra": _do_chakra,
+    "fatigue": _do_fatigue,
+    "inspiration": _do_inspiration,
+    "scroll": _do_scroll,
+}
+
+
+def _note(text: str) -> Tuple[Callable, str]:
+    if any(field is not None for _, field, _, _ in Formatter().parse(text)):
+        return _do_format, text
+    return _do_note, text.format_map({})
+
+
+def resolve(steps: Steps) -> Program:
+    """Turn compiled ``steps`` into a :data:`Program` for :func:`play`."""
+
+    program = []
+    for step in steps:
+        op = step[0]
+        if op == "say":
+            program.append(_note(step[1]))
+        elif op == "check":
+            _, ability, dc, name, reroll, proficient, text, success, failure = step
+            note = _note(text) if text else None
+            args = (ability, dc, name, reroll, proficient, note, resolve(success), resolve(failure))
+            program.append((_do_check, args))
+        elif op == "at_least":
+            _, name, threshold, then, otherwise = step
+            program.append((_do_at_least, (name, threshold, resolve(then), resolve(otherwise))))
+        elif op == "roll":
+            program.append((_do_roll, step[1:]))
+        else:
+            program.append((_EFFECTS[op], step[1]))
+    return tuple(program)
+
+
+@lru_cache(maxsize=256)
+def _programs(overrides: Tuple[Tuple[str, int], ...]) -> Dict[str, Program]:
+    return {key: resolve(steps) for key, steps in _overridden("forest", overrides)["encounters"].items()}
+
+
+def encounter_programs() -> Dict[str, Program]:
+    """Every forest encounter as a :data:`Program`, resolved once per set of DC overrides."""
+
+    overrides = dc_overrides.get()
+    if overrides:
+        overrides = tuple(item for item in overrides if item[0].startswith("forest."))
+    return _programs(overrides)
+
+
+def play(
+    program: Program,
+    character: Character,
+    rng: random.Random,
+    prompt_fn: Prompt,
+    out: OutputSink = STDOUT,
+) -> List[str]:
+    """Play a resolved encounter; returns the narration notes in order."""
+
+    notes: List[str] = []
+    results: Dict[str, RollResult] = {}
+    for handler, args in program:
+        handler(args, character, rng, prompt_fn, out, notes, results)
+    return notes
+
+
+def run_encounter(
+    steps: Steps,
+    character: Character,
+    rng: random.Random,
+    prompt_fn: Prompt,
+    out: OutputSink = STDOUT,
+) -> List[str]:
+    """Play compiled ``steps``; returns the narration notes in order."""
+
+    return play(resolve(steps), character, rng, prompt_fn, out)
@@ -0,0 +1,191 @@
+"""Typed character state changes, applied by one reducer.
+
+Every change to a sheet's hp, chakra, fatigue, heroic inspiration or scrolls
+is an event. The :class:`~game.character.CharacterRules` methods work out
+what actually changes (clamping at zero, the rest rules) and :func:`dispatch`
+applies it with :func:`reduce`. The event is then handed to every subscriber
+made current with :func:`subscribed`. Events carry the exact change, so a
+sheet is its starting state folded over its events. Subscribers such as
+:class:`Totals` can keep running aggregates without comparing snapshots.
+
+Subscribers live in a :class:`contextvars.ContextVar` like
+:mod:`game.metrics`, so with none the overhead is one ``ContextVar.get``.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, fields
+from typing import TYPE_CHECKING, Callable, ClassVar, Dict, Iterator, Tuple, Union
+
+if TYPE_CHECKING:
+    from .character import CharacterRules
+
+
+@dataclass(frozen=True)
+class HpChanged:
+    name: ClassVar[str] = "hp_changed"
+    amount: int
+
+
+@dataclass(frozen=True)
+class ChakraSpent:
+    name: ClassVar[str] = "chakra_spent"
+    amount: int
+
+
+@dataclass(frozen=True)
+class ChakraRestored:
+    name: ClassVar[str] = "chakra_restored"
+    amount: int
+
+
+@dataclass(frozen=True)
+class FatigueGained:
+    name: ClassVar[str] = "fatigue_gained"
+    amount: int
+
+
+@dataclass(frozen=True)
+class FatigueRecovered:
+    name: ClassVar[str] = "fatigue_recovered"
+    amount: int
+
+
+@dataclass(frozen=True)
+class InspirationGranted:
+    name: ClassVar[str] = "inspiration_granted"
+
+
+@dataclass(frozen=True)
+class InspirationSpent:
+    name: ClassVar[str] = "inspiration_spent"
+
+
+@dataclass(frozen=True)
+class ScrollAcquired:
+    name: ClassVar[str] = "scroll_acquired"
+    scroll: str
+
+
+Event = Union[
+    HpChanged,
+    ChakraSpent,
+    ChakraRestored,
+    FatigueGained,
+    FatigueRecovered,
+    InspirationGranted,
+    InspirationSpent,
+    ScrollAcquired,
+]
+Subscriber = Callable[["CharacterRules", Event], None]
+
+
+def _hp_changed(sheet: "CharacterRules", event: HpChanged) -> None:
+    sheet.hp += event.amount
+
+
+def _chakra_spent(sheet: "CharacterRules", event: ChakraSpent) -> None:
+    sheet.chakra -= event.amount
+
+
+def _chakra_restored(sheet: "CharacterRules", event: ChakraRestored) -> None:
+    sheet.chakra += event.amount
+
+
+def _fatigue_gained(sheet: "CharacterRules", event: FatigueGained) -> None:
+    sheet.fatigue += event.amount
+
+
+def _fatigue_recovered(sheet: "CharacterRules", event: FatigueRecovered) -> None:
+    sheet.fatigue -= event.amount
+
+
+def _inspiration_granted(sheet: "CharacterRules", event: InspirationGranted) -> None:
+    sheet.hero_inspiration = True
+
+
+def _inspiration_spent(sheet: "CharacterRules", event: InspirationSpent) -> None:
+    sheet.hero_inspiration = False
+
+
+def _scroll_acquired(sheet: "CharacterRules", event: ScrollAcquired) -> None:
+    sheet.scrolls.append(event.scroll)
+
+
+_REDUCERS: Dict[type, Callable[["CharacterRules", Event], None]] = {
+    HpChanged: _hp_changed,
+    ChakraSpent: _chakra_spent,
+    ChakraRestored: _chakra_restored,
+    FatigueGained: _fatigue_gained,
+    FatigueRecovered: _fatigue_recovered,
+    InspirationGranted: _inspiration_granted,
+    InspirationSpent: _inspiration_spent,
+    ScrollAcquired: _scroll_acquired,
+}
+
+
+def reduce(sheet: "CharacterRules", event: Event) -> None:
+    """Apply ``event`` to ``sheet`` without notifying anyone."""
+
+    _REDUCERS[type(event)](sheet, event)
+
+
+def event_fields(event: Event) -> Dict:
+    """An event's payload as a dict, e.g. for a transcript record."""
+
+    return {field.name: getattr(event, field.name) for field in fields(event)}
+
+
+subscribers: ContextVar[Tuple[Subscriber, ...]] = ContextVar("character_subscribers", default=())
+
+
+def dispatch(sheet: "CharacterRules", event: Event) -> None:
+    """Apply ``event`` to ``sheet``, then pass it to the current subscribers."""
+
+    _REDUCERS[type(event)](sheet, event)
+    for subscriber in subscribers.get():
+        subscriber(sheet, event)
+
+
+@contextmanager
+def subscribed(*added: Subscriber) -> Iterator[None]:
+    """Add ``added`` to the current subscribers for the block."""
+
+    token = subscribers.set(subscribers.get() + added)
+    try:
+        yield
+    finally:
+        subscribers.reset(token)
+
+
+@dataclass
+class Totals:
+    """Running sums of every change a subscriber has seen; cheap to merge."""
+
+    damage: int = 0
+    healing: int = 0
+    chakra_spent: int = 0
+    chakra_restored: int = 0
+    fatigue_gained: int = 0
+    fatigue_recovered: int = 0
+    inspiration_granted: int = 0
+    inspiration_spent: int = 0
+    scrolls_acquired: int = 0
+
+    def __call__(self, sheet: "CharacterRules", event: Event) -> None:
+        kind = type(event)
+        if kind is HpChanged:
+            if event.amount < 0:
+                self.damage -= event.amount
+            else:
+                self.healing += event.amount
+        elif kind is ScrollAcquired:
+            self.scrolls_acquired += 1
+        elif kind is InspirationGranted or kind is InspirationSpent:
+            setattr(self, event.name, getattr(self, event.name) + 1)
+        else:
+            setattr(self, event.name, getattr(self, event.name) + event.amount)
+
+    def merge(self, other: "Totals") -> None:
+        for field in fields(self):
+            setattr(self, field.name, getattr(self, field.name) + getattr(other, field.name))
@@ -4,7 +4,10 @@ from typing import Callable
 
 from .dice import RollResult, ask_use_inspiration
 from .character import Character
+from .metrics import current
+from .output import OutputSink, STDOUT
 from .prompt import Prompt
+from .transcript import active_transcript
 
 
 def with_inspiration(
@@ -12,16 +15,27 @@ def with_inspiration(
     roll_fn: Callable[[], RollResult],
     prompt_fn: Prompt,
     force: bool | None = None,
+    out: OutputSink = STDOUT,
+    dc: int | None = None,
 ) -> RollResult:
-    """Roll with an optional heroic inspiration reroll."""
+    """Roll with an optional heroic inspiration reroll.
+
+    With ``dc`` the reroll is only offered when the first roll missed it;
+    without one every roll is treated as a possible failure.
+    """
 
     first = roll_fn()
-    if first.total >= 0:
-        want_reroll = ask_use_inspiration(character.hero_inspiration, prompt_fn) if force is None else force
-        if not want_reroll:
-            return first
-    if not character.hero_inspiration:
+    if dc is not None and first.total >= dc:
+        return first
+    want_reroll = ask_use_inspiration(character.hero_inspiration, prompt_fn) if force is None else force
+    if not want_reroll or not character.hero_inspiration:
         return first
-    character.hero_inspiration = False
-    print("你消耗了英雄灵感，准备重掷……")
+    character.spend_inspiration()
+    metrics = current.get()
+    if metrics is not None:
+        metrics.rerolls += 1
+    transcript = active_transcript.get()
+    if transcript is not None:
+        transcript.record("reroll", first=first.total)
+    out.emit("你消耗了英雄灵感，准备重掷……")
     return roll_fn()
@@ -0,0 +1,197 @@
+"""Headless driver for the legacy ``naruto_chunin_exam`` DM.
+
+The legacy :class:`~naruto_chunin_exam.naruto_game.DM` accepts a seeded
+``rng``, a ``choose(question, options)`` policy and an ``emit`` function.
+:func:`run_legacy` wires those to a named policy and an
+:class:`~game.output.OutputSink` and returns one :class:`LegacyPlayer` per
+party member; :func:`simulate_legacy` plays many seeds across a process pool
+like :func:`game.simulate.simulate`.
+"""
+
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from naruto_chunin_exam import naruto_game
+
+from .output import NULL, OutputSink
+
+
+ChoicePolicy = Callable[[str, List[str]], str]
+
+# Each policy maps a question keyword to the prefix of the option to pick;
+# the first keyword found in the question wins, otherwise the first option.
+LEGACY_POLICIES: Dict[str, Dict[str, str]] = {
+    "first": {},
+    "bold": {
+        "作弊": "是",
+        "重掷": "是",
+        "做出选择": "坚持",
+        "天与地卷轴": "立即",
+        "行动选择": "探索",
+        "做什么": "交换",
+        "应对": "战斗",
+        "决定": "勇敢",
+        "如何选择": "报警",
+    },
+    "careful": {
+        "作弊": "否",
+        "重掷": "是",
+        "做出选择": "坚持",
+        "天与地卷轴": "立即",
+        "行动选择": "追踪",
+        "做什么": "交换",
+        "应对": "谈判",
+        "决定": "拼命",
+        "如何选择": "忽略",
+    },
+}
+
+
+def keyword_choice(answers: Dict[str, str]) -> ChoicePolicy:
+    def choose(question: str, options: List[str]) -> str:
+        for keyword, prefix in answers.items():
+            if keyword in question:
+                return next((option for option in options if option.startswith(prefix)), options[0])
+        return options[0]
+
+    return choose
+
+
+@dataclass(frozen=True)
+class LegacyPlayer:
+    name: str
+    winner: bool
+    scrolls: Tuple[str, ...]
+    fatigue: int
+    hit_points: int
+    inspiration: int
+
+    @classmethod
+    def from_character(cls, character: "naruto_game.Character") -> "LegacyPlayer":
+        return cls(
+            name=character.name,
+            # ``conclude`` only congratulates winners who are still standing.
+            winner=character.winner and character.hit_points > 0,
+            scrolls=tuple(sorted(character.scrolls)),
+            fatigue=character.fatigue,
+            hit_points=character.hit_points,
+            inspiration=character.inspiration,
+        )
+
+
+@dataclass(frozen=True)
+class LegacyResult:
+    seed: int | None
+    players: Tuple[LegacyPlayer, ...]
+
+    @property
+    def winners(self) -> Tuple[str, ...]:
+        return tuple(player.name for player in self.players if player.winner)
+
+    def report(self) -> str:
+        lines = [f"旧版 DM 对局（种子 {self.seed}）"]
+        for player in self.players:
+            verdict = "晋升" if player.winner else "落选"
+            scrolls = "".join(player.scrolls) or "无"
+            lines.append(
+                f"  {player.name:<6} {verdict}  卷轴 {scrolls}  生命 {player.hit_points}  "
+                f"疲劳 {player.fatigue}  灵感 {player.inspiration}"
+            )
+        return "\n".join(lines)
+
+
+def run_legacy(
+    names: Sequence[str] = (),
+    seed: int | None = None,
+    policy: str | ChoicePolicy = "bold",
+    out: OutputSink = NULL,
+) -> LegacyResult:
+    """Play the full legacy campaign without a terminal; missing seats become NPCs."""
+
+    choose = keyword_choice(LEGACY_POLICIES[policy]) if isinstance(policy, str) else policy
+    players = [naruto_game.Character(name=name) for name in names[:3]]
+    dm = naruto_game.DM(players, random.Random(seed), choose=choose, emit=out.emit)
+    dm.run()
+    out.flush()
+    return LegacyResult(seed, tuple(LegacyPlayer.from_character(character) for character in dm.players))
+
+
+@dataclass
+class LegacySummary:
+    """Per-seat outcome counts over many legacy campaigns; mergeable across workers."""
+
+    runs: int = 0
+    wins: List[int] = field(default_factory=lambda: [0, 0, 0])
+    any_winner: int = 0
+    scrolls_total: int = 0
+    fatigue_total: int = 0
+    hp_total: int = 0
+    elapsed: float = 0.0
+
+    def merge(self, other: "LegacySummary") -> None:
+        self.runs += other.runs
+        self.wins = [mine + theirs for mine, theirs in zip(self.wins, other.wins)]
+        self.any_winner += other.any_winner
+        self.scrolls_total += other.scrolls_total
+        self.fatigue_total += other.fatigue_total
+        self.hp_total += other.hp_total
+
+    def mean(self, total: int) -> float:
+        # Totals are summed over all three seats.
+        return total / (self.runs * 3) if self.runs else 0.0
+
+    def report(self) -> str:
+        rate = self.runs / self.elapsed if self.elapsed else 0.0
+        lines = [f"旧版 DM 模拟 {self.runs} 局，耗时 {self.elapsed:.2f}s，约 {rate:.0f} 局/秒"]
+        for seat, wins in enumerate(self.wins, 1):
+            lines.append(f"  第 {seat} 位晋升率 {wins / self.runs if self.runs else 0.0:6.2%}")
+        lines.append(f"  至少一人晋升 {self.any_winner / self.runs if self.runs else 0.0:6.2%}")
+        lines.append(
+            f"  每人平均卷轴 {self.mean(self.scrolls_total):.2f}，疲劳 {self.mean(self.fatigue_total):.2f}，"
+            f"生命 {self.mean(self.hp_total):.2f}"
+        )
+        return "\n".join(lines)
+
+
+def simulate_legacy_chunk(names: Tuple[str, ...], policy: str, seeds: Sequence[int]) -> LegacySummary:
+    summary = LegacySummary()
+    for seed in seeds:
+        result = run_legacy(names, seed, policy)
+        summary.runs += 1
+        for seat, player in enumerate(result.players):
+            summary.wins[seat] += int(player.winner)
+            summary.scrolls_total += len(player.scrolls)
+            summary.fatigue_total += player.fatigue
+            summary.hp_total += player.hit_points
+        summary.any_winner += int(bool(result.winners))
+    return summary
+
+
+def simulate_legacy(
+    runs: int,
+    names: Sequence[str] = (),
+    policy: str = "bold",
+    workers: int | None = None,
+    seed: int = 0,
+) -> LegacySummary:
+    """Play ``runs`` legacy campaigns with seeds ``seed .. seed + runs - 1``."""
+
+    names = tuple(names)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    if workers == 1:
+        summary = simulate_legacy_chunk(names, policy, range(seed, seed + runs))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunk = max(1, runs // (workers * 4))
+        chunks = [range(start, min(start + chunk, seed + runs)) for start in range(seed, seed + runs, chunk)]
+        summary = LegacySummary()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for partial in pool.map(simulate_legacy_chunk, [names] * len(chunks), [policy] * len(chunks), chunks):
+                summary.merge(partial)
+    summary.elapsed = time.perf_counter() - started
+    return summary
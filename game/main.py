@@ -1,8 +1,49 @@
-"""Command-line entrypoint for the text adventure."""
+"""Command-line entrypoint for the text adventure.
+
+Only what argument parsing needs is imported up front; each subcommand
+imports its own modules, and the phase modules load when their stage runs,
+so ``--help`` and short-lived jobs stay cheap to start.
+"""
 
 import argparse
+from typing import Tuple
+
+from .checkpoint import load
+from .dm import PHASES
+from .metrics import Metrics, collecting
+from .simulate import POLICIES, SOLVER_POLICY
+
+
+def write_metrics(metrics: Metrics, path: str) -> None:
+    text = metrics.to_prometheus() if path.endswith(".prom") else metrics.to_json()
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(text)
+
+
+def read_phases(parser: argparse.ArgumentParser, text: str) -> Tuple[str, ...]:
+    """The comma-separated phase names in ``text``; an unknown one is a usage error."""
 
-from .dm import run_game
+    phases = tuple(phase.strip() for phase in text.split(",") if phase.strip())
+    unknown = [phase for phase in phases if phase not in PHASES]
+    if unknown:
+        parser.error(f"--phases 含有未知阶段：{', '.join(unknown)}（可选：{', '.join(PHASES)}）")
+    return phases
+
+
+def read_strategy(parser: argparse.ArgumentParser, path: str | None) -> str | None:
+    """The rules in ``path``, checked up front so a bad rule is a usage error."""
+
+    if path is None:
+        return None
+    from .strategy import compile_strategy
+
+    with open(path, encoding="utf-8") as handle:
+        text = handle.read()
+    try:
+        compile_strategy(text)
+    except ValueError as error:
+        parser.error(f"{path}: {error}")
+    return text
 
 
 def main() -> None:
@@ -13,9 +54,295 @@ def main() -> None:
         action="store_true",
         help="使用默认角色与脚本选择自动演示一遍流程（非交互）",
     )
+    parser.add_argument("--resume", metavar="PATH", default=None, help="从存档文件继续一局游戏")
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        default=None,
+        help="记录阶段耗时、掷骰/提问计数与等待输入时间；.prom 后缀输出 Prometheus 文本，否则为 JSON",
+    )
+    parser.add_argument("--record", metavar="PATH", default=None, help="把每次掷骰与回答写入二进制事件日志")
+    commands = parser.add_subparsers(dest="command")
+    sim = commands.add_parser("simulate", help="无叙述地批量模拟完整战役，统计各阶段通过率")
+    sim.add_argument("--runs", type=int, default=10000, help="模拟局数")
+    sim.add_argument("--workers", type=int, default=None, help="进程数（默认使用全部 CPU 核心）")
+    sim.add_argument("--seed", dest="sim_seed", type=int, default=0, help="首局随机种子，后续依次递增")
+    sim.add_argument(
+        "--policy",
+        choices=sorted([*POLICIES, SOLVER_POLICY]),
+        default="demo",
+        help=f"自动回答问题的策略；{SOLVER_POLICY} 按求解出的最优应答表作答",
+    )
+    sim.add_argument("--archetype", choices=["t", "n", "g"], default="t", help="职业：体术(t)/忍术(n)/幻术医疗(g)")
+    sim.add_argument("--background", choices=["k", "s", "o"], default="k", help="背景：木叶(k)/砂隐(s)/音忍(o)")
+    sim.add_argument("--script", default="", help="逗号分隔的前置回答，用完后交给策略")
+    sim.add_argument("--phases", default="", help="逗号分隔，只模拟这些阶段（如 forest），角色以新建状态进入")
+    sim.add_argument("--checkpoint", metavar="PATH", default=None, help="从存档分叉模拟（每局重新设定随机种子）")
+    sim.add_argument("--dcs", metavar="PATH", default=None, help="套用 balance 写出的 DC 表再模拟")
+    sim.add_argument(
+        "--transcript",
+        metavar="PATH",
+        default=None,
+        help="逐条写出检定、伤害、资源变化与阶段结果（JSON Lines，.gz 后缀压缩；多进程时每块一个文件）",
+    )
+    sim.add_argument(
+        "--stats",
+        metavar="PATH",
+        nargs="?",
+        const="",
+        default=None,
+        help="统计各阶段入场生命/查克拉/疲劳与预赛胜场的分布及结束位置漏斗；给出路径时另写为 JSON",
+    )
+    sim.add_argument("--strategy", metavar="PATH", default=None, help="策略规则文件，命中的规则先于 --policy 作答")
+    sim.add_argument("--transcript-max-mb", type=float, default=None, help="单个事件文件超过该大小（MB）后轮转")
+    tune = commands.add_parser("balance", help="按目标通过率用模拟搜索各阶段 DC，输出带置信区间的建议表")
+    tune.add_argument(
+        "--target",
+        action="append",
+        required=True,
+        help="目标通过率，如 forest=0.6 或 prelims:n=0.5（可重复，后者覆盖前者）",
+    )
+    tune.add_argument("--archetypes", default="tng", help="未指明职业的目标适用的职业，如 tn")
+    tune.add_argument("--policy", choices=sorted(POLICIES), default="demo", help="自动回答问题的策略")
+    tune.add_argument("--background", choices=["k", "s", "o"], default="k", help="背景：木叶(k)/砂隐(s)/音忍(o)")
+    tune.add_argument("--tune", default="", help="逗号分隔的 DC 编号前缀，只调整这些 DC（如 prelims.match）")
+    tune.add_argument("--min-runs", type=int, default=256, help="每组 DC 每个职业的起始模拟局数")
+    tune.add_argument("--max-runs", type=int, default=4096, help="自适应加倍的模拟局数上限")
+    tune.add_argument("--workers", type=int, default=None, help="进程数（默认使用全部 CPU 核心）")
+    tune.add_argument("--seed", dest="sim_seed", type=int, default=0, help="公共随机数的首个种子")
+    tune.add_argument("--out", metavar="PATH", default=None, help="把建议 DC 表与置信区间写为 JSON")
+    odds = commands.add_parser("odds", help="不抽样，精确计算各阶段通过概率")
+    odds.add_argument(
+        "--policy",
+        choices=sorted([*POLICIES, SOLVER_POLICY]),
+        default="demo",
+        help=f"自动回答问题的策略；{SOLVER_POLICY} 求解使晋升概率最大的应答表",
+    )
+    odds.add_argument("--archetype", choices=["t", "n", "g"], default="t", help="职业：体术(t)/忍术(n)/幻术医疗(g)")
+    odds.add_argument("--background", choices=["k", "s", "o"], default="k", help="背景：木叶(k)/砂隐(s)/音忍(o)")
+    odds.add_argument("--strategy", metavar="PATH", default=None, help="策略规则文件，命中的规则先于 --policy 作答")
+    scripts = commands.add_parser("scripts", help="精确枚举按顺序作答的脚本，按晋升概率排序")
+    scripts.add_argument("--archetype", choices=["t", "n", "g"], default="t", help="职业：体术(t)/忍术(n)/幻术医疗(g)")
+    scripts.add_argument("--background", choices=["k", "s", "o"], default="k", help="背景：木叶(k)/砂隐(s)/音忍(o)")
+    scripts.add_argument("--depth", type=int, default=8, help="脚本最多包含的回答数")
+    scripts.add_argument("--top", type=int, default=10, help="输出排名前几的脚本")
+    scripts.add_argument("--policy", choices=sorted(POLICIES), default="demo", help="脚本用完之后回答问题的策略")
+    save_cmd = commands.add_parser("checkpoint", help="按脚本静默推进到指定阶段并写出二进制存档")
+    save_cmd.add_argument("path", help="存档输出路径")
+    save_cmd.add_argument("--phase", choices=PHASES, default="forest", help="在该阶段开始处暂停")
+    save_cmd.add_argument("--day", type=int, default=0, help="死亡森林中在第几天开始处暂停（0 表示阶段开始）")
+    save_cmd.add_argument("--script", default="新晋忍者,t,k", help="逗号分隔的回答，缺省回答视为直接回车")
+    replay_cmd = commands.add_parser("replay", help="无叙述地重放事件日志，逐个核对掷骰并报告首个分歧点")
+    replay_cmd.add_argument("path", help="事件日志路径")
+    legacy = commands.add_parser("legacy", help="运行旧版 naruto_game 的 DM，并可录制事件日志")
+    legacy.add_argument("--players", default="玩家1", help="逗号分隔的玩家名（1–3 人，不足时补 NPC）")
+    legacy.add_argument("--policy", choices=["first", "bold", "careful"], default=None, help="按策略自动选择，无需键盘输入")
+    legacy.add_argument("--runs", type=int, default=1, help="配合 --policy 无叙述地批量模拟的局数")
+    legacy.add_argument("--workers", type=int, default=None, help="批量模拟的进程数（默认使用全部 CPU 核心）")
+    bench = commands.add_parser("bench", help="基准测试掷骰、战斗、各阶段与完整战役，并与基线对比")
+    bench.add_argument("--filter", default="", help="只运行名称包含该子串的用例")
+    bench.add_argument("--baseline", default=None, help="基线 JSON 路径（默认 benchmarks/baseline.json）")
+    bench.add_argument("--threshold", type=float, default=None, help="比基线慢超过该比例即视为回退（默认 0.25）")
+    bench.add_argument("--min-time", type=float, default=0.2, help="每个用例单轮计时的最短秒数")
+    bench.add_argument("--repeat", type=int, default=3, help="每个用例计时轮数，取最快一轮")
+    bench.add_argument("--save-baseline", action="store_true", help="把本次结果写为新基线")
+    bench.add_argument("--import-budget", type=float, default=None, help="启动导入耗时预算（毫秒，默认 90）")
+    serve = commands.add_parser("serve", help="以 asyncio 同时托管大量交互式对局")
+    serve.add_argument("--host", default="127.0.0.1", help="监听地址")
+    serve.add_argument("--port", type=int, default=8765, help="监听端口，每个 TCP 连接一局")
+    serve.add_argument("--stdio", action="store_true", help="改为通过标准输入输出进行单局游戏")
+    serve.add_argument("--timeout", type=float, default=300.0, help="每次回答的超时秒数")
+    serve.add_argument("--max-sessions", type=int, default=None, help="同时进行的对局上限")
     args = parser.parse_args()
 
+    if args.command == "simulate":
+        from .balance import read_dcs
+        from .checkpoint import dumps
+        from .simulate import SimulationConfig, simulate
+
+        config = SimulationConfig(
+            policy=args.policy,
+            archetype=args.archetype,
+            background=args.background,
+            script=tuple(answer for answer in args.script.split(",") if answer),
+            checkpoint=dumps(load(args.checkpoint)) if args.checkpoint else None,
+            phases=read_phases(parser, args.phases),
+            metrics=bool(args.metrics),
+            dcs=tuple(sorted(read_dcs(args.dcs).items())) if args.dcs else (),
+            transcript=args.transcript,
+            transcript_max_bytes=int(args.transcript_max_mb * 1024 * 1024) if args.transcript_max_mb else None,
+            stats=args.stats is not None,
+            strategy=read_strategy(parser, args.strategy),
+        )
+        summary = simulate(args.runs, workers=args.workers, config=config, seed=args.sim_seed)
+        print(summary.report())
+        if args.metrics:
+            write_metrics(summary.metrics, args.metrics)
+        if args.stats:
+            with open(args.stats, "w", encoding="utf-8") as handle:
+                handle.write(summary.stats.to_json())
+        return
+
+    if args.command == "balance":
+        from .balance import balance, parse_targets
+
+        try:
+            targets = parse_targets(args.target, tuple(args.archetypes))
+        except ValueError as error:
+            parser.error(str(error))
+        result = balance(
+            targets,
+            policy=args.policy,
+            background=args.background,
+            tune=[prefix for prefix in args.tune.split(",") if prefix],
+            min_runs=args.min_runs,
+            max_runs=args.max_runs,
+            workers=args.workers,
+            seed=args.sim_seed,
+        )
+        print(result.report())
+        if args.out:
+            result.save(args.out)
+            print(f"已写入建议 DC 表：{args.out}")
+        return
+
+    if args.command == "odds":
+        import time
+
+        from .analytic import campaign_odds, keyword_policy
+        from .dm import create_character
+        from .prompt import build_prompt
+
+        strategy = read_strategy(parser, args.strategy)
+        if strategy is not None and args.policy == SOLVER_POLICY:
+            parser.error(f"--strategy 不能与 --policy {SOLVER_POLICY} 同时使用")
+        character = create_character(build_prompt(["精算忍者", args.archetype, args.background]))
+        started = time.perf_counter()
+        if args.policy == SOLVER_POLICY:
+            from .solver import solve
+
+            result = solve(character)
+        else:
+            policy = keyword_policy(POLICIES[args.policy])
+            if strategy is not None:
+                from .strategy import compile_strategy
+
+                policy = compile_strategy(strategy).policy(policy)
+            result = campaign_odds(character, policy)
+        print(f"精确计算耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
+        print(result.report())
+        return
+
+    if args.command == "scripts":
+        from .dm import create_character
+        from .prompt import build_prompt
+        from .scripts import rank_scripts
+
+        character = create_character(build_prompt(["脚本忍者", args.archetype, args.background]))
+        try:
+            ranking = rank_scripts(character, depth=args.depth, top=args.top, policy=args.policy)
+        except ValueError as error:
+            parser.error(str(error))
+        print(ranking.report())
+        return
+
+    if args.command == "checkpoint":
+        from .checkpoint import save
+        from .dm import checkpoint_game
+
+        script = [answer for answer in args.script.split(",") if answer]
+        snapshot = checkpoint_game(args.seed, script, phase=args.phase, day=args.day)
+        save(snapshot, args.path)
+        print(f"已保存存档：{args.path}（阶段 {PHASES[snapshot.phase]}，第 {snapshot.step} 天）")
+        return
+
+    if args.command == "replay":
+        from .replay import replay
+
+        with open(args.path, "rb") as handle:
+            report = replay(handle.read())
+        print(report.report())
+        if not report.ok:
+            raise SystemExit(1)
+        return
+
+    if args.command == "legacy":
+        from .legacy import LEGACY_POLICIES, keyword_choice, run_legacy, simulate_legacy
+        from .output import STDOUT
+        from .replay import record_legacy
+
+        names = [name for name in args.players.split(",") if name][:3]
+        if args.policy and args.runs > 1:
+            print(simulate_legacy(args.runs, names, args.policy, args.workers, args.seed or 0).report())
+            return
+        if args.policy and not args.record:
+            print(run_legacy(names, args.seed, args.policy, STDOUT).report())
+            return
+        choose = keyword_choice(LEGACY_POLICIES[args.policy]) if args.policy else None
+        _, log = record_legacy(names, seed=args.seed, choose=choose)
+        if args.record:
+            with open(args.record, "wb") as handle:
+                handle.write(log.dumps())
+        return
+
+    if args.command == "bench":
+        from pathlib import Path
+
+        from . import bench as suite
+
+        threshold = suite.DEFAULT_THRESHOLD if args.threshold is None else args.threshold
+        budget = suite.IMPORT_BUDGET_MS if args.import_budget is None else args.import_budget
+        failed = False
+        if args.filter in f"import.{suite.STARTUP_MODULE}":
+            cost = suite.import_cost()
+            print(suite.format_import_report(cost, budget))
+            failed = bool(suite.import_problems(cost, budget))
+        results = suite.run_benchmarks(args.filter, args.min_time, args.repeat)
+        baseline_path = Path(args.baseline or suite.BASELINE_PATH)
+        if args.save_baseline:
+            suite.save_baseline(results, baseline_path)
+            print(f"已写入基线：{baseline_path}")
+        baseline = suite.load_baseline(baseline_path) if baseline_path.exists() else {}
+        if results:
+            print(suite.format_report(results, baseline, threshold))
+        if failed or suite.regressions(results, baseline, threshold):
+            raise SystemExit(1)
+        return
+
+    if args.command == "serve":
+        import asyncio
+
+        from .session import run_stdio_session, run_tcp_host
+
+        if args.stdio:
+            asyncio.run(run_stdio_session(seed=args.seed, timeout=args.timeout))
+        else:
+            asyncio.run(run_tcp_host(args.host, args.port, args.timeout, args.max_sessions))
+        return
+
+    if args.metrics:
+        metrics = Metrics()
+        with collecting(metrics):
+            play(args)
+        write_metrics(metrics, args.metrics)
+        return
+    play(args)
+
+
+def play(args: argparse.Namespace) -> None:
+    from .dm import resume_game, run_game
+
+    if args.resume:
+        resume_game(load(args.resume))
+        return
     scripted = ["新晋忍者", "t", "k"] if args.demo else None
+    if args.record:
+        from .replay import record_game
+
+        _, log = record_game(seed=args.seed, scripted_choices=scripted, demo_mode=args.demo)
+        with open(args.record, "wb") as handle:
+            handle.write(log.dumps())
+        return
     run_game(seed=args.seed, scripted_choices=scripted, demo_mode=args.demo)
 
 
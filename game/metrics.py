@@ -0,0 +1,136 @@
+"""Optional instrumentation: phase timings, roll counters and prompt latency.
+
+A :class:`Metrics` collector is made current with :func:`collecting` (or by
+passing ``metrics=`` to :func:`game.dm.run_game`). The dice helpers,
+``with_inspiration``, the phase pipeline and the prompt wrapper look it up in
+a :class:`contextvars.ContextVar`, so when nothing is collecting the cost is
+one ``ContextVar.get`` and a ``None`` check, and concurrent asyncio sessions
+keep separate collectors.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterator
+
+
+COUNTERS = ("games", "checks", "damage_rolls", "rerolls", "prompts")
+_HELP = {
+    "games": "Campaigns played.",
+    "checks": "Ability checks resolved.",
+    "damage_rolls": "Damage expressions rolled.",
+    "rerolls": "Heroic inspiration rerolls taken.",
+    "prompts": "Questions put to the player.",
+}
+
+
+@dataclass
+class Metrics:
+    """Counters and wall-clock totals; cheap to merge across workers."""
+
+    games: int = 0
+    checks: int = 0
+    damage_rolls: int = 0
+    rerolls: int = 0
+    prompts: int = 0
+    phase_seconds: Dict[str, float] = field(default_factory=dict)
+    phase_runs: Dict[str, int] = field(default_factory=dict)
+    prompt_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+    @property
+    def compute_seconds(self) -> float:
+        """Wall time not spent waiting for an answer."""
+
+        return max(0.0, self.total_seconds - self.prompt_seconds)
+
+    def add_phase(self, phase: str, seconds: float) -> None:
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+        self.phase_runs[phase] = self.phase_runs.get(phase, 0) + 1
+
+    def merge(self, other: "Metrics") -> None:
+        for name in COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for phase, seconds in other.phase_seconds.items():
+            self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+        for phase, runs in other.phase_runs.items():
+            self.phase_runs[phase] = self.phase_runs.get(phase, 0) + runs
+        self.prompt_seconds += other.prompt_seconds
+        self.total_seconds += other.total_seconds
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["compute_seconds"] = self.compute_seconds
+        return data
+
+    def to_json(self, indent: int | None = 2) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+    def to_prometheus(self, prefix: str = "naruto_") -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+
+        lines = []
+        for name in COUNTERS:
+            metric = f"{prefix}{name}_total"
+            lines += [f"# HELP {metric} {_HELP[name]}", f"# TYPE {metric} counter", f"{metric} {getattr(self, name)}"]
+        metric = f"{prefix}phase_seconds_total"
+        lines += [f"# HELP {metric} Wall time spent in each phase.", f"# TYPE {metric} counter"]
+        lines += [f'{metric}{{phase="{phase}"}} {seconds:.9f}' for phase, seconds in self.phase_seconds.items()]
+        metric = f"{prefix}phase_runs_total"
+        lines += [f"# HELP {metric} Times each phase was entered.", f"# TYPE {metric} counter"]
+        lines += [f'{metric}{{phase="{phase}"}} {runs}' for phase, runs in self.phase_runs.items()]
+        for name, value, text in (
+            ("prompt_wait_seconds_total", self.prompt_seconds, "Wall time spent waiting for answers."),
+            ("compute_seconds_total", self.compute_seconds, "Wall time not spent waiting for answers."),
+        ):
+            lines += [f"# HELP {prefix}{name} {text}", f"# TYPE {prefix}{name} counter", f"{prefix}{name} {value:.9f}"]
+        return "\n".join(lines) + "\n"
+
+
+current: ContextVar[Metrics | None] = ContextVar("game_metrics", default=None)
+
+
+@contextmanager
+def collecting(metrics: Metrics) -> Iterator[Metrics]:
+    """Make ``metrics`` current for the block, adding its wall time to the total."""
+
+    token = current.set(metrics)
+    started = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics.total_seconds += time.perf_counter() - started
+        current.reset(token)
+
+
+def timed_prompt(prompt_fn: Callable[[str], str], metrics: Metrics) -> Callable[[str], str]:
+    """Wrap a prompt so each call counts and its blocking time is recorded."""
+
+    def prompt(question: str) -> str:
+        started = time.perf_counter()
+        try:
+            return prompt_fn(question)
+        finally:
+            metrics.prompts += 1
+            metrics.prompt_seconds += time.perf_counter() - started
+
+    prompt.metrics = metrics
+    return prompt
+
+
+def metered_prompt(prompt_fn: Callable[[str], str]) -> Callable[[str], str]:
+    """Count a game and time ``prompt_fn`` for the current collector, once.
+
+    Every entry point (``run_game``, a bare ``Pipeline.run``, a simulator
+    creating its own character) calls this when a game starts; a prompt
+    already timed for the current collector is returned unchanged, so a game
+    is counted once however many of them it passes through.
+    """
+
+    metrics = current.get()
+    if metrics is None or getattr(prompt_fn, "metrics", None) is metrics:
+        return prompt_fn
+    metrics.games += 1
+    return timed_prompt(prompt_fn, metrics)
@@ -0,0 +1,80 @@
+"""Output sinks that receive narration instead of calling ``print`` directly."""
+
+import sys
+from abc import ABC, abstractmethod
+from typing import List, TextIO
+
+
+class OutputSink(ABC):
+    """Receives narration one line at a time."""
+
+    @abstractmethod
+    def emit(self, text: str) -> None:
+        """Take one line of narration."""
+
+    def flush(self) -> None:
+        """Called at phase boundaries and before blocking on player input."""
+
+
+class NullSink(OutputSink):
+    """Drops everything; for simulations and benchmarks."""
+
+    def emit(self, text: str) -> None:
+        pass
+
+
+class StreamSink(OutputSink):
+    """Writes each line straight to a text stream (``sys.stdout`` by default)."""
+
+    def __init__(self, stream: TextIO | None = None) -> None:
+        self._stream = stream
+
+    @property
+    def stream(self) -> TextIO:
+        # Resolved lazily so ``contextlib.redirect_stdout`` keeps working.
+        return self._stream if self._stream is not None else sys.stdout
+
+    def emit(self, text: str) -> None:
+        self.stream.write(text + "\n")
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+class BufferedSink(StreamSink):
+    """Collects lines and writes them with a single call on :meth:`flush`."""
+
+    def __init__(self, stream: TextIO | None = None) -> None:
+        super().__init__(stream)
+        self._lines: List[str] = []
+
+    def emit(self, text: str) -> None:
+        self._lines.append(text)
+
+    def flush(self) -> None:
+        if self._lines:
+            self._lines.append("")
+            self.stream.write("\n".join(self._lines))
+            self._lines.clear()
+        super().flush()
+
+
+class FileSink(BufferedSink):
+    """Buffered sink that owns the file it writes to."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(open(path, "w", encoding="utf-8"))
+
+    def close(self) -> None:
+        self.flush()
+        self.stream.close()
+
+    def __enter__(self) -> "FileSink":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+STDOUT = StreamSink()
+NULL = NullSink()
@@ -1,12 +1,15 @@
 """Prompt helpers and narration utilities for the text adventure."""
 
+from collections import deque
 from typing import Callable, List
 
+from .output import OutputSink, STDOUT
+
 Prompt = Callable[[str], str]
 
 
-def announce(message: str) -> None:
-    print(f"\n== {message} ==")
+def announce(message: str, out: OutputSink = STDOUT) -> None:
+    out.emit(f"\n== {message} ==")
 
 
 def build_prompt(
@@ -14,21 +17,23 @@ def build_prompt(
     fallback: str | None = None,
     inspiration_fallback: str | None = None,
     force_scripted: bool = False,
+    out: OutputSink = STDOUT,
 ) -> Prompt:
     """Create a prompt function that can be scripted for demos or tests."""
 
-    choices = auto_choices.copy()
+    choices = deque(auto_choices)
     scripted = bool(auto_choices) or force_scripted
 
     def prompt_fn(question: str) -> str:
         if choices:
-            return choices.pop(0)
+            return choices.popleft()
         if scripted and "英雄灵感" in question and inspiration_fallback is not None:
-            print(f"{question}{inspiration_fallback}")
+            out.emit(f"{question}{inspiration_fallback}")
             return inspiration_fallback
         if scripted and fallback is not None:
-            print(f"{question}{fallback}")
+            out.emit(f"{question}{fallback}")
             return fallback
+        out.flush()
         return input(question)
 
     return prompt_fn
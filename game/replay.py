@@ -0,0 +1,342 @@
+"""Deterministic record/replay of campaigns as a compact binary event log.
+
+Recording wraps the generator and the prompt so every ``randint``/``choice``
+draw and every answer is appended to an :class:`EventLog`. Replay re-seeds a
+fresh generator from the logged seed, feeds the logged answers back, runs with
+no narration, and compares each draw against the log. The first mismatch is
+raised as :class:`Divergence`, which pinpoints where code or RNG consumption
+changed since the run was recorded.
+
+Both the modular campaign (:func:`game.dm.run_game`) and the legacy
+``naruto_chunin_exam.naruto_game.DM`` are supported.
+
+Layout (version 2)::
+
+    header   magic "NRLG", version, kind, seed (int64), player count, player names
+    draw     tag 1, low, high, value (int64 each)
+    answer   tag 2, crc32 of the question, answer (length-prefixed UTF-8)
+
+Version 1 logs stored draws as int16, which tie-break draws from large table
+weights overflow; they are still read.
+"""
+
+import random
+import secrets
+import struct
+import time
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Callable, List, Sequence, Tuple
+
+from naruto_chunin_exam import naruto_game
+
+from .dm import CampaignResult, run_game
+from .output import NULL, OutputSink, STDOUT
+from .prompt import build_prompt, Prompt
+
+
+MAGIC = b"NRLG"
+VERSION = 2
+KIND_GAME = 0
+KIND_LEGACY = 1
+
+DRAW = 1
+ANSWER = 2
+
+_HEADER = struct.Struct("<4sBBqH")
+_DRAW = struct.Struct("<Bqqq")
+# Draw layouts by log version, for reading older recordings.
+_DRAWS = {1: struct.Struct("<Bhhh"), VERSION: _DRAW}
+_ANSWER = struct.Struct("<BIH")
+_STRING = struct.Struct("<H")
+
+Event = Tuple
+
+
+class ReplayError(ValueError):
+    """Raised when bytes are not an event log this version understands."""
+
+
+class Divergence(Exception):
+    """The replayed run stopped matching the log at event ``index``."""
+
+    def __init__(self, index: int, expected: str, actual: str) -> None:
+        super().__init__(f"event {index}: expected {expected}, got {actual}")
+        self.index = index
+        self.expected = expected
+        self.actual = actual
+
+
+def _question_id(question: str) -> int:
+    return zlib.crc32(question.encode("utf-8"))
+
+
+def describe(event: Event | None) -> str:
+    if event is None:
+        return "end of log"
+    if event[0] == DRAW:
+        return f"draw [{event[1]}, {event[2]}] -> {event[3]}"
+    return f"answer {event[2]!r} (question {event[1]:08x})"
+
+
+@dataclass
+class EventLog:
+    """Seed, legacy player names and the ordered draw/answer events of one run."""
+
+    kind: int = KIND_GAME
+    seed: int = 0
+    players: List[str] = field(default_factory=list)
+    events: List[Event] = field(default_factory=list)
+
+    def draw(self, low: int, high: int, value: int) -> None:
+        self.events.append((DRAW, low, high, value))
+
+    def answer(self, question: str, answer: str) -> None:
+        self.events.append((ANSWER, _question_id(question), answer))
+
+    def dumps(self) -> bytes:
+        parts = [_HEADER.pack(MAGIC, VERSION, self.kind, self.seed, len(self.players))]
+        for name in self.players:
+            raw = name.encode("utf-8")
+            parts.append(_STRING.pack(len(raw)))
+            parts.append(raw)
+        for event in self.events:
+            if event[0] == DRAW:
+                parts.append(_DRAW.pack(*event))
+            else:
+                raw = event[2].encode("utf-8")
+                parts.append(_ANSWER.pack(ANSWER, event[1], len(raw)))
+                parts.append(raw)
+        return b"".join(parts)
+
+    @classmethod
+    def loads(cls, data: bytes) -> "EventLog":
+        try:
+            magic, version, kind, seed, count = _HEADER.unpack_from(data, 0)
+        except struct.error as exc:
+            raise ReplayError("truncated event log header") from exc
+        if magic != MAGIC:
+            raise ReplayError("not an event log")
+        if version not in _DRAWS:
+            raise ReplayError(f"unsupported event log version {version}")
+        draw = _DRAWS[version]
+        log = cls(kind, seed)
+        offset = _HEADER.size
+        try:
+            for _ in range(count):
+                (size,) = _STRING.unpack_from(data, offset)
+                offset += _STRING.size
+                log.players.append(data[offset : offset + size].decode("utf-8"))
+                offset += size
+            while offset < len(data):
+                if data[offset] == DRAW:
+                    log.events.append(draw.unpack_from(data, offset))
+                    offset += draw.size
+                elif data[offset] == ANSWER:
+                    _, question, size = _ANSWER.unpack_from(data, offset)
+                    offset += _ANSWER.size
+                    log.events.append((ANSWER, question, data[offset : offset + size].decode("utf-8")))
+                    offset += size
+                else:
+                    raise ReplayError(f"unknown event tag {data[offset]} at byte {offset}")
+        except (struct.error, UnicodeDecodeError) as exc:
+            raise ReplayError("corrupt event log body") from exc
+        return log
+
+
+class _ObservedRandom(random.Random, ABC):
+    """Routes every draw the game makes through :meth:`_observe`.
+
+    ``choice`` consumes the stream exactly like :meth:`random.Random.choice`
+    and is observed as a draw of the index. ``randrange`` (used by
+    :class:`~game.tables.WeightedTable` to break alias ties) is observed as a
+    draw from its lowest to its highest possible value; ``randint`` calls the
+    base ``randrange`` directly so each die is observed once.
+    """
+
+    def __new__(cls, *args, **kwargs):
+        # random.Random's C constructor skips the abstract-method check that
+        # object.__new__ makes, so repeat it here.
+        if cls.__abstractmethods__:
+            missing = ", ".join(sorted(cls.__abstractmethods__))
+            raise TypeError(f"Can't instantiate abstract class {cls.__name__} with abstract method {missing}")
+        return super().__new__(cls, *args, **kwargs)
+
+    @abstractmethod
+    def _observe(self, low: int, high: int, value: int) -> None:
+        """Handle one draw the game made."""
+
+    def randint(self, a: int, b: int) -> int:
+        value = random.Random.randrange(self, a, b + 1)
+        self._observe(a, b, value)
+        return value
+
+    def randrange(self, start: int, stop: int | None = None, step: int = 1) -> int:
+        value = super().randrange(start, stop, step)
+        low, high = (0, start - 1) if stop is None else (start, stop - 1)
+        self._observe(low, high, value)
+        return value
+
+    def choice(self, seq: Sequence):
+        index = self._randbelow(len(seq))
+        self._observe(0, len(seq) - 1, index)
+        return seq[index]
+
+
+class RecordingRandom(_ObservedRandom):
+    def __init__(self, seed: int, log: EventLog) -> None:
+        self.log = log
+        super().__init__(seed)
+
+    def _observe(self, low: int, high: int, value: int) -> None:
+        self.log.draw(low, high, value)
+
+
+class _Cursor:
+    """Walks the logged events, raising :class:`Divergence` on the first mismatch."""
+
+    def __init__(self, events: List[Event]) -> None:
+        self.events = events
+        self.position = 0
+
+    def _next(self) -> Event | None:
+        event = self.events[self.position] if self.position < len(self.events) else None
+        self.position += 1
+        return event
+
+    def draw(self, low: int, high: int, value: int) -> None:
+        event = self._next()
+        if event != (DRAW, low, high, value):
+            raise Divergence(self.position - 1, describe(event), describe((DRAW, low, high, value)))
+
+    def answer(self, question: str) -> str:
+        event = self._next()
+        if event is None or event[0] != ANSWER or event[1] != _question_id(question):
+            raise Divergence(self.position - 1, describe(event), f"question {question!r}")
+        return event[2]
+
+    def finish(self) -> None:
+        if self.position < len(self.events):
+            raise Divergence(self.position, describe(self.events[self.position]), "end of run")
+
+
+class ReplayRandom(_ObservedRandom):
+    def __init__(self, seed: int, cursor: _Cursor) -> None:
+        self.cursor = cursor
+        super().__init__(seed)
+
+    def _observe(self, low: int, high: int, value: int) -> None:
+        self.cursor.draw(low, high, value)
+
+
+class _RecordingDM(naruto_game.DM):
+    def __init__(self, players: List["naruto_game.Character"], rng: RecordingRandom, **io) -> None:
+        super().__init__(players, rng, **io)
+        self.log = rng.log
+
+    def prompt_choice(self, prompt: str, choices: List[str]) -> str:
+        answer = super().prompt_choice(prompt, choices)
+        self.log.answer(prompt, answer)
+        return answer
+
+
+class _ReplayDM(naruto_game.DM):
+    def __init__(self, players: List["naruto_game.Character"], rng: ReplayRandom) -> None:
+        super().__init__(players, rng)
+        self.cursor = rng.cursor
+
+    def narrate(self, text: str) -> None:
+        pass
+
+    def prompt_choice(self, prompt: str, choices: List[str]) -> str:
+        answer = self.cursor.answer(prompt)
+        if answer not in choices:
+            raise Divergence(self.cursor.position - 1, f"one of {choices}", repr(answer))
+        return answer
+
+
+def record_game(
+    seed: int | None = None,
+    scripted_choices: List[str] | None = None,
+    demo_mode: bool = False,
+    prompt_fn: Prompt | None = None,
+    out: OutputSink = STDOUT,
+) -> Tuple[CampaignResult, EventLog]:
+    """Play :func:`game.dm.run_game` normally while logging draws and answers."""
+
+    log = EventLog(KIND_GAME, secrets.randbits(32) if seed is None else seed)
+    if prompt_fn is None:
+        prompt_fn = build_prompt(
+            scripted_choices or [],
+            fallback="y" if demo_mode else None,
+            inspiration_fallback="y" if demo_mode else None,
+            force_scripted=demo_mode,
+            out=out,
+        )
+    inner = prompt_fn
+
+    def recording_prompt(question: str) -> str:
+        answer = inner(question)
+        log.answer(question, answer)
+        return answer
+
+    result = run_game(prompt_fn=recording_prompt, out=out, rng=RecordingRandom(log.seed, log))
+    return result, log
+
+
+def record_legacy(
+    names: List[str],
+    seed: int | None = None,
+    choose: Callable[[str, List[str]], str] | None = None,
+) -> Tuple["naruto_game.DM", EventLog]:
+    """Play the legacy ``DM`` for ``names`` while logging it; interactive unless ``choose`` is given."""
+
+    log = EventLog(KIND_LEGACY, secrets.randbits(32) if seed is None else seed, list(names))
+    players = [naruto_game.Character(name=name) for name in names]
+    dm = _RecordingDM(players, RecordingRandom(log.seed, log), choose=choose)
+    dm.run()
+    return dm, log
+
+
+@dataclass
+class ReplayReport:
+    """Outcome of re-executing a log: how far it matched and where it diverged."""
+
+    log: EventLog
+    checked: int
+    divergence: Divergence | None = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.divergence is None
+
+    def report(self) -> str:
+        kind = "旧版 DM" if self.log.kind == KIND_LEGACY else "run_game"
+        head = f"{kind} 回放：种子 {self.log.seed}，共 {len(self.log.events)} 个事件，耗时 {self.elapsed * 1000:.2f}ms"
+        if self.ok:
+            return f"{head}\n  全部一致。"
+        return (
+            f"{head}\n  在第 {self.divergence.index} 个事件处分歧："
+            f"\n    记录：{self.divergence.expected}\n    实际：{self.divergence.actual}"
+        )
+
+
+def replay(data: bytes) -> ReplayReport:
+    """Re-execute a recorded log without narration and verify every draw."""
+
+    log = EventLog.loads(data)
+    cursor = _Cursor(log.events)
+    rng = ReplayRandom(log.seed, cursor)
+    started = time.perf_counter()
+    divergence = None
+    try:
+        if log.kind == KIND_LEGACY:
+            _ReplayDM([naruto_game.Character(name=name) for name in log.players], rng).run()
+        else:
+            run_game(prompt_fn=cursor.answer, out=NULL, rng=rng)
+        cursor.finish()
+    except Divergence as found:
+        divergence = found
+    return ReplayReport(log, min(cursor.position, len(log.events)), divergence, time.perf_counter() - started)
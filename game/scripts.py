@@ -0,0 +1,255 @@
+"""Exact ranking of positional answer scripts.
+
+A script is the answers handed out in order once the character is created,
+like ``simulate --script`` or ``run_game(scripted_choices=...)``; prompts
+after it are answered by a :data:`game.simulate.POLICIES` policy. Every
+analytic prompt has one listed answer and an "otherwise" branch, so ``k``
+answers span roughly ``2^k`` distinct scripts.
+
+:func:`rank_scripts` walks the script tree over a
+:class:`~game.solver.DecisionGraph`. Graph nodes merge identical phase
+positions and states (hp, chakra, fatigue, inspiration, scrolls), so the
+graph doubles as a transposition table. A script prefix is a distribution
+over the prompt nodes waiting for the next answer, and the chance steps
+between one prompt and the next are resolved once per node and shared by
+every prefix that reaches it. A prefix is pruned once even full knowledge of
+the program position could not lift it above the ``top``-th script found.
+"""
+
+import heapq
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from .analytic import PHASES, Profile, State, keyword_policy
+from .character import Character
+from .simulate import POLICIES
+from .solver import DEFAULT_ANSWERS, PROMOTED, TIE, DecisionGraph, Outcome, node_values
+
+
+# Where runs ended: the index of the phase they failed, or ``len(phases)``
+# once promoted.
+Ends = Dict[int, float]
+Pairs = Tuple[Tuple[int, float], ...]
+
+
+@dataclass(frozen=True)
+class ScriptOdds:
+    script: Tuple[str, ...]
+    # Chance of clearing each phase, in campaign order.
+    passed: Tuple[float, ...]
+
+    @property
+    def promotion(self) -> float:
+        return self.passed[-1]
+
+
+@dataclass
+class ScriptRanking:
+    phases: Tuple[str, ...]
+    policy: str
+    depth: int
+    baseline: ScriptOdds
+    scripts: List[ScriptOdds] = field(default_factory=list)
+    explored: int = 0
+    pruned: int = 0
+    elapsed: float = 0.0
+
+    def report(self) -> str:
+        lines = [
+            f"脚本枚举：至多 {self.depth} 个回答，其后按策略 {self.policy} 作答；"
+            f"展开 {self.explored} 个前缀，剪枝 {self.pruned} 个，耗时 {self.elapsed:.2f}s"
+        ]
+        for rank, odds in enumerate(self.scripts, 1):
+            lines.append(f"  {rank:>3}. {self._line(odds)}  {','.join(odds.script)}")
+        lines.append(f"  不用脚本 {self._line(self.baseline)}")
+        return "\n".join(lines)
+
+    def _line(self, odds: ScriptOdds) -> str:
+        stages = "  ".join(f"{phase} {passed:6.2%}" for phase, passed in zip(self.phases, odds.passed))
+        return f"晋升 {odds.promotion:6.2%}（{stages}）"
+
+
+class _Walker:
+    """Pushes script prefixes through a decision graph."""
+
+    def __init__(self, graph: DecisionGraph, order: List[int], policy: str) -> None:
+        self.graph = graph
+        self.final = len(graph.phases)
+        self.settled: Dict[int, Tuple[Outcome, Ends]] = {}
+        self.options: Dict[Tuple[int, int], Tuple[Pairs, Pairs]] = {}
+        answer = keyword_policy(POLICIES[policy])
+        self.tail: Dict[int, Ends] = {}
+        for node in reversed(order):
+            key = graph.keys[node]
+            pick = self.pick(node, answer(key[1], key[2])) if key is not None else 0
+            ends: Ends = defaultdict(float)
+            for target, p in graph.nodes[node][pick][1].items():
+                if target < 0:
+                    ends[self.end(node, target)] += p
+                else:
+                    for end, q in self.tail[target].items():
+                        ends[end] += p * q
+            self.tail[node] = ends
+
+    def end(self, node: int, target: int) -> int:
+        return self.final if target == PROMOTED else self.graph.index[node]
+
+    def pick(self, node: int, answer: str) -> int:
+        """The option a prompt node takes for ``answer``; unlisted answers take the default."""
+
+        options = self.graph.nodes[node]
+        return next((position for position, (listed, _) in enumerate(options) if listed == answer), 0)
+
+    def settle(self, node: int) -> Tuple[Outcome, Ends]:
+        """Prompts and ends a step node leads to before the next answer is needed."""
+
+        stack = [node]
+        while stack:
+            current = stack[-1]
+            if current in self.settled:
+                stack.pop()
+                continue
+            outcome = self.graph.nodes[current][0][1]
+            waiting = [
+                target
+                for target in outcome
+                if target >= 0 and self.graph.keys[target] is None and target not in self.settled
+            ]
+            if waiting:
+                stack.extend(waiting)
+                continue
+            stack.pop()
+            prompts: Outcome = defaultdict(float)
+            ends: Ends = defaultdict(float)
+            self.fold(current, outcome, 1.0, prompts, ends)
+            self.settled[current] = (prompts, ends)
+        return self.settled[node]
+
+    def fold(self, node: int, outcome: Outcome, weight: float, prompts: Outcome, ends: Ends) -> None:
+        for target, p in outcome.items():
+            p *= weight
+            if target < 0:
+                ends[self.end(node, target)] += p
+            elif self.graph.keys[target] is not None:
+                prompts[target] += p
+            else:
+                later, ended = self.settle(target)
+                for prompt, q in later.items():
+                    prompts[prompt] += p * q
+                for end, q in ended.items():
+                    ends[end] += p * q
+
+    def answers(self, frontier: Outcome) -> List[str]:
+        """One answer per distinct effect: each listed answer, plus one listed nowhere."""
+
+        listed = dict.fromkeys(
+            answer for node in frontier for answer, _ in self.graph.nodes[node][1:]
+        )
+        heaviest = max(frontier, key=frontier.get)
+        defaults = [DEFAULT_ANSWERS.get(self.graph.keys[heaviest][1], "n"), *DEFAULT_ANSWERS.values(), "n"]
+        return [*listed, next(answer for answer in defaults if answer not in listed)]
+
+    def answered(self, node: int, answer: str) -> Tuple[Pairs, Pairs]:
+        """Prompts and ends a prompt node leads to once given ``answer``."""
+
+        pick = self.pick(node, answer)
+        result = self.options.get((node, pick))
+        if result is None:
+            prompts: Outcome = defaultdict(float)
+            ends: Ends = defaultdict(float)
+            self.fold(node, self.graph.nodes[node][pick][1], 1.0, prompts, ends)
+            result = self.options[(node, pick)] = (tuple(prompts.items()), tuple(ends.items()))
+        return result
+
+    def advance(self, frontier: Outcome, ends: Ends, answer: str) -> Tuple[Outcome, Ends]:
+        prompts: Outcome = defaultdict(float)
+        ended: Ends = defaultdict(float, ends)
+        for node, p in frontier.items():
+            later, reached = self.answered(node, answer)
+            for prompt, q in later:
+                prompts[prompt] += p * q
+            for end, q in reached:
+                ended[end] += p * q
+        return prompts, ended
+
+    def finish(self, frontier: Outcome, ends: Ends) -> Tuple[float, ...]:
+        """Phase pass chances once the policy answers everything left."""
+
+        total: Ends = defaultdict(float, ends)
+        for node, p in frontier.items():
+            for end, q in self.tail[node].items():
+                total[end] += p * q
+        passed, remaining = [], 1.0
+        for index in range(self.final):
+            remaining -= total[index]
+            passed.append(max(remaining, 0.0))
+        return tuple(passed)
+
+
+def rank_scripts(
+    character: Character,
+    depth: int = 8,
+    top: int = 10,
+    policy: str = "demo",
+    phases: Tuple[str, ...] = PHASES,
+) -> ScriptRanking:
+    """The ``top`` scripts of at most ``depth`` answers by exact promotion chance.
+
+    A script is cut short once every run has ended. Ties keep the script
+    found first.
+    """
+
+    if depth < 0 or top < 1:
+        raise ValueError("需要 depth >= 0 且 top >= 1")
+    started = time.perf_counter()
+    graph = DecisionGraph(Profile.from_character(character), tuple(phases))
+    root = graph.expand(State.from_character(character))
+    order = graph.order(root)
+    walker = _Walker(graph, order, policy)
+
+    def choose(node: int, values: Dict[int, float]) -> int:
+        if graph.keys[node] is None:
+            return 0
+        scores = [sum(p * values[target] for target, p in outcome.items()) for _, outcome in graph.nodes[node]]
+        return scores.index(max(scores))
+
+    best = node_values(graph, order, choose)
+    tail = {node: ends.get(walker.final, 0.0) for node, ends in walker.tail.items()}
+
+    def value(frontier: Outcome, ends: Ends, values: Dict[int, float]) -> float:
+        return ends.get(walker.final, 0.0) + sum(p * values[node] for node, p in frontier.items())
+
+    frontier, ends = walker.settle(root)
+    ranking = ScriptRanking(tuple(phases), policy, depth, ScriptOdds((), walker.finish(frontier, ends)))
+    # Min-heap of (promotion, -found, script, frontier, ends) holding the best ``top`` scripts.
+    kept: List[Tuple[float, int, Tuple[str, ...], Outcome, Ends]] = []
+    found = 0
+    stack = [((), frontier, ends)]
+    while stack:
+        script, frontier, ends = stack.pop()
+        ranking.explored += 1
+        if len(script) == depth or not frontier:
+            found += 1
+            entry = (value(frontier, ends, tail), -found, script, frontier, ends)
+            if len(kept) < top:
+                heapq.heappush(kept, entry)
+            elif entry[0] > kept[0][0] + TIE:
+                heapq.heapreplace(kept, entry)
+            continue
+        children = []
+        for answer in walker.answers(frontier):
+            child = walker.advance(frontier, ends, answer)
+            bound = value(*child, best)
+            if len(kept) == top and bound <= kept[0][0] + TIE:
+                ranking.pruned += 1
+                continue
+            children.append((bound, (*script, answer), *child))
+        # Most promising last, so it is expanded first and tightens the pruning.
+        children.sort(key=lambda child: child[0])
+        stack.extend(child[1:] for child in children)
+    kept.sort(key=lambda entry: (-entry[0], -entry[1]))
+    ranking.scripts = [ScriptOdds(script, walker.finish(frontier, ends)) for _, _, script, frontier, ends in kept]
+    ranking.elapsed = time.perf_counter() - started
+    return ranking
@@ -0,0 +1,305 @@
+"""Asyncio host for many concurrent interactive campaigns.
+
+The phases are synchronous, so a session is not parked on a call stack while
+the player thinks. Instead :class:`GameSession` stores the seed, the answers
+given so far, how many narration lines were already delivered and, once the
+exam is behind it, a compact snapshot taken at the start of the latest phase
+reached. Each new answer resumes from that snapshot (or from the seed) and
+replays only the current phase with a null prefix of narration up to the next
+unanswered question, so an answer costs the same late in a campaign as early
+on. An idle session costs a few kilobytes plus whatever its connection
+coroutine holds. :func:`play` runs each replay in a worker thread with
+:func:`asyncio.to_thread`, so a slow replay never stalls the other sessions
+on the event loop.
+
+Replays run with the metrics, transcript, stats and event collectors
+switched off. Those collectors bind to a game when it starts, so when a
+campaign ends under an active collector it is played once more from the seed
+with the recorded answers, in the same worker thread, and the collectors see
+each session's game exactly once.
+"""
+
+import asyncio
+import secrets
+import sys
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterator, List, Tuple
+
+from .checkpoint import Snapshot, dumps, dumps_session, loads, loads_session
+from .dm import PHASES, CampaignResult, PhaseContext, campaign_pipeline, resume_game, run_game
+from .events import subscribers
+from .metrics import current
+from .output import NULL, OutputSink
+from .stats import active_stats
+from .transcript import active_transcript
+
+
+AsyncPrompt = Callable[[str], Awaitable[str]]
+AsyncWriter = Callable[[List[str]], Awaitable[None]]
+
+
+class _AwaitingAnswer(Exception):
+    def __init__(self, question: str) -> None:
+        super().__init__(question)
+        self.question = question
+
+
+class _TailSink(OutputSink):
+    """Keeps only the lines after the first ``skip`` and counts every line."""
+
+    def __init__(self, skip: int, seen: int = 0) -> None:
+        self.skip = skip
+        self.seen = seen
+        self.lines: List[str] = []
+
+    def emit(self, text: str) -> None:
+        if self.seen >= self.skip:
+            self.lines.append(text)
+        self.seen += 1
+
+
+def _observed() -> bool:
+    return (
+        current.get() is not None
+        or active_transcript.get() is not None
+        or active_stats.get() is not None
+        or bool(subscribers.get())
+    )
+
+
+@contextmanager
+def _unobserved() -> Iterator[None]:
+    """Switch every collector off for the block."""
+
+    tokens = [(var, var.set(None)) for var in (current, active_transcript, active_stats)]
+    tokens.append((subscribers, subscribers.set(())))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+@dataclass
+class _Mark:
+    """The campaign at the start of a phase, with the answers and lines before it."""
+
+    phase: int
+    # A binary checkpoint rather than live objects: about 2.6 kB for a
+    # Mersenne Twister, plus any unserved BlockRandom buffers.
+    checkpoint: bytes
+    answers: int
+    lines: int
+
+    @classmethod
+    def capture(cls, phase: int, context: PhaseContext, answers: int, lines: int) -> "_Mark":
+        return cls(phase, dumps(Snapshot.capture(context.character, context.rng, phase)), answers, lines)
+
+    def snapshot(self) -> Snapshot:
+        return loads(self.checkpoint)
+
+
+class GameSession:
+    """One player's campaign, suspended between answers as plain data."""
+
+    __slots__ = ("seed", "answers", "emitted", "result", "mark")
+
+    def __init__(self, seed: int | None = None) -> None:
+        self.seed = secrets.randbits(32) if seed is None else seed
+        self.answers: List[str] = []
+        self.emitted = 0
+        self.result: CampaignResult | None = None
+        self.mark: _Mark | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.result is not None
+
+    def to_bytes(self) -> bytes:
+        """Serialise an idle session so the host can evict it to disk.
+
+        The phase checkpoint is left out; a restored session replays from the
+        seed once and takes a new one.
+        """
+
+        return dumps_session(self.seed, self.answers, self.emitted)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "GameSession":
+        session = cls.__new__(cls)
+        session.seed, session.answers, session.emitted = loads_session(data)
+        session.result = None
+        session.mark = None
+        return session
+
+    def advance(self, answer: str | None = None) -> Tuple[List[str], str | None]:
+        """Record ``answer`` and run until the next question.
+
+        Returns the narration produced since the previous call and the pending
+        question, or ``None`` once the campaign is over.
+        """
+
+        if answer is not None:
+            self.answers.append(answer)
+        observed = _observed()
+        with _unobserved() if observed else nullcontext():
+            question, lines = self._replay()
+        if question is None and observed:
+            replies = iter(self.answers)
+            run_game(seed=self.seed, prompt_fn=lambda question: next(replies), out=NULL)
+        return lines, question
+
+    def _replay(self) -> Tuple[str | None, List[str]]:
+        mark = self.mark
+        sink = _TailSink(self.emitted, mark.lines if mark else 0)
+        used = mark.answers if mark else 0
+
+        def prompt_fn(question: str) -> str:
+            nonlocal used
+            if used == len(self.answers):
+                raise _AwaitingAnswer(question)
+            used += 1
+            return self.answers[used - 1]
+
+        def enter(phase: str, context: PhaseContext) -> None:
+            # Replaying character creation is cheaper than resuming, so the exam is not marked.
+            index = PHASES.index(phase)
+            if index and (self.mark is None or index > self.mark.phase):
+                self.mark = _Mark.capture(index, context, used, sink.seen)
+
+        pipeline = campaign_pipeline()
+        pipeline.add_hooks(before=enter)
+        question = None
+        try:
+            if mark is None:
+                self.result = run_game(seed=self.seed, prompt_fn=prompt_fn, out=sink, pipeline=pipeline)
+            else:
+                self.result = resume_game(mark.snapshot(), prompt_fn, sink, pipeline=pipeline)
+        except _AwaitingAnswer as pending:
+            question = pending.question
+        self.emitted = sink.seen
+        return question, sink.lines
+
+
+async def play(ask: AsyncPrompt, write: AsyncWriter, seed: int | None = None) -> GameSession:
+    """Drive one campaign with an awaitable prompt and an awaitable writer."""
+
+    session = GameSession(seed)
+    lines, question = await asyncio.to_thread(session.advance)
+    while True:
+        await write(lines)
+        if question is None:
+            return session
+        answer = await ask(question)
+        lines, question = await asyncio.to_thread(session.advance, answer)
+
+
+async def serve_stream(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    seed: int | None = None,
+    timeout: float | None = 300.0,
+) -> GameSession | None:
+    """Play one campaign over a byte stream, one answer per line.
+
+    ``timeout`` bounds how long the player may take per answer. Every write
+    awaits ``drain()`` so a slow reader throttles its own session only.
+    """
+
+    async def write(lines: List[str]) -> None:
+        if lines:
+            writer.write(("\n".join(lines) + "\n").encode("utf-8"))
+            await writer.drain()
+
+    async def ask(question: str) -> str:
+        writer.write(question.encode("utf-8"))
+        await writer.drain()
+        line = await asyncio.wait_for(reader.readline(), timeout)
+        if not line:
+            raise ConnectionResetError("player disconnected")
+        return line.decode("utf-8", "replace").rstrip("\r\n")
+
+    try:
+        return await play(ask, write, seed)
+    except asyncio.TimeoutError:
+        writer.write("\n== 长时间未回应，会话已结束。 ==\n".encode("utf-8"))
+        return None
+    except ConnectionError:
+        return None
+    finally:
+        writer.close()
+
+
+async def run_tcp_host(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    timeout: float | None = 300.0,
+    max_sessions: int | None = None,
+    write_buffer: int = 16 * 1024,
+    backlog: int = 1024,
+) -> None:
+    """Serve one campaign per TCP connection until cancelled."""
+
+    slots = asyncio.Semaphore(max_sessions) if max_sessions else None
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.transport.set_write_buffer_limits(high=write_buffer)
+        if slots is None:
+            await serve_stream(reader, writer, timeout=timeout)
+            return
+        async with slots:
+            await serve_stream(reader, writer, timeout=timeout)
+
+    server = await asyncio.start_server(handle, host, port, backlog=backlog)
+    async with server:
+        await server.serve_forever()
+
+
+async def _stdin_reader() -> asyncio.StreamReader | None:
+    """Stdin as a stream, so a timed-out read is really cancelled.
+
+    Regular files (and platforms without pipe transports) give ``None``; their
+    reads never wait on a player anyway.
+    """
+
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    except (ValueError, OSError, NotImplementedError):
+        return None
+    return reader
+
+
+async def run_stdio_session(seed: int | None = None, timeout: float | None = None) -> GameSession | None:
+    """Play a single campaign over stdin/stdout through the async entry point."""
+
+    reader = await _stdin_reader()
+
+    async def write(lines: List[str]) -> None:
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+
+    async def ask(question: str) -> str:
+        sys.stdout.write(question)
+        sys.stdout.flush()
+        if reader is None:
+            line = sys.stdin.readline()
+        else:
+            line = (await asyncio.wait_for(reader.readline(), timeout)).decode("utf-8", "replace")
+        if not line:
+            raise EOFError("stdin closed")
+        return line.rstrip("\r\n")
+
+    try:
+        return await play(ask, write, seed)
+    except asyncio.TimeoutError:
+        sys.stdout.write("\n== 长时间未回应，会话已结束。 ==\n")
+        sys.stdout.flush()
+        return None
+    except EOFError:
+        sys.stdout.write("\n== 输入已关闭，会话已结束。 ==\n")
+        sys.stdout.flush()
+        return None
@@ -0,0 +1,331 @@
+"""Headless multi-process campaign simulator for balance tuning."""
+
+import os
+import random
+import time
+from contextlib import ExitStack, nullcontext
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from .checkpoint import loads
+from .dm import PHASES, PhaseContext, campaign_pipeline, create_character, resume_game, run_game
+from .events import Totals, subscribed
+from .metrics import Metrics, collecting, metered_prompt
+from .output import NULL
+from .prompt import Prompt
+from .stats import RunStats, tallying
+from .transcript import JsonlWriter, Transcript, chunk_path, recording
+
+
+INSPIRATION_KEY = "英雄灵感"
+# Answers every prompt from :func:`game.solver.solve`'s table instead of keywords.
+SOLVER_POLICY = "optimal"
+
+# Each policy maps a question keyword to an answer; the first match wins and
+# anything unmatched receives the ``"*"`` entry.
+POLICIES: Dict[str, Dict[str, str]] = {
+    "demo": {"*": "y"},
+    "bold": {
+        INSPIRATION_KEY: "y",
+        "作弊": "y",
+        "宣誓": "y",
+        "追击卷轴": "p",
+        "行动": "e",
+        "亲自出场": "y",
+        "防御木叶": "y",
+        "*": "y",
+    },
+    "careful": {
+        INSPIRATION_KEY: "n",
+        "作弊": "n",
+        "宣誓": "y",
+        "追击卷轴": "s",
+        "行动": "r",
+        "亲自出场": "n",
+        "防御木叶": "n",
+        "*": "n",
+    },
+}
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    """Picklable description of the campaigns a worker should play."""
+
+    policy: str = "demo"
+    archetype: str = "t"
+    background: str = "k"
+    script: Tuple[str, ...] = ()
+    # Serialised :class:`~game.checkpoint.Snapshot`; when set, every run forks
+    # from it with the generator reseeded instead of creating a character.
+    checkpoint: bytes | None = None
+    # Subset of ``PHASES`` to play with a freshly created character, e.g.
+    # ``("forest",)`` for forest-only balance runs; empty plays the campaign.
+    phases: Tuple[str, ...] = ()
+    # Collect :class:`~game.metrics.Metrics` into the summary.
+    metrics: bool = False
+    # ``(id, dc)`` pairs applied with :func:`~game.encounters.overriding`,
+    # e.g. a proposal written by :mod:`game.balance`.
+    dcs: Tuple[Tuple[str, int], ...] = ()
+    # JSON Lines event transcript (``.gz`` compresses), rotated past
+    # ``transcript_max_bytes``; see :mod:`game.transcript`.
+    transcript: str | None = None
+    transcript_max_bytes: int | None = None
+    # Collect :class:`~game.stats.RunStats` distributions and the end-of-run funnel.
+    stats: bool = False
+    # :mod:`game.strategy` rules answering before the policy keywords (or solver).
+    strategy: str | None = None
+
+
+@dataclass
+class SimulationSummary:
+    """Aggregated outcome of many campaigns; cheap to merge across workers."""
+
+    phases: Tuple[str, ...] = PHASES
+    runs: int = 0
+    passes: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(PHASES, 0))
+    hp_total: int = 0
+    chakra_total: int = 0
+    fatigue_total: int = 0
+    inspiration_spent: int = 0
+    inspiration_held: int = 0
+    elapsed: float = 0.0
+    metrics: Metrics | None = None
+    # Summed :mod:`game.events` changes over all runs.
+    totals: Totals = field(default_factory=Totals)
+    stats: RunStats | None = None
+    # Answers given by each strategy rule, keyed by the rule's description.
+    strategy_hits: Dict[str, int] = field(default_factory=dict)
+    transcript_records: int = 0
+    transcript_paths: List[str] = field(default_factory=list)
+
+    def merge(self, other: "SimulationSummary") -> None:
+        self.runs += other.runs
+        for phase, count in other.passes.items():
+            self.passes[phase] += count
+        self.hp_total += other.hp_total
+        self.chakra_total += other.chakra_total
+        self.fatigue_total += other.fatigue_total
+        self.inspiration_spent += other.inspiration_spent
+        self.inspiration_held += other.inspiration_held
+        self.totals.merge(other.totals)
+        for rule, hits in other.strategy_hits.items():
+            self.strategy_hits[rule] = self.strategy_hits.get(rule, 0) + hits
+        self.transcript_records += other.transcript_records
+        self.transcript_paths.extend(other.transcript_paths)
+        if other.metrics is not None:
+            if self.metrics is None:
+                self.metrics = Metrics()
+            self.metrics.merge(other.metrics)
+        if other.stats is not None:
+            if self.stats is None:
+                self.stats = RunStats(self.phases)
+            self.stats.merge(other.stats)
+
+    def pass_rate(self, phase: str) -> float:
+        return self.passes[phase] / self.runs if self.runs else 0.0
+
+    def mean(self, total: int) -> float:
+        return total / self.runs if self.runs else 0.0
+
+    def report(self) -> str:
+        lines = [f"模拟局数 {self.runs}，耗时 {self.elapsed:.2f}s，约 {self.games_per_second():.0f} 局/秒"]
+        for phase in self.phases:
+            lines.append(f"  {phase:<8} 通过率 {self.pass_rate(phase):6.2%}")
+        lines.append(
+            f"  最终生命 {self.mean(self.hp_total):.2f}，查克拉 {self.mean(self.chakra_total):.2f}，"
+            f"疲劳 {self.mean(self.fatigue_total):.2f}"
+        )
+        totals = self.totals
+        lines.append(
+            f"  每局平均：受伤 {self.mean(totals.damage):.2f}，回复 {self.mean(totals.healing):.2f}，"
+            f"消耗查克拉 {self.mean(totals.chakra_spent):.2f}，获得卷轴 {self.mean(totals.scrolls_acquired):.2f}"
+        )
+        lines.append(
+            f"  英雄灵感：平均消耗 {self.mean(self.inspiration_spent):.2f} 次，"
+            f"结束时持有率 {self.mean(self.inspiration_held):.2%}"
+        )
+        if self.strategy_hits:
+            lines.append("  策略规则命中：")
+            lines.extend(f"    {hits:>8} 次  {rule}" for rule, hits in self.strategy_hits.items())
+        if self.stats is not None:
+            lines.append(self.stats.report())
+        if self.transcript_paths:
+            lines.append(f"  事件记录 {self.transcript_records} 条，写入 {len(self.transcript_paths)} 个文件")
+        return "\n".join(lines)
+
+    def games_per_second(self) -> float:
+        return self.runs / self.elapsed if self.elapsed else 0.0
+
+
+def policy_prompt(
+    config: SimulationConfig, solver: Callable[[str], str | None] | None = None
+) -> Tuple[Prompt, List[int]]:
+    """Build a non-interactive prompt plus a counter of inspiration rerolls.
+
+    ``solver`` (the solver's table or a strategy's rules) answers before the
+    policy keywords; ``None`` from it falls through to them.
+    """
+
+    answers = POLICIES.get(config.policy, {})
+    creation = [] if config.checkpoint else ["模拟忍者", config.archetype, config.background]
+    script = [*creation, *config.script]
+    position = [0]
+    spent = [0]
+
+    def prompt_fn(question: str) -> str:
+        if position[0] < len(script):
+            answer = script[position[0]]
+            position[0] += 1
+        else:
+            answer = solver(question) if solver is not None else None
+            if answer is None:
+                answer = next(
+                    (value for key, value in answers.items() if key != "*" and key in question),
+                    answers.get("*", ""),
+                )
+        if INSPIRATION_KEY in question and answer.strip().lower() == "y":
+            spent[0] += 1
+        return answer
+
+    return prompt_fn, spent
+
+
+def _summary_phases(config: SimulationConfig) -> Tuple[str, ...]:
+    if config.checkpoint or not config.phases:
+        return PHASES
+    return tuple(phase for phase in PHASES if phase in config.phases)
+
+
+def _chain(*answerers) -> Callable[[str], str | None] | None:
+    """The first non-``None`` answer of the given ``answer`` methods, skipping absent ones."""
+
+    answers = [answerer.answer for answerer in answerers if answerer is not None]
+    if len(answers) < 2:
+        return answers[0] if answers else None
+
+    def answer(question: str) -> str | None:
+        for each in answers:
+            result = each(question)
+            if result is not None:
+                return result
+        return None
+
+    return answer
+
+
+def simulate_chunk(config: SimulationConfig, seeds: Sequence[int]) -> SimulationSummary:
+    """Play one campaign per seed without narration and summarise them."""
+
+    summary = SimulationSummary(_summary_phases(config))
+    snapshot = loads(config.checkpoint) if config.checkpoint else None
+    pipeline = campaign_pipeline().only(config.phases) if config.phases else None
+    solver = None
+    if config.policy == SOLVER_POLICY:
+        from .solver import SolverPrompt
+
+        # The solver learns each run's character and phase from a stage hook.
+        pipeline = pipeline or campaign_pipeline()
+        solver = SolverPrompt(phases=pipeline.names)
+        pipeline.add_hooks(before=solver.enter)
+    strategy = None
+    if config.strategy:
+        from .strategy import StrategyPrompt, compile_strategy
+
+        # Rule conditions read the character, which a stage hook hands over.
+        pipeline = pipeline or campaign_pipeline()
+        strategy = StrategyPrompt(compile_strategy(config.strategy))
+        pipeline.add_hooks(before=strategy.enter)
+    answer = _chain(strategy, solver)
+    metrics = Metrics() if config.metrics else None
+    stats = RunStats(summary.phases) if config.stats else None
+    overrides = nullcontext()
+    if config.dcs:
+        # Deferred like the phases themselves: ``main`` imports this module at startup.
+        from .encounters import overriding
+
+        overrides = overriding(dict(config.dcs))
+    writer = JsonlWriter(config.transcript, config.transcript_max_bytes) if config.transcript else None
+    transcript = Transcript(writer) if writer is not None else None
+    with ExitStack() as stack:
+        stack.enter_context(overrides)
+        stack.enter_context(subscribed(summary.totals))
+        if metrics is not None:
+            stack.enter_context(collecting(metrics))
+        if stats is not None:
+            stack.enter_context(tallying(stats))
+        if writer is not None:
+            stack.enter_context(writer)
+            stack.enter_context(recording(transcript))
+        for seed in seeds:
+            if transcript is not None:
+                transcript.begin(seed, policy=config.policy)
+            prompt_fn, spent = policy_prompt(config, answer)
+            if snapshot is not None:
+                result = resume_game(snapshot, prompt_fn, NULL, rng=random.Random(seed))
+            elif pipeline is not None:
+                # Counted and timed here so character creation is included, as in ``run_game``.
+                prompt_fn = metered_prompt(prompt_fn)
+                character = create_character(prompt_fn, NULL)
+                result = pipeline.run(PhaseContext(character, random.Random(seed), prompt_fn, NULL))
+            else:
+                result = run_game(seed=seed, prompt_fn=prompt_fn, out=NULL)
+            character = result.character
+            summary.runs += 1
+            for phase in result.passed:
+                summary.passes[phase] += 1
+            summary.hp_total += character.hp
+            summary.chakra_total += character.chakra
+            summary.fatigue_total += character.fatigue
+            summary.inspiration_spent += spent[0]
+            summary.inspiration_held += int(character.hero_inspiration)
+    summary.metrics = metrics
+    summary.stats = stats
+    if strategy is not None:
+        # Keep rule order rather than hit order, so reports read like the strategy.
+        hits = strategy.hits
+        summary.strategy_hits = {str(rule): hits[rule] for rule in strategy.strategy.rules if rule in hits}
+    if writer is not None:
+        summary.transcript_records = writer.records
+        summary.transcript_paths = writer.paths
+    return summary
+
+
+def simulate(
+    runs: int,
+    workers: int | None = None,
+    config: SimulationConfig = SimulationConfig(),
+    seed: int = 0,
+) -> SimulationSummary:
+    """Run ``runs`` campaigns with seeds ``seed .. seed + runs - 1`` across a process pool."""
+
+    if config.checkpoint and config.phases:
+        raise ValueError("phases cannot be combined with a checkpoint")
+    if config.checkpoint and config.policy == SOLVER_POLICY:
+        raise ValueError(f"the {SOLVER_POLICY!r} policy cannot be combined with a checkpoint")
+    if config.checkpoint and config.strategy:
+        raise ValueError("a strategy cannot be combined with a checkpoint")
+    if config.strategy:
+        from .strategy import compile_strategy
+
+        # Fail on a bad rule here rather than in every worker.
+        compile_strategy(config.strategy)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    if workers == 1:
+        summary = simulate_chunk(config, range(seed, seed + runs))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunk = max(1, runs // (workers * 4))
+        chunks = [range(start, min(start + chunk, seed + runs)) for start in range(seed, seed + runs, chunk)]
+        configs = [config] * len(chunks)
+        if config.transcript:
+            # Workers cannot share a stream; each chunk writes its own file.
+            configs = [replace(config, transcript=chunk_path(config.transcript, chunk.start)) for chunk in chunks]
+        summary = SimulationSummary(_summary_phases(config))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for partial in pool.map(simulate_chunk, configs, chunks):
+                summary.merge(partial)
+    summary.elapsed = time.perf_counter() - started
+    return summary
@@ -0,0 +1,325 @@
+"""Promotion-maximising answers for every campaign prompt.
+
+:func:`solve` compiles the :mod:`game.analytic` programs for one character
+into a decision graph. Every step reachable from the starting state is
+expanded once. Its chance branches are merged into a distribution over the
+next steps and prompts, so a prompt's options become small outcome tables.
+States are projected onto the fields the rest of the campaign still reads
+(prelims and finals never read chakra, fatigue or scrolls). Programs only
+jump forward, so the graph has no cycles: values are computed
+children-first, and the chance of reaching each node parents-first.
+
+Backward induction over the graph gives the best promotion chance for a
+player who always knows exactly where in the program they stand
+(:attr:`Solution.bound`). A prompt only sees the phase it is played in, the
+question and the live character, so the answers are kept in a table keyed by
+``(phase, question, State)``. The table starts from the optimal answers,
+weighted by how often optimal play reaches each prompt. It is then improved
+by policy iteration: each key takes the answer with the best reach-weighted
+value under the current table, until nothing changes. The best table found
+and its exact promotion chance make up the :class:`Solution`. Every prompt
+in the graph has a key, so the table answers anywhere the campaign can go.
+
+:class:`SolverPrompt` answers from the table with one dict lookup. It learns
+the character and the phase from a :class:`~game.dm.Pipeline` before-hook;
+anything else, such as character creation, goes to a fallback prompt.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Mapping, Tuple
+
+from .analytic import PHASES, PROGRAMS, SHIFT_INVARIANT, Decide, Done, Goto, Profile, State, Transition
+from .character import Character
+from .dm import PhaseContext
+from .encounters import dc_overrides
+from .phases.forest import ACTION_QUESTION, SET_PIECE_QUESTION
+from .prompt import Prompt
+
+
+# The answer a phase treats as "none of the options" for each question.
+DEFAULT_ANSWERS: Dict[str, str] = {SET_PIECE_QUESTION: "s", ACTION_QUESTION: "e"}
+# Answers whose values are closer than this tie; ties keep the earlier answer.
+TIE = 1e-12
+# Policy iteration on a shared table can cycle; it stops once this many
+# rounds in a row fail to beat the best table so far.
+PATIENCE = 2
+
+Key = Tuple[str, str, State]
+# Graph nodes are indices into ``DecisionGraph.nodes``, or one of these two ends.
+PROMOTED, FAILED = -1, -2
+Outcome = Dict[int, float]
+
+
+@dataclass(frozen=True)
+class Solution:
+    phases: Tuple[str, ...]
+    table: Mapping[Key, str]
+    # State fields zeroed before looking a phase's prompts up in ``table``.
+    ignored: Mapping[str, Mapping[str, int]]
+    # Exact chance of clearing each phase when answering from ``table``.
+    passed: Mapping[str, float] = field(default_factory=dict)
+    # Promotion chance with full knowledge of the program position.
+    bound: float = 0.0
+
+    @property
+    def promotion(self) -> float:
+        return self.passed[self.phases[-1]]
+
+    def answer(self, phase: str, question: str, state: State) -> str | None:
+        ignored = self.ignored.get(phase)
+        if ignored:
+            state = state._replace(**ignored)
+        return self.table.get((phase, question, state))
+
+    def report(self) -> str:
+        lines = []
+        reached = 1.0
+        for phase in self.phases:
+            passed = self.passed[phase]
+            rate = passed / reached if reached else 0.0
+            lines.append(f"  {phase:<8} 到达 {reached:6.2%}  通过 {passed:6.2%}  （条件通过率 {rate:6.2%}）")
+            reached = passed
+        lines.append(f"  查表 {len(self.table)} 项；完全知晓所处位置时的晋升上界 {self.bound:6.2%}")
+        return "\n".join(lines)
+
+
+class DecisionGraph:
+    """Steps and prompts reachable from one state, as one node list.
+
+    A step node has a single outcome; a prompt node has one outcome per
+    answer, the phase default first. ``index`` holds each node's position in
+    ``phases`` and ``keys`` each prompt node's table key.
+    """
+
+    def __init__(self, profile: Profile, phases: Tuple[str, ...]) -> None:
+        self.profile = profile
+        self.phases = phases
+        self.starts = [next(iter(PROGRAMS[phase])) for phase in phases]
+        self.ignored = [
+            {name: 0 for name in State._fields if all(name in SHIFT_INVARIANT.get(later, ()) for later in phases[index:])}
+            for index in range(len(phases))
+        ]
+        self.ids: Dict[Tuple[int, str, Tuple[int, ...], State], int] = {}
+        self.nodes: List[List[Tuple[str, Outcome]]] = []
+        self.index: List[int] = []
+        self.keys: List[Key | None] = []
+        self.prompts: Dict[Tuple, int] = {}
+        self.pending: List[Tuple[int, Tuple[int, str, Tuple[int, ...], State]]] = []
+
+    def step(self, index: int, label: str, regs: Tuple[int, ...], state: State) -> int:
+        if self.ignored[index]:
+            state = state._replace(**self.ignored[index])
+        key = (index, label, regs, state)
+        node = self.ids.get(key)
+        if node is None:
+            node = self.ids[key] = len(self.nodes)
+            self.nodes.append([])
+            self.index.append(index)
+            self.keys.append(None)
+            self.pending.append((node, key))
+        return node
+
+    def expand(self, state: State) -> int:
+        root = self.step(0, self.starts[0], (), state)
+        while self.pending:
+            node, (index, label, regs, current) = self.pending.pop()
+            transition = PROGRAMS[self.phases[index]][label](self.profile, current, regs)
+            self.nodes[node] = [("", self.collapse(index, transition))]
+        return root
+
+    def collapse(self, index: int, transition: Transition) -> Outcome:
+        if isinstance(transition, Goto):
+            return {self.step(index, transition.label, transition.regs, transition.state): 1.0}
+        if isinstance(transition, Done):
+            if not transition.passed:
+                return {FAILED: 1.0}
+            if index + 1 == len(self.phases):
+                return {PROMOTED: 1.0}
+            return {self.step(index + 1, self.starts[index + 1], (), transition.state): 1.0}
+        if isinstance(transition, Decide):
+            options = [(DEFAULT_ANSWERS.get(transition.question, "n"), transition.otherwise)]
+            options.extend(transition.options.items())
+            collapsed = [(answer, self.collapse(index, target)) for answer, target in options]
+            # Identical prompts reached along different paths share one node.
+            key = (self.phases[index], transition.question, transition.state)
+            shape = (key, tuple((answer, tuple(sorted(outcome.items()))) for answer, outcome in collapsed))
+            node = self.prompts.get(shape)
+            if node is None:
+                node = self.prompts[shape] = len(self.nodes)
+                self.nodes.append(collapsed)
+                self.index.append(index)
+                self.keys.append(key)
+            return {node: 1.0}
+        merged: Outcome = defaultdict(float)
+        for q, branch in transition.branches:
+            for target, p in self.collapse(index, branch).items():
+                merged[target] += q * p
+        return merged
+
+    def order(self, root: int) -> List[int]:
+        """Nodes reachable from ``root``, every parent before its children."""
+
+        seen, post, stack = set(), [], [(root, False)]
+        while stack:
+            node, done = stack.pop()
+            if done:
+                post.append(node)
+                continue
+            if node < 0 or node in seen:
+                continue
+            seen.add(node)
+            stack.append((node, True))
+            for _, outcome in self.nodes[node]:
+                stack.extend((child, False) for child in outcome)
+        post.reverse()
+        return post
+
+
+def _expected(outcome: Outcome, values: Dict[int, float]) -> float:
+    return sum(p * values[target] for target, p in outcome.items())
+
+
+def node_values(graph: DecisionGraph, order: List[int], choice) -> Dict[int, float]:
+    """Node values when prompt ``node`` takes option ``choice(node, values)``."""
+
+    values = {PROMOTED: 1.0, FAILED: 0.0}
+    for node in reversed(order):
+        values[node] = _expected(graph.nodes[node][choice(node, values)][1], values)
+    return values
+
+
+def _reach(graph: DecisionGraph, order: List[int], root: int, picks: Mapping[int, int]) -> Dict[int, float]:
+    reach: Dict[int, float] = defaultdict(float)
+    reach[root] = 1.0
+    for node in order:
+        p = reach[node]
+        if p:
+            for target, q in graph.nodes[node][picks.get(node, 0)][1].items():
+                reach[target] += p * q
+    return reach
+
+
+def _best(options: List[Tuple[str, Outcome]], values: Dict[int, float], current: int = 0) -> int:
+    scores = [_expected(outcome, values) for _, outcome in options]
+    for position, score in enumerate(scores):
+        if score > scores[current] + TIE:
+            current = position
+    return current
+
+
+@lru_cache(maxsize=None)
+def _solve(profile: Profile, state: State, phases: Tuple[str, ...], dcs: Tuple[Tuple[str, int], ...]) -> Solution:
+    # ``dcs`` only keys the cache: the programs read the overridden content.
+    graph = DecisionGraph(profile, phases)
+    root = graph.expand(state)
+    order = graph.order(root)
+    prompts: Dict[Key, List[int]] = defaultdict(list)
+    for node in order:
+        if graph.keys[node] is not None:
+            prompts[graph.keys[node]].append(node)
+
+    optimal: Dict[int, int] = {}
+
+    def best(node: int, values: Dict[int, float]) -> int:
+        if graph.keys[node] is None:
+            return 0
+        optimal[node] = _best(graph.nodes[node], values)
+        return optimal[node]
+
+    full = node_values(graph, order, best)
+
+    def improve(picks: Mapping[int, int], values: Dict[int, float], reach: Mapping[int, float]) -> Dict[Key, str]:
+        table = {}
+        for key, nodes in prompts.items():
+            weights = [reach.get(node, 0.0) for node in nodes]
+            if not any(weights):
+                weights = [1.0] * len(nodes)
+            # One pooled prompt whose options sum the nodes' weighted outcomes.
+            options = []
+            for position, (answer, _) in enumerate(graph.nodes[nodes[0]]):
+                pooled = defaultdict(float)
+                for node, weight in zip(nodes, weights):
+                    for target, p in graph.nodes[node][position][1].items():
+                        pooled[target] += weight * p
+                options.append((answer, pooled))
+            table[key] = options[_best(options, values, picks.get(nodes[0], 0))][0]
+        return table
+
+    def picks_for(table: Mapping[Key, str]) -> Dict[int, int]:
+        return {
+            node: [answer for answer, _ in graph.nodes[node]].index(table[key])
+            for key, nodes in prompts.items()
+            for node in nodes
+        }
+
+    # Start from the full-knowledge answers, weighted by how often optimal play meets them.
+    table = improve({}, full, _reach(graph, order, root, optimal))
+    best_table, best_values, best_reach = table, None, None
+    stale = 0
+    while stale < PATIENCE:
+        picks = picks_for(table)
+        values = node_values(graph, order, lambda node, _: picks.get(node, 0))
+        reach = _reach(graph, order, root, picks)
+        if best_values is None or values[root] > best_values[root] + TIE:
+            best_table, best_values, best_reach = table, values, reach
+            stale = 0
+        else:
+            stale += 1
+        following = improve(picks, values, reach)
+        if following == table:
+            break
+        table = following
+
+    entered = defaultdict(float)
+    for (index, label, regs, _), node in graph.ids.items():
+        if label == graph.starts[index] and not regs:
+            entered[index] += best_reach.get(node, 0.0)
+    passed = {phase: entered[index + 1] for index, phase in enumerate(phases[:-1])}
+    passed[phases[-1]] = best_reach.get(PROMOTED, 0.0)
+    ignored = {phase: graph.ignored[index] for index, phase in enumerate(phases)}
+    return Solution(tuple(phases), best_table, ignored, passed, full[root])
+
+
+def solve(character: Character, phases: Tuple[str, ...] = PHASES) -> Solution:
+    """Best answers for ``character`` playing ``phases`` in order from its current state."""
+
+    return _solve(
+        Profile.from_character(character), State.from_character(character), tuple(phases), dc_overrides.get()
+    )
+
+
+class SolverPrompt:
+    """A :data:`~game.prompt.Prompt` that answers from :func:`solve`'s table.
+
+    Register :meth:`enter` as a pipeline before-hook: the first stage it sees
+    solves the rest of the pipeline for that stage's character, and every
+    stage tells it which phase's prompts come next. Until then, and for
+    questions the table does not cover, ``fallback`` answers, or ``""``
+    (each phase's default) when there is none.
+    """
+
+    def __init__(self, fallback: Prompt | None = None, phases: Tuple[str, ...] = PHASES) -> None:
+        self.fallback = fallback
+        self.phases = phases
+        self.solution: Solution | None = None
+        self.character: Character | None = None
+        self.phase = ""
+
+    def enter(self, phase: str, context: PhaseContext) -> None:
+        if context.character is not self.character:
+            self.character = context.character
+            self.solution = solve(context.character, self.phases[self.phases.index(phase) :])
+        self.phase = phase
+
+    def answer(self, question: str) -> str | None:
+        if self.solution is None:
+            return None
+        return self.solution.answer(self.phase, question, State.from_character(self.character))
+
+    def __call__(self, question: str) -> str:
+        answer = self.answer(question)
+        if answer is not None:
+            return answer
+        return self.fallback(question) if self.fallback is not None else ""
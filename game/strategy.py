@@ -0,0 +1,246 @@
+"""Answer strategies written as ordered rules and compiled once.
+
+A strategy is plain text with one rule per line (``;`` also separates rules
+and ``#`` starts a comment)::
+
+    @inspiration if hp <= 4 -> y
+    英雄灵感 if inspiration and fatigue >= 3 -> y
+    /追击|潜伏/ -> s
+    @action if hp < 6 -> r
+    * -> y
+
+A rule names the questions it covers, optional conditions and the answer.
+Questions are named as follows:
+
+* ``@key``: one of :data:`KEYS`, matching that exact question;
+* ``/regex/``: a regular expression searched for in the question;
+* ``*``: every question;
+* anything else: a keyword contained in the question, like
+  :data:`game.simulate.POLICIES`.
+
+Conditions are joined with ``and``. Each is ``hp``, ``chakra``, ``fatigue`` or
+``scrolls`` compared with an integer (``<``, ``<=``, ``>``, ``>=``, ``==``,
+``!=``), or ``inspiration`` / ``not inspiration``. They read the
+:class:`~game.analytic.State` of the character being asked. The first rule
+whose question and conditions match gives the answer, and that rule explains
+the answer.
+
+Compiling turns each rule's conditions into one Python expression. The
+candidate rules for a question are found once per distinct question and then
+cached. Rules after an unconditional match are dropped, so answering is a dict
+lookup plus a few comparisons. :func:`compile_strategy` is memoised on the
+text, so a worker compiles each strategy once however many games it plays.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple
+
+from .analytic import Policy, State
+from .dice import INSPIRATION_QUESTION
+from .phases.exam import CHEAT_QUESTION, DECLARATION_QUESTION
+from .phases.finals import DEFENSE_QUESTION
+from .phases.forest import ACTION_QUESTION, SET_PIECE_QUESTION
+from .phases.prelims import SOLO_QUESTION
+from .transcript import active_transcript
+
+if TYPE_CHECKING:
+    from .character import Character
+    from .dm import PhaseContext
+    from .prompt import Prompt
+
+
+KEYS: Dict[str, str] = {
+    "inspiration": INSPIRATION_QUESTION,
+    "cheat": CHEAT_QUESTION,
+    "declare": DECLARATION_QUESTION,
+    "set_piece": SET_PIECE_QUESTION,
+    "action": ACTION_QUESTION,
+    "solo": SOLO_QUESTION,
+    "defense": DEFENSE_QUESTION,
+}
+FIELDS = ("hp", "chakra", "fatigue", "scrolls")
+OPERATORS = ("<=", ">=", "==", "!=", "<", ">")
+_COMPARISON = re.compile(rf"({'|'.join(FIELDS)})\s*({'|'.join(OPERATORS)})\s*(-?\d+)")
+
+
+@dataclass(frozen=True)
+class Rule:
+    line: int
+    text: str
+    # ``"key"``, ``"regex"``, ``"keyword"`` or ``"any"``.
+    kind: str
+    pattern: str
+    # Python source of the conditions over ``state``; empty when there are none.
+    condition: str
+    answer: str
+
+    def covers(self, question: str) -> bool:
+        if self.kind == "key":
+            return question == KEYS[self.pattern]
+        if self.kind == "regex":
+            return re.search(self.pattern, question) is not None
+        return self.kind == "any" or self.pattern in question
+
+    def __str__(self) -> str:
+        return f"第 {self.line} 行：{self.text}"
+
+
+Candidates = Tuple[Tuple[Rule, Callable[[State], bool] | None], ...]
+
+
+def _condition(text: str, where: str) -> str:
+    terms = []
+    for term in re.split(r"\s+and\s+", text.strip()):
+        term = term.strip()
+        match = _COMPARISON.fullmatch(term)
+        if match:
+            name, operator, value = match.groups()
+            terms.append(f"state.{name} {operator} {int(value)}")
+        elif term in ("inspiration", "not inspiration"):
+            terms.append(f"state.{term}" if term == "inspiration" else "not state.inspiration")
+        else:
+            raise ValueError(f"{where}：无法识别的条件 {term!r}")
+    return " and ".join(terms)
+
+
+def _rule(line: int, text: str) -> Rule:
+    where = f"第 {line} 行"
+    head, arrow, answer = text.rpartition("->")
+    if not arrow or not head.strip():
+        raise ValueError(f"{where}：规则应为 问题 [if 条件] -> 回答：{text!r}")
+    pattern, _, conditions = head.partition(" if ")
+    pattern = pattern.strip()
+    if pattern == "*":
+        kind = "any"
+    elif pattern.startswith("@"):
+        kind, pattern = "key", pattern[1:]
+        if pattern not in KEYS:
+            raise ValueError(f"{where}：未知的问题名 @{pattern}，可选 {', '.join('@' + key for key in KEYS)}")
+    elif len(pattern) > 1 and pattern.startswith("/") and pattern.endswith("/"):
+        kind, pattern = "regex", pattern[1:-1]
+        try:
+            re.compile(pattern)
+        except re.error as error:
+            raise ValueError(f"{where}：正则表达式有误：{error}") from None
+    else:
+        kind = "keyword"
+    condition = _condition(conditions, where) if conditions.strip() else ""
+    return Rule(line, text, kind, pattern, condition, answer.strip())
+
+
+class Strategy:
+    """Compiled rules; see the module docstring for the language."""
+
+    def __init__(self, rules: Tuple[Rule, ...]) -> None:
+        self.rules = rules
+        self.tests: Dict[Rule, Callable[[State], bool]] = {
+            rule: eval(f"lambda state: {rule.condition}", {"__builtins__": {}}) for rule in rules if rule.condition
+        }
+        self.reads_state = bool(self.tests)
+        self._candidates: Dict[str, Candidates] = {}
+
+    def candidates(self, question: str) -> Candidates:
+        """Rules that may answer ``question``, in order, each with its test."""
+
+        found = self._candidates.get(question)
+        if found is None:
+            matching: List[Tuple[Rule, Callable[[State], bool] | None]] = []
+            for rule in self.rules:
+                if rule.covers(question):
+                    test = self.tests.get(rule)
+                    matching.append((rule, test))
+                    if test is None:
+                        break
+            found = self._candidates[question] = tuple(matching)
+        return found
+
+    def explain(self, question: str, state: State | Callable[[], State]) -> Rule | None:
+        """The rule that answers ``question`` in ``state``, or ``None``.
+
+        ``state`` may be a function, called only if a condition needs it.
+        """
+
+        for rule, test in self.candidates(question):
+            if test is None:
+                return rule
+            if not isinstance(state, State):
+                state = state()
+            if test(state):
+                return rule
+        return None
+
+    def answer(self, question: str, state: State | Callable[[], State]) -> str | None:
+        rule = self.explain(question, state)
+        return rule.answer if rule is not None else None
+
+    def policy(self, fallback: Policy | None = None) -> Policy:
+        """An :data:`~game.analytic.Policy` for exact odds; unmatched questions go to ``fallback``."""
+
+        def policy(question: str, state: State) -> str:
+            answer = self.answer(question, state)
+            if answer is not None:
+                return answer
+            return fallback(question, state) if fallback is not None else ""
+
+        policy.reads_state = self.reads_state or getattr(fallback, "reads_state", False)
+        return policy
+
+
+@lru_cache(maxsize=256)
+def compile_strategy(text: str) -> Strategy:
+    """Parse and compile ``text``; raises :class:`ValueError` naming the bad line."""
+
+    rules = []
+    for number, line in enumerate(text.splitlines(), 1):
+        for part in line.split("#", 1)[0].split(";"):
+            if part.strip():
+                rules.append(_rule(number, part.strip()))
+    if not rules:
+        raise ValueError("策略中没有任何规则")
+    return Strategy(tuple(rules))
+
+
+def load_strategy(path: str) -> Strategy:
+    with open(path, encoding="utf-8") as handle:
+        return compile_strategy(handle.read())
+
+
+class StrategyPrompt:
+    """A :data:`~game.prompt.Prompt` that answers from a :class:`Strategy`.
+
+    Register :meth:`enter` as a pipeline before-hook so conditions can read
+    the character. ``hits`` counts the answers given by each rule. With an
+    active transcript, each answer is recorded with the rule behind it.
+    """
+
+    def __init__(self, strategy: Strategy, fallback: "Prompt | None" = None) -> None:
+        self.strategy = strategy
+        self.fallback = fallback
+        self.character: "Character | None" = None
+        self.hits: Dict[Rule, int] = {}
+
+    def enter(self, phase: str, context: "PhaseContext") -> None:
+        self.character = context.character
+
+    def _state(self) -> State:
+        if self.character is None:
+            raise ValueError("策略条件需要角色状态：请先把 enter 注册为 Pipeline 前置钩子")
+        return State.from_character(self.character)
+
+    def answer(self, question: str) -> str | None:
+        rule = self.strategy.explain(question, self._state)
+        if rule is None:
+            return None
+        self.hits[rule] = self.hits.get(rule, 0) + 1
+        transcript = active_transcript.get()
+        if transcript is not None:
+            transcript.record("answer", question=question, answer=rule.answer, line=rule.line, rule=rule.text)
+        return rule.answer
+
+    def __call__(self, question: str) -> str:
+        answer = self.answer(question)
+        if answer is not None:
+            return answer
+        return self.fallback(question) if self.fallback is not None else ""
@@ -0,0 +1,151 @@
+"""Weighted random tables sampled in constant time with Walker's alias method.
+
+A :class:`WeightedTable` holds :class:`TableEntry` rows with positive integer
+or fractional weights. Sampling picks one column uniformly with
+``rng.randint(1, n)`` and, only when that column is shared with an alias,
+breaks the tie with ``rng.randrange(total)``. All arithmetic is integral, so
+the sampled frequencies are exactly the weights, and a table whose weights
+are all equal consumes the generator exactly like ``rng.randint(1, n)``.
+That is how the forest patrol d6 keeps its historical streams.
+
+An entry's value may itself be a :class:`WeightedTable`; sampling descends
+into it and :meth:`WeightedTable.probabilities` multiplies through. An entry
+may also carry a ``when`` predicate over a caller-supplied subject (the
+encounter code passes ``(hp, chakra, fatigue, inspiration, scrolls)``);
+entries whose predicate fails are dropped and the remaining weights are
+renormalised. Alias columns are built once per distinct set of active
+entries and cached.
+"""
+
+import random
+from dataclasses import dataclass
+from fractions import Fraction
+from math import lcm
+from typing import Callable, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+Predicate = Callable[[object], bool]
+
+
+@dataclass(frozen=True)
+class TableEntry(Generic[T]):
+    value: "T | WeightedTable[T]"
+    weight: int | Fraction = 1
+    when: Optional[Predicate] = None
+
+
+class _Alias:
+    """Alias columns for one fixed set of weighted entries."""
+
+    __slots__ = ("entries", "total", "threshold", "alias", "uniform")
+
+    def __init__(self, entries: Tuple[TableEntry, ...]) -> None:
+        if not entries:
+            raise ValueError("no table entry applies")
+        weights = [Fraction(entry.weight) for entry in entries]
+        scale = lcm(*(weight.denominator for weight in weights))
+        counts = [int(weight * scale) for weight in weights]
+        size = len(counts)
+        total = sum(counts)
+        # Each column holds ``total`` units; entry i contributes counts[i] * size.
+        scaled = [count * size for count in counts]
+        threshold = [total] * size
+        alias = list(range(size))
+        small = [i for i, units in enumerate(scaled) if units < total]
+        large = [i for i, units in enumerate(scaled) if units >= total]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            threshold[low] = scaled[low]
+            alias[low] = high
+            scaled[high] -= total - scaled[low]
+            (small if scaled[high] < total else large).append(high)
+        self.entries = entries
+        self.total = total
+        self.threshold = threshold
+        self.alias = alias
+        self.uniform = len(set(counts)) == 1
+
+    def pick(self, rng: random.Random) -> TableEntry:
+        column = rng.randint(1, len(self.entries)) - 1
+        if self.uniform or self.threshold[column] == self.total:
+            return self.entries[column]
+        if rng.randrange(self.total) < self.threshold[column]:
+            return self.entries[column]
+        return self.entries[self.alias[column]]
+
+
+class WeightedTable(Generic[T]):
+    """Constant-time weighted choice with nested tables and conditional rows."""
+
+    def __init__(self, entries: Iterable[TableEntry[T]]) -> None:
+        self.entries: Tuple[TableEntry[T], ...] = tuple(entries)
+        for entry in self.entries:
+            if Fraction(entry.weight) <= 0:
+                raise ValueError(f"table weights must be positive, got {entry.weight!r}")
+        self._conditional = tuple(i for i, entry in enumerate(self.entries) if entry.when is not None)
+        self._reads_subject = bool(self._conditional) or any(
+            isinstance(entry.value, WeightedTable) and entry.value.conditional for entry in self.entries
+        )
+        self._columns: Dict[Tuple[bool, ...], _Alias] = {}
+        if not self._conditional:
+            self._columns[()] = _Alias(self.entries)
+
+    @classmethod
+    def uniform(cls, values: Iterable[T]) -> "WeightedTable[T]":
+        return cls(TableEntry(value) for value in values)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def conditional(self) -> bool:
+        """Whether any row, nested ones included, has a ``when`` predicate that reads the subject."""
+
+        return self._reads_subject
+
+    def _active(self, subject: object) -> _Alias:
+        if not self._conditional:
+            return self._columns[()]
+        key = tuple(self.entries[i].when(subject) for i in self._conditional)
+        columns = self._columns.get(key)
+        if columns is None:
+            flags = dict(zip(self._conditional, key))
+            active = tuple(entry for i, entry in enumerate(self.entries) if flags.get(i, True))
+            columns = self._columns[key] = _Alias(active)
+        return columns
+
+    def sample(self, rng: random.Random, subject: object = None) -> T:
+        """Draw one value; nested tables are sampled with the same subject."""
+
+        value = self._active(subject).pick(rng).value
+        if isinstance(value, WeightedTable):
+            return value.sample(rng, subject)
+        return value
+
+    def probabilities(self, subject: object = None) -> Dict[T, Fraction]:
+        """Exact chance of each leaf value for ``subject``, in first-seen order."""
+
+        columns = self._active(subject)
+        total = sum(Fraction(entry.weight) for entry in columns.entries)
+        chances: Dict[T, Fraction] = {}
+        for entry in columns.entries:
+            share = Fraction(entry.weight) / total
+            if isinstance(entry.value, WeightedTable):
+                nested = entry.value.probabilities(subject)
+            else:
+                nested = {entry.value: Fraction(1)}
+            for value, chance in nested.items():
+                chances[value] = chances.get(value, Fraction(0)) + share * chance
+        return chances
+
+    def values(self) -> List[T]:
+        """Every leaf value, ignoring conditions."""
+
+        leaves: List[T] = []
+        for entry in self.entries:
+            if isinstance(entry.value, WeightedTable):
+                leaves.extend(entry.value.values())
+            else:
+                leaves.append(entry.value)
+        return leaves
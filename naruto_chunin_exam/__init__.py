@@ -0,0 +1 @@
+"""Legacy single-file adventure; importable so tools in ``game`` can drive its ``DM``."""
@@ -19,14 +19,19 @@ python3 naruto_chunin_exam/naruto_game.py
 随后进入考试流程。建议在终端窗口运行，以获得良好的输入提示。
 """
 
+import hashlib
+import json
+import marshal
+import os
 import random
 from dataclasses import dataclass, field
-from typing import Dict, List, Set, Tuple
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 
-def roll_die(sides: int = 20) -> int:
-    """掷一个拥有给定面数的骰子。"""
-    return random.randint(1, sides)
+def roll_die(sides: int = 20, rng: Optional[random.Random] = None) -> int:
+    """掷一个拥有给定面数的骰子；未指定 rng 时使用全局 random。"""
+    return (rng or random).randint(1, sides)
 
 
 def ability_modifier(score: int) -> int:
@@ -36,6 +41,121 @@ def ability_modifier(score: int) -> int:
 
 ABILITIES = ["力量", "敏捷", "体质", "智力", "感知", "魅力"]
 
+# 死亡森林随机事件的内容文件，以及按内容哈希命名的编译缓存目录
+EVENTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "forest_events.json")
+EVENTS_CACHE_DIR = os.path.join(os.path.dirname(EVENTS_PATH), "__pycache__")
+EVENTS_CACHE_VERSION = 2
+
+
+def _compile_event_steps(steps: list) -> tuple:
+    """把 JSON 事件步骤编译成 (操作, 参数...) 元组，便于 marshal 缓存。"""
+    compiled = []
+    for step in steps:
+        if "check" in step:
+            if step["check"] not in ABILITIES:
+                raise ValueError(f"未知属性：{step['check']!r}")
+            compiled.append((
+                "check",
+                step["check"],
+                int(step["dc"]),
+                _compile_event_steps(step.get("success", [])),
+                _compile_event_steps(step.get("failure", [])),
+            ))
+        elif "choose" in step:
+            options = tuple((option, _compile_event_steps(body)) for option, body in step["options"].items())
+            compiled.append(("choose", step["choose"], options))
+        elif "narrate" in step:
+            compiled.append(("narrate", step["narrate"]))
+        elif "scroll" in step:
+            compiled.append(("scroll", tuple(step["scroll"])))
+        elif "damage" in step:
+            low, high = step["damage"]
+            compiled.append(("damage", int(low), int(high)))
+        elif "fatigue" in step or "inspiration" in step:
+            op = "fatigue" if "fatigue" in step else "inspiration"
+            compiled.append((op, int(step[op])))
+        else:
+            raise ValueError(f"无法识别的事件步骤：{step!r}")
+    return tuple(compiled)
+
+
+def _event_weight(event: dict) -> int:
+    weight = event.get("weight", 1)
+    if not isinstance(weight, int) or isinstance(weight, bool) or weight <= 0:
+        raise ValueError(f"事件 {event.get('name', '?')!r} 的权重必须是正整数：{weight!r}")
+    return weight
+
+
+@lru_cache(maxsize=None)
+def load_forest_events() -> tuple:
+    """首次进入森林事件时才读取内容；同一内容哈希的编译结果直接从缓存载入。
+
+    返回 ((权重, 编译后的步骤), ...)，顺序与文件一致。
+    """
+    with open(EVENTS_PATH, "rb") as handle:
+        source = handle.read()
+    digest = hashlib.sha256(source).hexdigest()[:16]
+    # 文件名带上编译格式版本，旧格式的缓存不会被误读
+    cache_path = os.path.join(EVENTS_CACHE_DIR, f"forest_events.v{EVENTS_CACHE_VERSION}.{digest}.bin")
+    try:
+        with open(cache_path, "rb") as handle:
+            return marshal.load(handle)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    events = tuple(
+        (_event_weight(event), _compile_event_steps(event["steps"])) for event in json.loads(source)["events"]
+    )
+    try:
+        os.makedirs(EVENTS_CACHE_DIR, exist_ok=True)
+        staging = f"{cache_path}.{os.getpid()}.tmp"
+        with open(staging, "wb") as handle:
+            marshal.dump(events, handle)
+        os.replace(staging, cache_path)
+    except OSError:
+        pass  # 只读目录下每次重新编译即可
+    return events
+
+
+class AliasTable:
+    """Walker 别名表：按正整数权重在常数时间内抽取。
+
+    先用 randint(1, n) 选列，只有该列与别名共用时才再用 randrange(总权重) 决定，
+    所以权重全部相等时与 randint(1, n) 的抽取完全一致。本脚本只依赖标准库，
+    这里保留一份与 game.tables 相同构造的精简实现。
+    """
+
+    def __init__(self, entries: Tuple[Tuple[int, object], ...]) -> None:
+        if not entries:
+            raise ValueError("别名表至少需要一项")
+        self.values = [value for _, value in entries]
+        counts = [weight for weight, _ in entries]
+        size = len(counts)
+        self.total = total = sum(counts)
+        # 每列容纳 total 份，第 i 项贡献 counts[i] * size 份
+        scaled = [count * size for count in counts]
+        self.threshold = [total] * size
+        self.alias = list(range(size))
+        small = [i for i, units in enumerate(scaled) if units < total]
+        large = [i for i, units in enumerate(scaled) if units >= total]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            self.threshold[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] -= total - scaled[low]
+            (small if scaled[high] < total else large).append(high)
+
+    def sample(self, rng: random.Random) -> object:
+        column = rng.randint(1, len(self.values)) - 1
+        if self.threshold[column] == self.total or rng.randrange(self.total) < self.threshold[column]:
+            return self.values[column]
+        return self.values[self.alias[column]]
+
+
+@lru_cache(maxsize=None)
+def forest_event_table() -> AliasTable:
+    """按权重抽取森林事件的别名表；权重全部相等时与 randint(1, 事件数) 的抽取完全一致。"""
+    return AliasTable(load_forest_events())
+
 
 @dataclass
 class Character:
@@ -55,9 +175,9 @@ class Character:
             standard_array = [16, 14, 13, 12, 10, 8]
             self.stats = {ability: score for ability, score in zip(ABILITIES, standard_array)}
 
-    def make_check(self, ability: str, dc: int) -> Tuple[bool, int]:
+    def make_check(self, ability: str, dc: int, rng: Optional[random.Random] = None) -> Tuple[bool, int]:
         """进行一次属性检定并返回是否成功和总点数。"""
-        base = roll_die()
+        base = roll_die(rng=rng)
         total = base + ability_modifier(self.stats.get(ability, 10)) - self.fatigue
         success = total >= dc
         return success, total
@@ -78,7 +198,13 @@ class Character:
 class DM:
     """自动 DM 类，控制故事流程和检定。"""
 
-    def __init__(self, players: List[Character]):
+    def __init__(
+        self,
+        players: List[Character],
+        rng: Optional[random.Random] = None,
+        choose: Optional[Callable[[str, List[str]], str]] = None,
+        emit: Optional[Callable[[str], None]] = None,
+    ):
         # 补充 NPC 使队伍达到 3 人
         npc_names = ["佐井", "雏田", "李洛克", "志乃", "天天"]
         while len(players) < 3:
@@ -86,25 +212,35 @@ class DM:
             players.append(Character(name=npc_name))
         self.players = players
         self.day = 1  # 死亡森林中当前天数
+        # 所有掷骰都经由 self.rng，便于固定种子、录制与回放；默认沿用全局 random
+        self.rng = rng if rng is not None else random
+        # choose(提问, 选项) 代替键盘输入，emit 代替 print；两者都注入后即可无人值守地运行
+        self.choose = choose
+        self.emit = emit if emit is not None else print
 
     def narrate(self, text: str) -> None:
         """输出叙述文字并分隔。"""
-        print("\n" + text)
-        print("-" * len(text))
+        self.emit("\n" + text)
+        self.emit("-" * len(text))
 
     def prompt_choice(self, prompt: str, choices: List[str]) -> str:
         """提示玩家在多个选项中做出选择。"""
-        print(prompt)
+        if self.choose is not None:
+            answer = self.choose(prompt, choices)
+            if answer not in choices:
+                raise ValueError(f"选择策略返回了无效选项：{answer!r}")
+            return answer
+        self.emit(prompt)
         for idx, choice in enumerate(choices, 1):
-            print(f"  {idx}. {choice}")
+            self.emit(f"  {idx}. {choice}")
         while True:
             try:
                 selection = int(input("请输入选项编号: "))
                 if 1 <= selection <= len(choices):
                     return choices[selection - 1]
-                print("输入无效，请重新选择。")
+                self.emit("输入无效，请重新选择。")
             except ValueError:
-                print("请输入数字。")
+                self.emit("请输入数字。")
 
     def stage_intro(self) -> None:
         """开始阶段：介绍背景并组队。"""
@@ -130,7 +266,7 @@ class DM:
             )
             if action.startswith("是"):
                 # 作弊需要敏捷检定，失败则失去灵感或受罚
-                success, total = ch.make_check("敏捷", 13)
+                success, total = ch.make_check("敏捷", 13, self.rng)
                 if success:
                     self.narrate(f"你身手矫健，没有被监考发现，检定结果 {total} >= 13。你顺利抄到了答案。")
                 else:
@@ -139,7 +275,7 @@ class DM:
                         ch.inspiration -= 1
             else:
                 # 知识检定难度 15
-                success, total = ch.make_check("智力", 15)
+                success, total = ch.make_check("智力", 15, self.rng)
                 if success:
                     self.narrate(f"你凭借扎实的知识顺利答题，检定结果 {total} >= 15。")
                 else:
@@ -150,7 +286,7 @@ class DM:
                             "是否消耗英雄灵感重掷？", ["是", "否"],
                         )
                         if use_insp == "是" and ch.spend_inspiration():
-                            success, total = ch.make_check("智力", 15)
+                            success, total = ch.make_check("智力", 15, self.rng)
                             if success:
                                 self.narrate(f"重掷后成功！你获得了 {total}，通过了检定。")
                             else:
@@ -177,105 +313,34 @@ class DM:
                 ch.winner = False
 
     def random_forest_event(self, ch: Character) -> None:
-        """根据随机结果触发森林中的事件。"""
-        roll = random.randint(1, 6)
-        if roll == 1:
-            # 友军遭遇
-            self.narrate(
-                f"{ch.name} 遇到了一支友方队伍，可以进行交流。"
-            )
-            choice = self.prompt_choice(
-                "你想要做什么？", ["交换情报和物资", "避免接触继续前进"],
-            )
-            if choice.startswith("交换"):
-                success, total = ch.make_check("魅力", 12)
-                if success:
-                    self.narrate(f"交流顺利，检定 {total} >= 12，你从对方那里获得了一卷缺失的卷轴。")
-                    # 随机获得天或地卷轴
-                    scroll = random.choice(["天", "地"])
-                    ch.scrolls.add(scroll)
-                else:
-                    self.narrate(f"对方态度冷淡，检定 {total} < 12，未能取得收获。")
-        elif roll == 2:
-            # 敌队伏击
-            self.narrate(
-                f"{ch.name} 被一支敌对队伍埋伏，必须战斗或谈判。"
-            )
-            choice = self.prompt_choice("你的应对？", ["战斗", "谈判"])
-            if choice == "战斗":
-                success, total = ch.make_check("力量", 14)
-                if success:
-                    self.narrate(f"你击败了敌队，检定 {total} >= 14，夺得了一卷卷轴。")
-                    ch.scrolls.add(random.choice(["天", "地"]))
-                else:
-                    self.narrate(f"你未能战胜敌人，检定 {total} < 14，被迫撤退并受到 1 点疲劳。")
-                    ch.fatigue += 1
-            else:
-                success, total = ch.make_check("魅力", 14)
-                if success:
-                    self.narrate(f"谈判成功，检定 {total} >= 14，双方和平分开。")
-                else:
-                    self.narrate(f"谈判破裂，检定 {total} < 14，你受到伤害并失去一点灵感。")
-                    if ch.inspiration > 0:
-                        ch.inspiration -= 1
-        elif roll == 3:
-            # 环境险境
-            self.narrate(
-                f"{ch.name} 遭遇环境陷阱，需要躲避毒沼和捕兽夹。"
-            )
-            success, total = ch.make_check("敏捷", 14)
-            if success:
-                self.narrate(f"你灵巧地躲开了陷阱，检定 {total} >= 14，无伤通过。")
-            else:
-                self.narrate(f"你失足落入陷阱，检定 {total} < 14，受到 1d6 伤害并累积疲劳。")
-                damage = random.randint(1, 6)
-                ch.hit_points -= damage
-                ch.fatigue += 1
-        elif roll == 4:
-            # 隐藏卷轴
-            self.narrate(
-                f"{ch.name} 发现一个隐藏的卷轴箱，需要细心探索。"
-            )
-            success, total = ch.make_check("感知", 13)
-            if success:
-                scroll = random.choice(["天", "地"])
-                ch.scrolls.add(scroll)
-                self.narrate(f"你成功找到卷轴【{scroll}】，检定 {total} >= 13。")
-            else:
-                self.narrate(f"你搜索失败，检定 {total} < 13，错过了机会。")
-        elif roll == 5:
-            # 大蛇丸伏击
-            self.narrate(
-                f"{ch.name} 感受到了令人胆寒的气息，大蛇丸出现了！你选择？"
-            )
-            choice = self.prompt_choice("你的决定：", ["勇敢应战", "拼命逃跑"])
-            if choice == "勇敢应战":
-                success, total = ch.make_check("力量", 18)
-                if success:
-                    self.narrate(f"难以置信！你对抗大蛇丸竟有奇效，检定 {total} >= 18，得以保命。")
-                else:
-                    self.narrate(f"力量悬殊，检定 {total} < 18，你受到了重创并增加两级疲劳。")
-                    ch.hit_points -= random.randint(4, 8)
-                    ch.fatigue += 2
-            else:
-                success, total = ch.make_check("敏捷", 18)
-                if success:
-                    self.narrate(f"你速度惊人，检定 {total} >= 18，成功逃离大蛇丸。")
-                else:
-                    self.narrate(f"逃跑失败，检定 {total} < 18，你被施加诅咒并增加两级疲劳。")
-                    ch.fatigue += 2
-        else:
-            # 幻术试炼
-            self.narrate(
-                f"{ch.name} 被卷入幻术，需要突破内心的恐惧。"
-            )
-            success, total = ch.make_check("感知", 15)
-            if success:
-                self.narrate(f"你识破了幻术，检定 {total} >= 15，获得 1 点英雄灵感。")
-                ch.inspiration += 1
-            else:
-                self.narrate(f"幻术太过逼真，检定 {total} < 15，你迷失一轮并增加疲劳。")
-                ch.fatigue += 1
+        """按权重随机触发森林中的事件；事件内容与权重见 forest_events.json。"""
+        steps = forest_event_table().sample(self.rng)
+        self.play_event_steps(ch, steps, {"name": ch.name})
+
+    def play_event_steps(self, ch: Character, steps: tuple, values: Dict[str, object]) -> None:
+        """按顺序执行编译后的事件步骤；values 保存可在叙述中引用的 {name}/{total}/{scroll}。"""
+        for step in steps:
+            op = step[0]
+            if op == "narrate":
+                self.narrate(step[1].format(**values))
+            elif op == "choose":
+                _, question, options = step
+                choice = self.prompt_choice(question, [option for option, _ in options])
+                self.play_event_steps(ch, dict(options)[choice], values)
+            elif op == "check":
+                _, ability, dc, success, failure = step
+                passed, values["total"] = ch.make_check(ability, dc, self.rng)
+                self.play_event_steps(ch, success if passed else failure, values)
+            elif op == "scroll":
+                values["scroll"] = self.rng.choice(list(step[1]))
+                ch.scrolls.add(values["scroll"])
+            elif op == "damage":
+                ch.hit_points -= self.rng.randint(step[1], step[2])
+            elif op == "fatigue":
+                ch.fatigue += step[1]
+            elif op == "inspiration":
+                # 灵感不会被扣成负数
+                ch.inspiration = max(0, ch.inspiration + step[1])
 
     def stage_forest_of_death(self) -> None:
         """死亡森林阶段，包含多日探索与生存。"""
@@ -286,7 +351,7 @@ class DM:
         )
         # 初始化每个玩家拥有一个初始卷轴（随机天或地）
         for ch in self.players:
-            initial_scroll = random.choice(["天", "地"])
+            initial_scroll = self.rng.choice(["天", "地"])
             ch.scrolls.add(initial_scroll)
         # 五天循环
         while self.day <= 5:
@@ -319,7 +384,7 @@ class DM:
             for ch in self.players:
                 if ch.hit_points > 0 and ch.fatigue > 0:
                     # 体质检定：难度随天数增加
-                    success, total = ch.make_check("体质", 10 + self.day)
+                    success, total = ch.make_check("体质", 10 + self.day, self.rng)
                     if not success:
                         ch.fatigue += 1
                         self.narrate(f"{ch.name} 因疲劳检定失败，疲劳增加至 {ch.fatigue}。")
@@ -355,7 +420,7 @@ class DM:
             for round_no in range(1, 4):
                 # 每回合对手难度略升
                 dc = 14 + round_no
-                success, total = ch.make_check("力量", dc)
+                success, total = ch.make_check("力量", dc, self.rng)
                 if success:
                     wins += 1
                     self.narrate(f"第 {round_no} 回合，你压制了对手，检定 {total} >= {dc}。")
@@ -381,7 +446,7 @@ class DM:
         )
         for ch in finalists:
             # 感知检定察觉阴谋
-            success, total = ch.make_check("感知", 14)
+            success, total = ch.make_check("感知", 14, self.rng)
             if success:
                 self.narrate(f"{ch.name} 察觉到异样，检定 {total} >= 14，预感到即将发生的袭击。")
                 choice = self.prompt_choice(
@@ -389,7 +454,7 @@ class DM:
                 )
                 if choice.startswith("报警"):
                     # 协助防御需要力量或感知检定
-                    success2, total2 = ch.make_check("力量", 15)
+                    success2, total2 = ch.make_check("力量", 15, self.rng)
                     if success2:
                         self.narrate(f"{ch.name} 与上忍并肩作战，检定 {total2} >= 15，成功抵御了袭击！")
                         ch.winner = True
@@ -398,7 +463,7 @@ class DM:
                         ch.winner = False
                 else:
                     # 继续比赛：决赛对手检定
-                    success2, total2 = ch.make_check("力量", 16)
+                    success2, total2 = ch.make_check("力量", 16, self.rng)
                     if success2:
                         self.narrate(f"{ch.name} 在决赛中大放异彩，检定 {total2} >= 16，赢得最终胜利！")
                         ch.winner = True
@@ -407,7 +472,7 @@ class DM:
                         ch.winner = False
             else:
                 self.narrate(f"{ch.name} 没有察觉阴谋，检定 {total} < 14，只专注于比赛。")
-                success2, total2 = ch.make_check("力量", 16)
+                success2, total2 = ch.make_check("力量", 16, self.rng)
                 if success2:
                     self.narrate(f"你在决赛中获胜，检定 {total2} >= 16！")
                     ch.winner = True
@@ -0,0 +1,27 @@
+from game.block_random import BlockRandom
+
+
+def test_randint_survives_fully_rejected_blocks():
+    # With one byte per block most refills of a d20 (bytes >= 240 rejected)
+    # still succeed, but seed 1 hits rejected-only blocks within a few draws.
+    rng = BlockRandom(1, block_size=1)
+    draws = [rng.randint(1, 20) for _ in range(500)]
+    assert all(1 <= draw <= 20 for draw in draws)
+
+
+def test_randint_wide_byte_range_with_small_blocks():
+    # 1..200 rejects 56 of every 256 bytes, so four-byte blocks come back empty.
+    rng = BlockRandom(7, block_size=4)
+    draws = [rng.randint(1, 200) for _ in range(2000)]
+    assert min(draws) >= 1 and max(draws) <= 200
+    assert len(set(draws)) > 150
+
+
+def test_state_round_trip_with_small_blocks():
+    rng = BlockRandom(3, block_size=2)
+    for _ in range(17):
+        rng.randint(1, 200)
+    state = rng.getstate()
+    expected = [rng.randint(1, 200) for _ in range(50)]
+    rng.setstate(state)
+    assert [rng.randint(1, 200) for _ in range(50)] == expected
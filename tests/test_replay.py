@@ -0,0 +1,15 @@
+import struct
+
+from game.replay import DRAW, MAGIC, EventLog
+
+
+def test_large_draws_round_trip():
+    log = EventLog(seed=5)
+    log.draw(0, 2**40, 70000)
+    log.answer("要加入上忍防御木叶吗？(y/N): ", "y")
+    assert EventLog.loads(log.dumps()).events == log.events
+
+
+def test_version_1_logs_still_load():
+    data = struct.pack("<4sBBqH", MAGIC, 1, 0, 7, 0) + struct.pack("<Bhhh", DRAW, 1, 20, 13)
+    assert EventLog.loads(data).events == [(DRAW, 1, 20, 13)]